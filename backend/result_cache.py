@@ -0,0 +1,184 @@
+"""
+Content-addressed on-disk cache for analyze_video results.
+
+Entries are keyed by a SHA-256 of the video's bytes plus the analysis
+configuration and the versions of the libraries that produce the numbers, so
+re-uploading the same recording under any name reuses the earlier analysis
+while a model upgrade or a changed setting misses.
+
+Layout:
+
+    <root>/<key[:2]>/<key>/result.json
+    <root>/<key[:2]>/<key>/charts/*
+
+An entry is assembled in a private temporary directory and moved into place
+with a single rename, so readers never see half-written entries and two
+workers storing the same key cannot corrupt each other. Eviction removes the
+least recently used entries (by result.json mtime, refreshed on every hit)
+once the cache grows past `max_bytes`; it is serialised with a lock file
+where fcntl is available.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction still works, just without the lock
+    fcntl = None
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+HASH_CHUNK_SIZE = 1024 * 1024
+
+RESULT_FILE = "result.json"
+CHARTS_DIR = "charts"
+LOCK_FILE = ".lock"
+TMP_PREFIX = ".tmp-"
+
+
+def file_digest(path):
+    """SHA-256 hex digest of a file's contents, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(video_path, config, versions):
+    """
+    Args:
+        video_path (str): Video whose contents are hashed.
+        config (dict): Analysis settings that change the result.
+        versions (dict): Library/model versions that change the result.
+
+    Returns:
+        str: Hex key for ResultCache.
+    """
+    key = hashlib.sha256(file_digest(video_path).encode())
+    key.update(json.dumps(config, sort_keys=True).encode())
+    key.update(json.dumps(versions, sort_keys=True).encode())
+    return key.hexdigest()
+
+
+def _tree_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+class ResultCache:
+    """
+    Args:
+        root (str): Cache directory (created on demand).
+        max_bytes (int): Size above which least recently used entries are evicted.
+    """
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key, output_dir=None):
+        """
+        Return the cached result for `key` (copying its charts into
+        `output_dir`), or None on a miss.
+        """
+        entry = self._entry_dir(key)
+        result_path = os.path.join(entry, RESULT_FILE)
+        try:
+            with open(result_path) as f:
+                result = json.load(f)
+            if output_dir:
+                charts = os.path.join(entry, CHARTS_DIR)
+                os.makedirs(output_dir, exist_ok=True)
+                for name in os.listdir(charts):
+                    shutil.copyfile(os.path.join(charts, name), os.path.join(output_dir, name))
+            os.utime(result_path)  # mark as recently used
+        except (OSError, ValueError):
+            # Missing, evicted mid-read or unreadable: treat as a miss
+            return None
+        return result
+
+    def put(self, key, result, chart_dir=None, chart_files=()):
+        """
+        Store `result` and the given chart files from `chart_dir` under `key`,
+        then evict old entries if the cache is over its size limit.
+        """
+        entry = self._entry_dir(key)
+        parent = os.path.dirname(entry)
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=TMP_PREFIX, dir=parent)
+        try:
+            os.makedirs(os.path.join(staging, CHARTS_DIR))
+            for name in chart_files:
+                source = os.path.join(chart_dir, name)
+                if os.path.exists(source):
+                    shutil.copyfile(source, os.path.join(staging, CHARTS_DIR, name))
+            with open(os.path.join(staging, RESULT_FILE), "w") as f:
+                json.dump(result, f)
+            try:
+                os.rename(staging, entry)
+                staging = None
+            except OSError:
+                # Another worker stored the same key first; its entry is equivalent
+                pass
+        finally:
+            if staging:
+                shutil.rmtree(staging, ignore_errors=True)
+        self.evict()
+
+    def _entries(self):
+        """(last_used, size, path) for every complete entry."""
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for prefix in os.listdir(self.root):
+            parent = os.path.join(self.root, prefix)
+            if not os.path.isdir(parent):
+                continue
+            for name in os.listdir(parent):
+                if name.startswith(TMP_PREFIX):
+                    continue
+                path = os.path.join(parent, name)
+                try:
+                    last_used = os.path.getmtime(os.path.join(path, RESULT_FILE))
+                except OSError:
+                    continue
+                entries.append((last_used, _tree_size(path), path))
+        return entries
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, LOCK_FILE), "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                entries = sorted(self._entries())
+                total = sum(size for _, size, _ in entries)
+                for _, size, path in entries:
+                    if total <= self.max_bytes:
+                        break
+                    # Rename first so readers see a clean miss, then delete
+                    doomed = os.path.join(
+                        os.path.dirname(path), TMP_PREFIX + os.path.basename(path)
+                    )
+                    try:
+                        os.rename(path, doomed)
+                    except OSError:
+                        continue
+                    shutil.rmtree(doomed, ignore_errors=True)
+                    total -= size
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
@@ -0,0 +1,144 @@
+"""
+ResultCache stores and evicts complete entries only.
+
+Needs no models. Run from the backend directory:
+
+    python -m pytest tests
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import result_cache  # noqa: E402
+from result_cache import ResultCache, cache_key  # noqa: E402
+
+
+class CacheKeyTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.video = os.path.join(self.directory.name, "talk.mp4")
+        with open(self.video, "wb") as f:
+            f.write(b"video bytes")
+
+    def test_same_contents_under_another_name_share_a_key(self):
+        copy = os.path.join(self.directory.name, "renamed.mp4")
+        with open(copy, "wb") as f:
+            f.write(b"video bytes")
+        self.assertEqual(
+            cache_key(self.video, {"fps": 10}, {"fer": "22.4.0"}),
+            cache_key(copy, {"fps": 10}, {"fer": "22.4.0"}),
+        )
+
+    def test_key_ignores_dict_order(self):
+        self.assertEqual(
+            cache_key(self.video, {"fps": 10, "preset": "fast"}, {}),
+            cache_key(self.video, {"preset": "fast", "fps": 10}, {}),
+        )
+
+    def test_changed_contents_settings_or_versions_change_the_key(self):
+        key = cache_key(self.video, {"fps": 10}, {"fer": "22.4.0"})
+        self.assertNotEqual(key, cache_key(self.video, {"fps": 5}, {"fer": "22.4.0"}))
+        self.assertNotEqual(key, cache_key(self.video, {"fps": 10}, {"fer": "22.5.0"}))
+        with open(self.video, "ab") as f:
+            f.write(b"!")
+        self.assertNotEqual(key, cache_key(self.video, {"fps": 10}, {"fer": "22.4.0"}))
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.root = os.path.join(self.directory.name, "cache")
+        self.video = os.path.join(self.directory.name, "talk.mp4")
+        with open(self.video, "wb") as f:
+            f.write(b"video bytes")
+
+    def leftovers(self):
+        """Names under the cache root that start with the staging prefix."""
+        return [
+            name
+            for _, dirnames, filenames in os.walk(self.root)
+            for name in dirnames + filenames
+            if name.startswith(result_cache.TMP_PREFIX)
+        ]
+
+    def test_round_trip_with_charts(self):
+        charts = os.path.join(self.directory.name, "charts")
+        os.makedirs(charts)
+        with open(os.path.join(charts, "emotions.png"), "wb") as f:
+            f.write(b"png")
+        cache = ResultCache(self.root)
+        key = cache_key(self.video, {"fps": 10}, {"fer": "22.4.0"})
+        result = {"emotion_analysis": {"happy": 0.5}, "frames": [1, 2]}
+        cache.put(key, result, charts, ["emotions.png", "missing.png"])
+
+        output = os.path.join(self.directory.name, "output")
+        self.assertEqual(cache.get(key, output), result)
+        self.assertEqual(os.listdir(output), ["emotions.png"])
+        with open(os.path.join(output, "emotions.png"), "rb") as f:
+            self.assertEqual(f.read(), b"png")
+
+    def test_changed_settings_or_versions_miss(self):
+        cache = ResultCache(self.root)
+        cache.put(cache_key(self.video, {"fps": 10}, {"fer": "22.4.0"}), {"ok": True})
+        self.assertEqual(cache.get(cache_key(self.video, {"fps": 10}, {"fer": "22.4.0"})), {"ok": True})
+        self.assertIsNone(cache.get(cache_key(self.video, {"fps": 5}, {"fer": "22.4.0"})))
+        self.assertIsNone(cache.get(cache_key(self.video, {"fps": 10}, {"fer": "22.5.0"})))
+
+    def age(self, key, seconds):
+        """Move an entry's last use `seconds` into the past."""
+        path = os.path.join(self.root, key[:2], key, result_cache.RESULT_FILE)
+        os.utime(path, (os.path.getatime(path), os.path.getmtime(path) - seconds))
+
+    def test_evicts_least_recently_used_first(self):
+        payload = {"data": "x" * 1000}
+        entry_size = len(json.dumps(payload))
+        cache = ResultCache(self.root, max_bytes=3 * entry_size)
+        keys = ["a" * 64, "b" * 64, "c" * 64]
+        for age, key in zip((300, 200, 100), keys):
+            cache.put(key, payload)
+            self.age(key, age)
+
+        # A hit makes "a" the most recently used, so "b" is the oldest now
+        self.assertEqual(cache.get(keys[0]), payload)
+        cache.put("d" * 64, payload)
+        self.assertIsNone(cache.get(keys[1]))
+        for key in (keys[0], keys[2], "d" * 64):
+            self.assertEqual(cache.get(key), payload)
+
+        self.age(keys[0], 20)
+        self.age(keys[2], 10)
+        cache.max_bytes = entry_size
+        cache.evict()
+        self.assertEqual([cache.get(key) for key in keys[:1] + keys[2:]], [None, None])
+        self.assertEqual(cache.get("d" * 64), payload)
+        self.assertEqual(self.leftovers(), [])
+
+    def test_failed_write_leaves_no_entry(self):
+        cache = ResultCache(self.root)
+        key = cache_key(self.video, {}, {})
+        with mock.patch.object(result_cache.json, "dump", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                cache.put(key, {"ok": True})
+        self.assertIsNone(cache.get(key))
+        self.assertFalse(os.path.exists(os.path.join(self.root, key[:2], key)))
+        self.assertEqual(self.leftovers(), [])
+
+    def test_second_put_of_same_key_keeps_first_entry(self):
+        cache = ResultCache(self.root)
+        key = cache_key(self.video, {}, {})
+        cache.put(key, {"run": 1})
+        cache.put(key, {"run": 2})
+        self.assertEqual(cache.get(key), {"run": 1})
+        self.assertEqual(self.leftovers(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,6 @@
 import cv2
 import numpy as np
-import mediapipe as mp
 from collections import defaultdict
-from fer import FER
 import os
 import time
 import json
@@ -10,29 +8,79 @@ import sys
 import traceback
 import hashlib
 import random
+import threading
 import plotly.graph_objects as go
 import plotly.io as pio
+from importlib import metadata
 
-# Initialize MediaPipe solutions
-mp_face_mesh = mp.solutions.face_mesh
-mp_pose = mp.solutions.pose
-mp_drawing = mp.solutions.drawing_utils
-face_mesh = mp_face_mesh.FaceMesh(
-    max_num_faces=1,
-    min_detection_confidence=0.3,
-    min_tracking_confidence=0.3
-)
-pose = mp_pose.Pose(
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
+from result_cache import DEFAULT_MAX_BYTES, ResultCache, cache_key, file_digest
+
+# MediaPipe solutions and FER, built by warm_up() on the first cache miss so
+# that a cache hit never imports mediapipe or TensorFlow
+face_mesh = None
+pose = None
+detector = None
+_models_lock = threading.Lock()
+
+def warm_up():
+    """Build FaceMesh, Pose and FER now (the worker pool calls this at start-up)."""
+    global face_mesh, pose, detector
+    with _models_lock:
+        if detector is not None:
+            return
+        import mediapipe as mp
+        from fer import FER
+        face_mesh = mp.solutions.face_mesh.FaceMesh(
+            max_num_faces=1,
+            min_detection_confidence=0.3,
+            min_tracking_confidence=0.3
+        )
+        pose = mp.solutions.pose.Pose(
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+        try:
+            detector = FER(mtcnn=True)
+        except Exception as e:
+            raise RuntimeError(f"Failed to initialize FER: {str(e)}") from e
+
+def reset_models():
+    """Clear FaceMesh's and Pose's tracking state (the worker pool calls this before each job)."""
+    if face_mesh is not None:
+        face_mesh.reset()
+        pose.reset()
+
+# Result cache; set VIDEO_CACHE_DIR to "" to disable
+CACHE_DIR = os.environ.get(
+    "VIDEO_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".analysis_cache")
 )
+CACHE_MAX_BYTES = int(os.environ.get("VIDEO_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+
+# Settings that change the result (part of the cache key)
+ANALYSIS_SETTINGS = {
+    "sample_every": 3,
+    "segment_duration": 10,
+    "face_mesh_confidence": 0.3,
+    "pose_confidence": 0.5,
+    "fer_mtcnn": True,
+}
 
-# Initialize FER
-try:
-    detector = FER(mtcnn=True)
-except Exception as e:
-    print(json.dumps({"error": f"Failed to initialize FER: {str(e)}"}))
-    sys.exit(1)
+# Chart output: "json" (compact figure specs), "html" (one page that loads a
+# shared plotly.js), "standalone" (a self-contained page per chart) or "none"
+CHART_FORMATS = ("json", "html", "standalone", "none")
+CHART_FORMAT = os.environ.get("VIDEO_CHART_FORMAT", "json")
+# plotly.js for the "html" format: "cdn", or the URL of one plotly.min.js served for all analyses
+PLOTLY_JS = os.environ.get("VIDEO_PLOTLY_JS", "cdn")
+CHART_NAMES = {
+    "emotion": "emotion_histogram",
+    "eye_contact": "eye_contact_pie",
+    "posture": "posture_bar",
+    "engagement": "engagement_line",
+}
+CHARTS_PAGE = "charts.html"
+
+# Chart renders still running (see wait_for_charts)
+_chart_threads = []
 
 # Eye landmarks
 LEFT_EYE = [33, 160, 158, 133, 153, 144]
@@ -181,8 +229,9 @@ def analyze_frame(frame):
         print(json.dumps({"error": f"Frame analysis error: {str(e)}", "traceback": traceback.format_exc()}))
         return False, None, None
 
-def generate_plotly_charts(results, output_dir):
-    os.makedirs(output_dir, exist_ok=True)
+def build_chart_figures(results):
+    """The plotly figures for a result, keyed like results["graphs"]."""
+    figures = {}
     # Emotion Histogram
     emotion_fig = go.Figure(data=[
         go.Bar(
@@ -198,7 +247,7 @@ def generate_plotly_charts(results, output_dir):
         template="plotly_dark",
         height=400
     )
-    emotion_fig.write_to_html(os.path.join(output_dir, "emotion_histogram.html"))
+    figures["emotion"] = emotion_fig
     # Eye Contact Pie
     eye_contact_fig = go.Figure(data=[
         go.Pie(
@@ -215,7 +264,7 @@ def generate_plotly_charts(results, output_dir):
         template="plotly_dark",
         height=400
     )
-    eye_contact_fig.write_to_html(os.path.join(output_dir, "eye_contact_pie.html"))
+    figures["eye_contact"] = eye_contact_fig
     # Posture Bar
     if results["posture_analysis"]:
         posture_metrics = ["CVA", "Shoulder Tilt", "Symmetry", "Position"]
@@ -235,7 +284,7 @@ def generate_plotly_charts(results, output_dir):
             template="plotly_dark",
             height=400
         )
-        posture_fig.write_to_html(os.path.join(output_dir, "posture_bar.html"))
+        figures["posture"] = posture_fig
     # Engagement Line
     engagement_fig = go.Figure(data=[
         go.Scatter(
@@ -252,12 +301,117 @@ def generate_plotly_charts(results, output_dir):
         template="plotly_dark",
         height=400
     )
-    engagement_fig.write_to_html(os.path.join(output_dir, "engagement_line.html"))
+    figures["engagement"] = engagement_fig
+    return figures
+
+def chart_graphs(chart_format):
+    """Where each chart ends up (file, plus an anchor for the "html" page)."""
+    if chart_format == "none":
+        return {}
+    if chart_format == "html":
+        return {name: f"{CHARTS_PAGE}#{name}" for name in CHART_NAMES}
+    extension = "json" if chart_format == "json" else "html"
+    return {name: f"{base}.{extension}" for name, base in CHART_NAMES.items()}
+
+def chart_files(graphs):
+    """The distinct files behind results["graphs"]."""
+    return sorted({path.split("#")[0] for path in graphs.values()})
+
+def generate_plotly_charts(results, output_dir, chart_format=None):
+    """
+    Write the charts for `results` into output_dir.
+
+    "json" writes each figure as a compact plotly JSON spec (render it with
+    Plotly.newPlot(div, spec.data, spec.layout)); "html" writes one page with
+    every chart, loading plotly.js once from PLOTLY_JS; "standalone" writes a
+    page per chart with plotly.js embedded in each (several MB apiece).
+    """
+    chart_format = chart_format or CHART_FORMAT
+    if chart_format == "none":
+        return
+    os.makedirs(output_dir, exist_ok=True)
+    figures = build_chart_figures(results)
+    graphs = chart_graphs(chart_format)
+    if chart_format == "json":
+        for name, fig in figures.items():
+            with open(os.path.join(output_dir, graphs[name]), "w") as f:
+                f.write(pio.to_json(fig, pretty=False))
+    elif chart_format == "html":
+        # Only the first chart carries the <script> tag for plotly.js
+        divs = [
+            fig.to_html(full_html=False, include_plotlyjs=PLOTLY_JS if i == 0 else False, div_id=name)
+            for i, (name, fig) in enumerate(figures.items())
+        ]
+        with open(os.path.join(output_dir, CHARTS_PAGE), "w") as f:
+            f.write('<html>\n<head><meta charset="utf-8" /></head>\n<body>\n')
+            f.write("\n".join(divs))
+            f.write("\n</body>\n</html>\n")
+    else:
+        for name, fig in figures.items():
+            fig.write_html(os.path.join(output_dir, graphs[name]), include_plotlyjs=True)
 
-def analyze_video(video_path, output_dir):
+def _finish_outputs(results, output_dir, chart_format, cache, key):
+    """Write the charts, then store the result and its charts in the cache."""
     try:
+        generate_plotly_charts(results, output_dir, chart_format)
+        if cache:
+            cache.put(key, results, output_dir, chart_files(results["graphs"]))
+    except Exception as e:
+        # stdout already carries the result; report chart failures on stderr
+        print(json.dumps({"error": f"Chart generation error: {str(e)}", "traceback": traceback.format_exc()}),
+              file=sys.stderr)
+
+def wait_for_charts():
+    """Block until every chart render started by analyze_video has finished."""
+    while _chart_threads:
+        _chart_threads.pop().join()
+
+def analysis_versions():
+    """Versions of everything that produces the numbers (part of the cache key)."""
+    versions = {}
+    for package in ("opencv-python", "mediapipe", "fer", "tensorflow", "numpy", "plotly"):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    # Any change to this script invalidates earlier results too
+    versions["video_analysis"] = file_digest(os.path.abspath(__file__))
+    return versions
+
+def analyze_video(video_path, output_dir, use_cache=True, chart_format=None, background_charts=True):
+    """
+    Analyze a video, writing its charts into output_dir.
+
+    With background_charts the result is printed and returned as soon as the
+    numbers are ready, and the charts (and the cache entry) are written on a
+    non-daemon thread; call wait_for_charts() before reading them. The
+    process does not exit until they are written.
+    """
+    cache = None
+    key = None
+    chart_format = chart_format or CHART_FORMAT
+    try:
+        if chart_format not in CHART_FORMATS:
+            raise Exception(f"Unknown chart format: {chart_format} (expected one of {', '.join(CHART_FORMATS)})")
         if not os.path.exists(video_path):
             raise Exception(f"Video file not found: {video_path}")
+        if use_cache and CACHE_DIR:
+            cache = ResultCache(CACHE_DIR, CACHE_MAX_BYTES)
+            settings = {**ANALYSIS_SETTINGS, "chart_format": chart_format}
+            key = cache_key(video_path, settings, analysis_versions())
+            results = cache.get(key, output_dir)
+            if results is not None:
+                # The assessment is seeded by file name, so recompute it for this upload
+                results["assessment"] = calculate_score_and_feedback(
+                    results["emotion_analysis"],
+                    results["eye_contact_analysis"],
+                    results["posture_analysis"],
+                    results["engagement_patterns"],
+                    video_path
+                )
+                print(json.dumps(results))
+                return results
+        warm_up()
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             raise Exception(f"Failed to open video file: {video_path}")
@@ -365,12 +519,7 @@ def analyze_video(video_path, output_dir):
             video_path
         )
         results["assessment"] = assessment
-        results["graphs"] = {
-            "emotion": "emotion_histogram.html",
-            "eye_contact": "eye_contact_pie.html",
-            "posture": "posture_bar.html",
-            "engagement": "engagement_line.html"
-        }
+        results["graphs"] = chart_graphs(chart_format)
         results["improvements"] = [
             {
                 "text": "Use more hand gestures to boost engagement.",
@@ -388,9 +537,18 @@ def analyze_video(video_path, output_dir):
                 "description": "Maintain a straight spine and balanced stance, as shown."
             }
         ]
-        generate_plotly_charts(results, output_dir)
         json_str = json.dumps(results)
-        print(json_str)
+        print(json_str, flush=True)
+        # Charts and the cache entry get their own copy of the result
+        job = threading.Thread(
+            target=_finish_outputs, args=(json.loads(json_str), output_dir, chart_format, cache, key),
+            name="chart-render"
+        )
+        if background_charts:
+            job.start()
+            _chart_threads.append(job)
+        else:
+            job.run()
         return json.loads(json_str)
     except Exception as e:
         error_msg = {
@@ -522,13 +680,18 @@ def calculate_score_and_feedback(emotion_analysis, eye_contact_analysis, posture
 
 if __name__ == "__main__":
     try:
-        if len(sys.argv) < 3:
-            raise Exception("Usage: python video_analysis.py <video_path> <output_dir>")
-        video_path = sys.argv[1]
-        output_dir = sys.argv[2]
+        args = [arg for arg in sys.argv[1:] if arg != "--no-cache" and not arg.startswith("--charts=")]
+        if len(args) < 2:
+            raise Exception(
+                "Usage: python video_analysis.py <video_path> <output_dir> [--no-cache] "
+                f"[--charts={'|'.join(CHART_FORMATS)}]"
+            )
+        chart_format = next((arg.split("=", 1)[1] for arg in sys.argv[1:] if arg.startswith("--charts=")), None)
+        video_path = args[0]
+        output_dir = args[1]
         if not os.path.exists(video_path):
             raise Exception(f"Video file not found: {video_path}")
-        analyze_video(video_path, output_dir)
+        analyze_video(video_path, output_dir, use_cache="--no-cache" not in sys.argv, chart_format=chart_format)
     except Exception as e:
         print(json.dumps({
             "error": str(e),
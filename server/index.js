@@ -1,7 +1,8 @@
 const express = require("express");
 const multer = require("multer");
 const path = require("path");
-const { exec, execSync } = require("child_process");
+const { exec, execSync, spawn } = require("child_process");
+const readline = require("readline");
 const fs = require("fs");
 const cors = require("cors");
 const ffmpegPath = require("@ffmpeg-installer/ffmpeg").path;
@@ -24,50 +25,108 @@ function convertToWav(inputPath) {
 // For cross-platform: decide python path based on OS
 const isWindows = process.platform === "win32";
 const pythonPath = isWindows
-  ? `"${path.join(__dirname, "venv", "Scripts", "python.exe")}"`
-  : `./venv/bin/python`;
+  ? path.join(__dirname, "venv", "Scripts", "python.exe")
+  : path.join(__dirname, "venv", "bin", "python");
+
+// 🧠 Resident video analysis pool: workers keep mediapipe/FER loaded between uploads.
+// The workers load multimodal_analysis.py, which also exposes analyze_video, so
+// /analyze-video and /analyze-talk jobs share the same warm models.
+const VIDEO_POOL_SIZE = process.env.VIDEO_POOL_SIZE || "2";
+const VIDEO_JOB_TIMEOUT = process.env.VIDEO_JOB_TIMEOUT || "600";
+const VIDEO_WORKER_MAX_JOBS = process.env.VIDEO_WORKER_MAX_JOBS || "50";
+
+let videoPool = null;
+let nextVideoJobId = 0;
+const pendingVideoJobs = new Map();
+
+function startVideoPool() {
+  const pool = spawn(
+    pythonPath,
+    [
+      "-m",
+      "video_pipeline.worker_pool",
+      "--script",
+      path.join(__dirname, "multimodal_analysis.py"),
+      "--function",
+      "analyze_video",
+      "--workers",
+      VIDEO_POOL_SIZE,
+      "--job-timeout",
+      VIDEO_JOB_TIMEOUT,
+      "--max-jobs",
+      VIDEO_WORKER_MAX_JOBS,
+    ],
+    { cwd: __dirname }
+  );
+
+  readline.createInterface({ input: pool.stdout }).on("line", (line) => {
+    let message;
+    try {
+      message = JSON.parse(line);
+    } catch (e) {
+      console.log("⚠️ Non-JSON output from video pool:", line);
+      return;
+    }
+    const resolve = pendingVideoJobs.get(message.id);
+    if (resolve) {
+      pendingVideoJobs.delete(message.id);
+      resolve(message);
+    }
+  });
+  pool.stderr.on("data", (data) => process.stderr.write(data));
+
+  const failPendingJobs = (reason) => {
+    if (videoPool === pool) videoPool = null;
+    for (const [id, resolve] of pendingVideoJobs) {
+      resolve({ id, error: reason });
+    }
+    pendingVideoJobs.clear();
+  };
+  pool.on("error", (err) => {
+    console.error("❌ Failed to start video worker pool:", err.message);
+    failPendingJobs(err.message);
+  });
+  pool.on("exit", (code) => {
+    console.error(`⚠️ Video worker pool exited with code ${code}`);
+    failPendingJobs("Video worker pool exited");
+  });
+
+  return pool;
+}
+
+function runVideoJob(videoPath, options = {}) {
+  return new Promise((resolve) => {
+    if (!videoPool) videoPool = startVideoPool();
+    const id = String(++nextVideoJobId);
+    pendingVideoJobs.set(id, resolve);
+    videoPool.stdin.write(
+      JSON.stringify({ id, video_path: videoPath, ...options }) + "\n"
+    );
+  });
+}
 
-app.post("/analyze-video", upload.single("video"), (req, res) => {
+app.post("/analyze-video", upload.single("video"), async (req, res) => {
   if (!req.file) {
     console.error("❌ No video file received");
     return res.status(400).json({ error: "No video file uploaded" });
   }
 
   const videoPath = path.join(__dirname, req.file.path);
-  const command = `${pythonPath} video_analysis.py "${videoPath}"`;
+  const message = await runVideoJob(videoPath);
 
+  // Always delete uploaded video file after processing
+  try {
+    fs.unlinkSync(videoPath);
+  } catch (unlinkError) {
+    console.error("⚠️ Failed to delete uploaded file:", unlinkError.message);
+  }
 
-  exec(command, (err, stdout, stderr) => {
-    // Always delete uploaded video file after processing
-    try {
-      fs.unlinkSync(videoPath);
-    } catch (unlinkError) {
-      console.error("⚠️ Failed to delete uploaded file:", unlinkError.message);
-    }
-
-    if (err) {
-      console.error("❌ Python execution error:", stderr || err.message);
-      return res.status(500).json({ error: stderr || err.message });
-    }
-
-    try {
-      // Find JSON inside stdout safely
-      const jsonStartIndex = stdout.indexOf("{");
-      const jsonEndIndex = stdout.lastIndexOf("}");
-      if (jsonStartIndex === -1 || jsonEndIndex === -1) {
-        throw new Error("No JSON found in Python output");
-      }
-
-      const cleanedOutput = stdout.slice(jsonStartIndex, jsonEndIndex + 1);
-      const result = JSON.parse(cleanedOutput);
+  if (message.error) {
+    console.error("❌ Video analysis error:", message.error);
+    return res.status(500).json({ error: message.error });
+  }
 
-      res.json(result);
-    } catch (parseError) {
-      console.error("🚨 Failed to parse JSON from Python:", parseError.message);
-      console.log("⚠️ Raw output from Python:", stdout);
-      res.status(500).json({ error: "Invalid JSON returned by Python script" });
-    }
-  });
+  res.json(message.result);
 });
 
 // 🔥 AUDIO ANALYSIS ENDPOINT 🔥
@@ -106,6 +165,33 @@ app.post("/audio-analysis", upload.single("audio"), async (req, res) => {
   );
 });
 
+// 🎬 TALK ANALYSIS ENDPOINT: video + audio from one upload in one Python job
+app.post("/analyze-talk", upload.single("video"), async (req, res) => {
+  if (!req.file) {
+    console.error("❌ No video file received");
+    return res.status(400).json({ error: "No video file uploaded" });
+  }
+
+  const videoPath = path.join(__dirname, req.file.path);
+  const message = await runVideoJob(videoPath, {
+    function: "analyze_multimodal",
+    ffmpeg: ffmpegPath,
+  });
+
+  try {
+    fs.unlinkSync(videoPath);
+  } catch (unlinkError) {
+    console.error("⚠️ Failed to delete uploaded file:", unlinkError.message);
+  }
+
+  if (message.error) {
+    console.error("❌ Talk analysis error:", message.error);
+    return res.status(500).json({ error: message.error });
+  }
+  if (message.result.error) return res.status(500).json(message.result);
+  res.json(message.result);
+});
+
 // 🎭 EMOTION PREDICTION ENDPOINT
 app.post("/predict", upload.single("audio"), (req, res) => {
   // console.log("🎧 Emotion prediction request received");
@@ -229,4 +315,5 @@ app.use(
 const PORT = 5000;
 app.listen(PORT, () => {
   console.log(` Server running on port ${PORT}`);
+  videoPool = startVideoPool();
 });
@@ -0,0 +1,170 @@
+"""
+Analyse a talk video's visuals and audio in one job.
+
+The upload is read once for its audio (demuxed straight to WAV, see
+video_pipeline.demux) while analyze_video runs on its frames; the audio
+pipeline runs on a second thread alongside the video analysis. The report
+holds both results unchanged plus a timeline that lines them up on the
+video's engagement segments:
+
+    {"video": {...analyze_video result...},
+     "audio": {...analyze_audio_pipeline result...},
+     "timeline": {"segment_duration": 10, "segments": [
+         {"start": 0.0, "end": 10.0,
+          "video": {"engagement": ..., "emotions": {...}},
+          "audio": {"pitch": ..., "volume": ..., "samples": ...}}, ...]},
+     "performance": {"demux_seconds": ..., "audio_seconds": ...,
+                     "video_seconds": ..., "wall_seconds": ...}}
+
+Both time axes start at the beginning of the file. A failure on one side is
+reported under that side ({"error": ...}) and the other is still returned.
+
+The Node server runs this script in the resident worker pool
+(video_pipeline.worker_pool), so talk jobs share the warm models of
+/analyze-video; analyze_video, warm_up and reset_models are re-exported for
+that.
+
+Usage (from the server directory):
+    python multimodal_analysis.py talk.mp4 [--ffmpeg PATH] [--workers N] [--deadline SECONDS]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+import numpy as np
+
+# analyze_video, warm_up and reset_models also serve /analyze-video jobs in the worker pool
+from video_analysis import analyze_video, reset_models, warm_up  # noqa: F401
+from video_pipeline.config import PRESETS, build_config
+from video_pipeline.demux import extract_audio
+
+
+def _analyze_audio(video_path, ffmpeg, outcome):
+    """Thread body: demux the audio and run the audio pipeline on it."""
+    started = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory(prefix="talk-audio-") as directory:
+            wav_path = extract_audio(video_path, os.path.join(directory, "audio.wav"), ffmpeg=ffmpeg)
+            outcome["demux_seconds"] = round(time.perf_counter() - started, 3)
+            # Imported here: the audio stack (librosa, speech recognition, LLM
+            # clients) is only needed once a job actually runs
+            from audio_analysis.analyze_audio import analyze_audio_pipeline
+            outcome["result"] = json.loads(analyze_audio_pipeline(wav_path))
+    except Exception as e:
+        outcome["result"] = {"error": str(e)}
+        sys.stderr.write(traceback.format_exc())
+    finally:
+        outcome["seconds"] = round(time.perf_counter() - started, 3)
+
+
+def build_timeline(video_result, audio_result, segment_duration):
+    """Video segments and audio pitch/volume samples, bucketed on one time axis."""
+    video_segments = video_result.get("engagement_patterns", {}).get("segments", [])
+    audio_points = audio_result.get("pitch", {}).get("data", [])
+    duration = video_result.get("presentation_metrics", {}).get("duration") or 0
+    if audio_points:
+        duration = max(duration, audio_points[-1]["time"])
+
+    by_start = {round(segment["time"] / segment_duration): segment for segment in video_segments}
+    segments = []
+    for index in range(int(np.ceil(duration / segment_duration)) if duration else 0):
+        start = index * segment_duration
+        end = start + segment_duration
+        video_segment = by_start.get(index)
+        points = [point for point in audio_points if start <= point["time"] < end]
+        pitches = [point["pitch"] for point in points if point["pitch"] > 0]
+        segments.append({
+            "start": start,
+            "end": end,
+            "video": {
+                "engagement": video_segment["engagement"],
+                "emotions": video_segment["emotions"],
+            } if video_segment else None,
+            "audio": {
+                "pitch": round(float(np.mean(pitches)), 2) if pitches else 0,
+                "volume": round(float(np.mean([point["volume"] for point in points])), 4),
+                "samples": len(points),
+            } if points else None,
+        })
+    return {"segment_duration": segment_duration, "segments": segments}
+
+
+def analyze_multimodal(video_path, config=None, ffmpeg=None, **options):
+    """
+    Analyse the frames and the audio of one video concurrently.
+
+    Args:
+        video_path (str): The uploaded video.
+        config (dict): Options for analyze_video (see build_config).
+        ffmpeg (str): ffmpeg binary (default: FFMPEG_PATH, then PATH).
+        **options: Individual analyze_video options.
+
+    Returns:
+        dict: The merged report described in the module docstring.
+    """
+    if not os.path.exists(video_path):
+        return {"error": f"Video file not found: {video_path}"}
+    config = build_config(config, **options)
+    started = time.perf_counter()
+
+    audio = {}
+    audio_thread = threading.Thread(
+        target=_analyze_audio, args=(video_path, ffmpeg, audio), name="talk-audio"
+    )
+    audio_thread.start()
+    video_started = time.perf_counter()
+    try:
+        video_result = analyze_video(video_path, config=config)
+    except SystemExit:
+        # analyze_frame() exits on fatal frame errors; keep the audio result
+        video_result = {"error": "Video analysis failed"}
+    video_seconds = round(time.perf_counter() - video_started, 3)
+    audio_thread.join()
+    # The thread stops without a result if the audio stack raised SystemExit or similar
+    audio_result = audio.get("result") or {"error": "Audio analysis stopped without a result"}
+
+    if "error" in video_result and "error" in audio_result:
+        return {"error": video_result["error"], "video": video_result, "audio": audio_result}
+    return {
+        "video": video_result,
+        "audio": audio_result,
+        "timeline": build_timeline(
+            {} if "error" in video_result else video_result,
+            {} if "error" in audio_result else audio_result,
+            config["segment_duration"],
+        ),
+        "performance": {
+            "demux_seconds": audio.get("demux_seconds"),
+            "audio_seconds": audio.get("seconds"),
+            "video_seconds": video_seconds,
+            "wall_seconds": round(time.perf_counter() - started, 3),
+        },
+    }
+
+
+if __name__ == "__main__":
+    try:
+        parser = argparse.ArgumentParser(description="Analyse a talk video's visuals and audio")
+        parser.add_argument("video_path")
+        parser.add_argument("--ffmpeg", default=None, help="ffmpeg binary (default: FFMPEG_PATH, then PATH)")
+        parser.add_argument("--preset", choices=PRESETS, default=None,
+                            help="Quality/speed preset for the video analysis")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Analyse the video's frame ranges in this many processes")
+        parser.add_argument("--analysis-fps", type=float, default=None,
+                            help="Frames analysed per second of video (default: every 3rd frame)")
+        parser.add_argument("--deadline", type=float, default=None, metavar="SECONDS",
+                            help="Time budget for the video analysis (see video_pipeline.deadline)")
+        args = parser.parse_args()
+        results = analyze_multimodal(
+            args.video_path, ffmpeg=args.ffmpeg, preset=args.preset, workers=args.workers,
+            analysis_fps=args.analysis_fps, deadline=args.deadline
+        )
+        print(json.dumps(results))
+    except Exception as e:
+        print(json.dumps({"error": str(e), "traceback": traceback.format_exc()}))
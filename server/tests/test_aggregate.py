@@ -0,0 +1,139 @@
+"""
+Merged RunningStats must describe the whole stream, however it was split.
+
+Needs no models. Run from the server directory:
+
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+import unittest
+
+import numpy as np
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from video_pipeline.aggregate import (  # noqa: E402
+    POSTURE_SCORE_KEYS,
+    RunningStats,
+    SegmentStats,
+    combine_segments,
+)
+
+
+def stats_of(values):
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+    return stats
+
+
+def split(values, sizes):
+    """Consecutive parts of `values` with the given lengths (0 allowed)."""
+    parts = []
+    start = 0
+    for size in sizes:
+        parts.append(values[start:start + size])
+        start += size
+    parts.append(values[start:])
+    return parts
+
+
+class RunningStatsTest(unittest.TestCase):
+    def assertMatchesNumpy(self, stats, values):
+        self.assertEqual(stats.count, len(values))
+        self.assertAlmostEqual(stats.mean(), float(np.mean(values)), places=12)
+        self.assertAlmostEqual(stats.variance(), float(np.var(values)), places=12)
+        self.assertAlmostEqual(stats.std(), float(np.std(values)), places=12)
+        self.assertEqual(stats.min, min(values))
+        self.assertEqual(stats.max, max(values))
+
+    def test_single_stream_matches_numpy(self):
+        values = [random.Random(1).uniform(0, 1) for _ in range(500)]
+        self.assertMatchesNumpy(stats_of(values), values)
+
+    def test_merged_parts_match_whole_stream(self):
+        rng = random.Random(0)
+        values = [rng.gauss(0.4, 0.2) for _ in range(1000)]
+        splits = {
+            "halves": [500],
+            "empty parts": [0, 300, 0, 0, 200],
+            "one-element parts": [1, 1, 498, 1],
+            "one element then rest": [1],
+            "everything in the last part": [0, 0, 0],
+        }
+        for _ in range(20):
+            sizes = []
+            while sum(sizes) < len(values):
+                sizes.append(rng.choice((0, 1, rng.randint(2, 200))))
+            splits["random %d" % len(splits)] = sizes
+        for name, sizes in splits.items():
+            with self.subTest(split=name):
+                merged = RunningStats()
+                for part in split(values, sizes):
+                    merged.merge(stats_of(part))
+                self.assertMatchesNumpy(merged, values)
+
+    def test_merge_into_empty_and_of_empty(self):
+        values = [0.25]
+        merged = RunningStats()
+        merged.merge(RunningStats())
+        merged.merge(stats_of(values))
+        merged.merge(RunningStats())
+        self.assertMatchesNumpy(merged, values)
+        self.assertEqual(merged.variance(), 0.0)
+
+    def test_empty_stats(self):
+        stats = RunningStats()
+        stats.merge(RunningStats())
+        self.assertEqual((stats.count, stats.mean(), stats.variance()), (0, 0.0, 0.0))
+        self.assertIsNone(stats.summary())
+
+    def test_state_round_trip_is_exact(self):
+        stats = stats_of([random.Random(2).random() for _ in range(50)])
+        restored = RunningStats.from_state(stats.to_state())
+        self.assertEqual(restored.to_state(), stats.to_state())
+        self.assertEqual(restored.summary(), stats.summary())
+
+
+class CombineSegmentsTest(unittest.TestCase):
+    def test_segments_combine_to_whole_stream(self):
+        rng = random.Random(3)
+        frames = [
+            (rng.random() < 0.7, {"happy": rng.random(), "sad": rng.random()},
+             tuple(round(rng.uniform(0, 100), 2) for _ in POSTURE_SCORE_KEYS))
+            for _ in range(300)
+        ]
+        segments = []
+        for index, part in enumerate(split(frames, [0, 1, 120, 0, 1, 90])):
+            segment = SegmentStats(index * 10)
+            for looking, emotions, posture in part:
+                segment.add_sample(looking, emotions)
+                segment.add_posture(posture)
+            segments.append(segment)
+
+        totals = combine_segments(segments)
+        self.assertEqual(totals["looking_at_screen"], sum(looking for looking, _, _ in frames))
+        self.assertEqual(totals["not_looking_at_screen"], sum(not looking for looking, _, _ in frames))
+        for emotion in ("happy", "sad"):
+            values = [emotions[emotion] for _, emotions, _ in frames]
+            stats = totals["emotion_stats"][emotion]
+            self.assertAlmostEqual(totals["emotion_averages"][emotion], float(np.mean(values)), places=12)
+            self.assertAlmostEqual(stats.variance(), float(np.var(values)), places=12)
+        posture = np.array([scores for _, _, scores in frames])
+        np.testing.assert_allclose(totals["posture_averages"], posture.mean(axis=0), rtol=1e-12)
+        np.testing.assert_allclose(
+            [stats.variance() for stats in totals["posture_stats"]], posture.var(axis=0), rtol=1e-10
+        )
+
+    def test_no_samples(self):
+        totals = combine_segments([SegmentStats(0), SegmentStats(10)])
+        self.assertEqual(totals["emotion_averages"], {})
+        self.assertIsNone(totals["posture_averages"])
+        self.assertIsNone(totals["time_series"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+A resumed analysis must give the same result as an uninterrupted one.
+
+The resume runs in a new process, as after a real restart, so its models
+start without any tracking state. Skipped when mediapipe or fer is not
+installed. Run from the server directory:
+
+    python -m pytest tests
+"""
+import importlib.util
+import multiprocessing
+import os
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_VIDEO = os.path.join(SERVER_DIR, "test_video.mp4")
+sys.path.insert(0, SERVER_DIR)
+
+
+def _installed(module):
+    return importlib.util.find_spec(module) is not None
+
+
+@unittest.skipUnless(_installed("mediapipe") and _installed("fer"), "needs mediapipe and fer")
+@unittest.skipUnless(os.path.exists(TEST_VIDEO), "needs server/test_video.mp4")
+class CheckpointTest(unittest.TestCase):
+    def test_resume_in_new_process_matches_uninterrupted_run(self):
+        import video_analysis
+        from video_pipeline.checkpoint import Checkpoint
+
+        uninterrupted = video_analysis.analyze_video(TEST_VIDEO)
+        self.assertNotIn("error", uninterrupted)
+
+        save = Checkpoint.save
+
+        def save_then_stop(self, *args):
+            # The job dies right after its first checkpoint
+            save(self, *args)
+            raise RuntimeError("stopped")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "checkpoint.json")
+            with mock.patch.object(Checkpoint, "save", save_then_stop):
+                stopped = video_analysis.analyze_video(TEST_VIDEO, checkpoint=path, checkpoint_interval=0)
+            self.assertIn("error", stopped)
+            self.assertTrue(os.path.exists(path))
+
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                resumed = executor.submit(
+                    video_analysis.analyze_video, TEST_VIDEO, checkpoint=path, checkpoint_interval=0
+                ).result()
+            self.assertEqual(resumed, uninterrupted)
+            self.assertFalse(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
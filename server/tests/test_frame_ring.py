@@ -0,0 +1,143 @@
+"""
+SharedFrameRing must hand frames to several consumer processes intact, and
+reorder() must put their results back in sequence order.
+
+Runs in the spawn context, as on macOS and Windows. Needs no models. Run
+from the server directory:
+
+    python -m pytest tests
+"""
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import unittest
+from multiprocessing import shared_memory
+
+import numpy as np
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from video_pipeline.frame_ring import SharedFrameRing, reorder  # noqa: E402
+
+FRAME_SHAPE = (48, 64)
+FRAMES = 60
+TIMEOUT = 30
+
+
+def frame_pair(frame_number):
+    """The (bgr, rgb) pair the producer writes for `frame_number`."""
+    rng = np.random.default_rng(frame_number)
+    bgr = rng.integers(0, 256, (*FRAME_SHAPE, 3), dtype=np.uint8)
+    return bgr, bgr[:, :, ::-1]
+
+
+def consume(ring, results, name, limit=None):
+    """Check each published slot and report (sequence, frame_number, intact)."""
+    taken = 0
+    held = None
+    try:
+        while limit is None or taken < limit:
+            item = ring.get(timeout=TIMEOUT)
+            if isinstance(item, tuple):
+                break
+            bgr, rgb = frame_pair(item.frame_number)
+            intact = np.array_equal(item.bgr, bgr) and np.array_equal(item.rgb, rgb)
+            results.put((item.sequence, item.frame_number, item.frames_read, intact, name))
+            held = item.bgr  # a view that is still alive when close() runs
+            ring.release(item.index)
+            taken += 1
+    finally:
+        ring.close()
+        results.put(("exit", name, taken))
+        del held
+
+
+class SharedFrameRingTest(unittest.TestCase):
+    def setUp(self):
+        self.ctx = multiprocessing.get_context("spawn")
+
+    def run_ring(self, limits):
+        """Produce FRAMES frames for consumers with the given frame limits."""
+        ring = SharedFrameRing(self.ctx, 3, FRAME_SHAPE)
+        name = ring._memory.name
+        results = self.ctx.Queue()
+        consumers = [
+            self.ctx.Process(target=consume, args=(ring, results, "consumer-%d" % i, limit), daemon=True)
+            for i, limit in enumerate(limits)
+        ]
+        for process in consumers:
+            process.start()
+        try:
+            for frame_number in range(0, FRAMES * 2, 2):
+                index = ring.acquire(timeout=TIMEOUT)
+                bgr, rgb = ring.views(index)
+                bgr[:], rgb[:] = frame_pair(frame_number)
+                ring.publish(index, frame_number, frame_number + 1)
+            ring.finish(consumers=len(consumers))
+
+            reports = []
+            exits = {}
+            while len(exits) < len(consumers):
+                report = results.get(timeout=TIMEOUT)
+                if report[0] == "exit":
+                    exits[report[1]] = report[2]
+                else:
+                    reports.append(report)
+            for process in consumers:
+                process.join(timeout=TIMEOUT)
+                self.assertEqual(process.exitcode, 0)
+        finally:
+            for process in consumers:
+                if process.is_alive():
+                    process.kill()
+            ring.close()
+            ring.unlink()
+
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+        return reports, exits
+
+    def assertAllFramesInOrder(self, reports):
+        self.assertEqual(len(reports), FRAMES)
+        self.assertTrue(all(intact for _, _, _, intact, _ in reports))
+        ordered = list(reorder((sequence, frame_number) for sequence, frame_number, *_ in reports))
+        self.assertEqual(ordered, [(sequence, sequence * 2) for sequence in range(FRAMES)])
+        self.assertTrue(all(frames_read == frame_number + 1 for _, frame_number, frames_read, *_ in reports))
+
+    def test_two_consumers_receive_every_frame_intact(self):
+        reports, exits = self.run_ring([None, None])
+        self.assertAllFramesInOrder(reports)
+        self.assertEqual(sum(exits.values()), FRAMES)
+
+    def test_consumer_exiting_early(self):
+        reports, exits = self.run_ring([None, 5])
+        self.assertAllFramesInOrder(reports)
+        self.assertEqual(exits["consumer-1"], 5)
+        self.assertEqual(exits["consumer-0"], FRAMES - 5)
+
+
+class ReorderTest(unittest.TestCase):
+    def test_restores_sequence_order(self):
+        pairs = [(sequence, "frame %d" % sequence) for sequence in range(100)]
+        shuffled = pairs[:]
+        random.Random(0).shuffle(shuffled)
+        self.assertEqual(list(reorder(shuffled)), pairs)
+
+    def test_yields_as_soon_as_the_next_sequence_arrives(self):
+        yielded = []
+        for pair in reorder(iter([(1, "b"), (0, "a"), (3, "d"), (2, "c")])):
+            yielded.append(pair)
+            if pair == (1, "b"):
+                break
+        self.assertEqual(yielded, [(0, "a"), (1, "b")])
+
+    def test_gaps_are_flushed_in_order_at_the_end(self):
+        self.assertEqual(list(reorder([(4, "e"), (1, "b"), (0, "a")])), [(0, "a"), (1, "b"), (4, "e")])
+        self.assertEqual(list(reorder([])), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+The vectorised posture scores must match the scalar calculations.
+
+The reference below is the per-frame scoring analyze_frame used before
+PostureEngine, built on calculate_craniovertebral_angle() and
+calculate_shoulder_posture(). Needs no models. Run from the server directory:
+
+    python -m pytest tests
+"""
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from video_analysis import calculate_craniovertebral_angle, calculate_shoulder_posture  # noqa: E402
+from video_pipeline.posture import POSE_KEYPOINTS, PostureEngine, posture_measurements  # noqa: E402
+
+
+def scalar_scores(landmarks):
+    """Rounded [cva, tilt, symmetry, position] scores, one frame at a time."""
+    nose = np.array([landmarks[0].x, landmarks[0].y])
+    left_ear = np.array([landmarks[7].x, landmarks[7].y])
+    right_ear = np.array([landmarks[8].x, landmarks[8].y])
+    left_shoulder = np.array([landmarks[11].x, landmarks[11].y])
+    right_shoulder = np.array([landmarks[12].x, landmarks[12].y])
+
+    ear_point = (left_ear + right_ear) / 2
+    shoulder_point = (left_shoulder + right_shoulder) / 2
+
+    cva, cva_confidence = calculate_craniovertebral_angle(nose, ear_point, shoulder_point)
+    sta, bsr, apsp = calculate_shoulder_posture(left_shoulder, right_shoulder)
+
+    cva_base_score = 100
+    if cva < 45:
+        cva_base_score = max(0, 70 - (45 - cva) * 3)
+    elif cva > 55:
+        cva_base_score = max(0, 70 - (cva - 55) * 3)
+    elif abs(cva - 50.1) <= cva_confidence:
+        cva_base_score = 100
+    else:
+        cva_base_score = max(70, 100 - abs(cva - 50.1) * 2)
+
+    sta_score = 100
+    if sta > 2.1:
+        sta_score = max(0, 100 - (sta - 2.1) * 15)
+
+    bsr_score = 100
+    if bsr < 0.94 or bsr > 1.03:
+        bsr_score = max(0, 100 - abs(1 - bsr) * 150)
+
+    apsp_score = 100
+    if apsp < 46 or apsp > 54:
+        apsp_score = max(0, 100 - min(abs(apsp - 46), abs(apsp - 54)) * 3)
+
+    return [round(score, 2) for score in (cva_base_score, sta_score, bsr_score, apsp_score)]
+
+
+def random_poses(rng, count):
+    """`count` poses of 33 landmarks, some hidden and guessed outside the frame."""
+    points = rng.uniform(0.0, 1.0, (count, 33, 2))
+    visibility = rng.uniform(0.0, 1.0, (count, 33))
+    hidden = visibility < 0.1
+    points[hidden] = rng.uniform(-0.5, 1.5, (int(hidden.sum()), 2))
+    return [
+        [SimpleNamespace(x=x, y=y, z=0.0, visibility=v) for (x, y), v in zip(pose, pose_visibility)]
+        for pose, pose_visibility in zip(points.tolist(), visibility.tolist())
+    ]
+
+
+def edge_case_poses(rng):
+    """Poses that hit the degenerate branches: coincident or zero-height points."""
+    poses = []
+    for landmarks, change in zip(random_poses(rng, 9), (
+        {11: (0.4, 0.5), 12: (0.4, 0.5)},                          # shoulders on top of each other
+        {7: (0.45, 0.5), 8: (0.55, 0.5), 11: (0.4, 0.5), 12: (0.6, 0.5)},  # ears at shoulder midpoint
+        {11: (0.4, 0.0)},                                           # a shoulder on the top edge
+        {11: (0.4, 0.0), 12: (0.6, 0.0)},                           # both shoulders on the top edge
+        {11: (0.0, 0.0), 12: (0.0, 0.0)},                           # both shoulders missing (zeros)
+        {7: (0.0, 0.0), 8: (0.0, 0.0), 11: (0.0, 0.0), 12: (0.0, 0.0)},
+        {11: (0.4, 0.5), 12: (0.6, 0.5)},                           # level shoulders
+        {11: (0.4, 0.5), 12: (0.4, 0.7)},                           # vertical shoulder line
+        {11: (0.4, -0.2), 12: (0.6, 0.3)},                          # one shoulder above the frame
+    )):
+        for index, (x, y) in change.items():
+            landmarks[index] = SimpleNamespace(x=x, y=y, z=0.0, visibility=0.0)
+        poses.append(landmarks)
+    return poses
+
+
+class Recorder:
+    """Stands in for a SegmentStats and keeps the scores it receives."""
+
+    def __init__(self):
+        self.scores = []
+
+    def add_posture(self, frame_scores, time=None):
+        self.scores.append(frame_scores)
+
+
+class PostureScoresTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(0)
+        cls.poses = random_poses(rng, 20000) + edge_case_poses(rng)
+
+    def test_engine_matches_scalar_scores(self):
+        recorder = Recorder()
+        engine = PostureEngine(capacity=256)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for landmarks in self.poses:
+                engine.add(recorder, landmarks)
+            engine.flush()
+            expected = [scalar_scores(landmarks) for landmarks in self.poses]
+
+        self.assertEqual(len(recorder.scores), len(self.poses))
+        mismatches = [
+            index for index, (got, want) in enumerate(zip(recorder.scores, expected))
+            if got != want
+        ]
+        self.assertEqual(mismatches, [])
+
+    def test_add_points_matches_add(self):
+        from_landmarks = Recorder()
+        from_points = Recorder()
+        landmark_engine = PostureEngine(capacity=64)
+        points_engine = PostureEngine(capacity=64)
+        for landmarks in self.poses[:500] + self.poses[-9:]:
+            landmark_engine.add(from_landmarks, landmarks)
+            points_engine.add_points(
+                from_points, np.array([[landmark.x, landmark.y, landmark.z] for landmark in landmarks])
+            )
+        landmark_engine.flush()
+        points_engine.flush()
+        self.assertEqual(from_points.scores, from_landmarks.scores)
+
+    def test_measurements_match_scalar_functions(self):
+        points = np.array([
+            [[landmarks[index].x, landmarks[index].y] for index in POSE_KEYPOINTS]
+            for landmarks in self.poses
+        ])
+        expected = []
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for nose, left_ear, right_ear, left_shoulder, right_shoulder in points:
+                cva = calculate_craniovertebral_angle(
+                    nose, (left_ear + right_ear) / 2, (left_shoulder + right_shoulder) / 2
+                )
+                expected.append(list(cva) + list(calculate_shoulder_posture(left_shoulder, right_shoulder)))
+        np.testing.assert_allclose(
+            np.stack(posture_measurements(points), axis=1), expected, rtol=1e-9, atol=1e-9
+        )
+
+    def test_flush_without_samples_is_a_no_op(self):
+        recorder = Recorder()
+        engine = PostureEngine()
+        engine.flush()
+        self.assertEqual(recorder.scores, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+plan_shards must cut only at segment starts and merge_shards must rebuild
+the serial timeline.
+
+Needs no models (the end-to-end check is test_sharding.py). Run from the
+server directory:
+
+    python -m pytest tests
+"""
+import os
+import sys
+import unittest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from video_pipeline.aggregate import SegmentStats  # noqa: E402
+from video_pipeline.sharding import merge_shards, plan_shards, segment_start_frames  # noqa: E402
+
+
+def serial_segments(total_frames, fps, sample_every, segment_duration):
+    """Frame numbers of the samples in each segment, as the serial loop groups them."""
+    starts = set(segment_start_frames(total_frames, fps, sample_every, segment_duration))
+    segments = [[]]
+    for frame_number in range(sample_every, total_frames + 1, sample_every):
+        if frame_number in starts:
+            segments.append([])
+        segments[-1].append(frame_number)
+    return segments
+
+
+def shard_frames(shard, total_frames, sample_every):
+    """Sampled frame numbers a shard reads: decoder positions [start, end)."""
+    end = shard["end_frame"] if shard["end_frame"] is not None else total_frames
+    return [n for n in range(shard["start_frame"] + 1, end + 1) if n % sample_every == 0]
+
+
+class PlanShardsTest(unittest.TestCase):
+    CASES = [
+        # total_frames, fps, sample_every, segment_duration, workers
+        (3000, 30, 3, 10, 4),    # divides evenly
+        (2999, 30, 3, 10, 4),    # doesn't
+        (1001, 29.97, 7, 10, 3),
+        (3000, 30, 4, 10, 7),    # ten segments over seven workers
+        (601, 30, 1, 10, 8),     # only two segment starts for eight workers
+        (299, 30, 3, 10, 4),     # shorter than one segment: no cut at all
+        (3, 30, 1, 10, 8),       # fewer frames than workers
+        (1, 30, 1, 10, 2),
+        (0, 30, 1, 10, 2),
+        (900, 30, 3, 10, 1),
+    ]
+
+    def test_shards_cover_whole_segments_in_order(self):
+        for total_frames, fps, sample_every, segment_duration, workers in self.CASES:
+            with self.subTest(frames=total_frames, workers=workers, sample_every=sample_every):
+                shards = plan_shards(total_frames, fps, sample_every, segment_duration, workers)
+                self.assertGreaterEqual(len(shards), 1)
+                self.assertLessEqual(len(shards), workers)
+                self.assertEqual(shards[0]["start_frame"], 0)
+                self.assertEqual(shards[0]["segment_start"], 0)
+                self.assertIsNone(shards[-1]["end_frame"])
+                for before, after in zip(shards, shards[1:]):
+                    self.assertEqual(before["end_frame"], after["start_frame"])
+                    self.assertLess(before["start_frame"], before["end_frame"])
+
+                # Each shard holds whole serial segments, so concatenating
+                # the shards' segments rebuilds the serial timeline
+                serial = serial_segments(total_frames, fps, sample_every, segment_duration)
+                sharded = []
+                for shard in shards:
+                    frames = shard_frames(shard, total_frames, sample_every)
+                    if shard["start_frame"]:
+                        self.assertEqual(frames[0], shard["start_frame"] + 1)
+                        self.assertAlmostEqual(shard["segment_start"], frames[0] / fps)
+                    opened = len(sharded)
+                    for segment in serial:
+                        if segment and segment[0] in frames:
+                            sharded.append(segment)
+                            self.assertTrue(set(segment) <= set(frames))
+                    if frames:
+                        self.assertGreater(len(sharded), opened)
+                self.assertEqual(sharded, [segment for segment in serial if segment])
+
+    def test_cuts_at_first_segment_start_after_even_split(self):
+        # Even split targets frames 750, 1500 and 2250; segments open every 300
+        shards = plan_shards(3000, 30, 3, 10, 4)
+        self.assertEqual([shard["start_frame"] for shard in shards], [0, 899, 1499, 2399])
+        self.assertEqual([shard["end_frame"] for shard in shards], [899, 1499, 2399, None])
+        self.assertEqual([shard["segment_start"] for shard in shards], [0, 30.0, 50.0, 80.0])
+
+    def test_one_shard_without_segment_starts(self):
+        self.assertEqual(
+            plan_shards(299, 30, 3, 10, 4), [{"start_frame": 0, "end_frame": None, "segment_start": 0}]
+        )
+
+
+def segment(start_time, samples):
+    stats = SegmentStats(start_time)
+    for _ in range(samples):
+        stats.add_sample(True, None)
+    return stats
+
+
+class MergeShardsTest(unittest.TestCase):
+    def test_open_segment_is_closed_by_next_shard(self):
+        first = [segment(0, 3), segment(10, 2)]
+        second = [segment(20, 4), segment(30, 1)]
+        third = [segment(40, 2)]
+        closed, trailing, frames_read = merge_shards([
+            {"segments": first, "frames_read": 100},
+            {"segments": second, "frames_read": 90},
+            {"segments": third, "frames_read": 40},
+        ])
+        self.assertEqual([s.start_time for s in closed], [0, 10, 20, 30])
+        self.assertIs(closed[1], first[1])
+        self.assertIs(trailing, third[0])
+        self.assertEqual(frames_read, 230)
+
+    def test_empty_shards_are_skipped(self):
+        first = [segment(0, 2), segment(10, 3)]
+        last = [segment(30, 1)]
+        closed, trailing, frames_read = merge_shards([
+            {"segments": first, "frames_read": 50},
+            {"segments": [segment(20, 0)], "frames_read": 0},
+            {"segments": last, "frames_read": 10},
+            {"segments": [segment(40, 0)], "frames_read": 0},
+        ])
+        # The first shard's open segment stays open across the empty shard
+        self.assertEqual([s.start_time for s in closed], [0, 10])
+        self.assertIs(trailing, last[0])
+        self.assertEqual(frames_read, 60)
+
+    def test_single_shard_and_no_samples(self):
+        segments = [segment(0, 2), segment(10, 1)]
+        closed, trailing, _ = merge_shards([{"segments": segments, "frames_read": 30}])
+        self.assertEqual(closed, segments[:1])
+        self.assertIs(trailing, segments[1])
+
+        closed, trailing, frames_read = merge_shards([{"segments": [segment(0, 0)], "frames_read": 0}])
+        self.assertEqual((closed, trailing, frames_read), ([], None, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
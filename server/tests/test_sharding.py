@@ -0,0 +1,44 @@
+"""
+analyze_video must give the same result whatever the worker count.
+
+Runs the real MediaPipe solutions (which track landmarks across frames) on
+test_video.mp4, serially and in frame-range shards. Skipped when mediapipe
+or fer is not installed. Run from the server directory:
+
+    python -m pytest tests
+"""
+import importlib.util
+import os
+import sys
+import unittest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_VIDEO = os.path.join(SERVER_DIR, "test_video.mp4")
+sys.path.insert(0, SERVER_DIR)
+
+
+def _installed(module):
+    return importlib.util.find_spec(module) is not None
+
+
+@unittest.skipUnless(_installed("mediapipe") and _installed("fer"), "needs mediapipe and fer")
+@unittest.skipUnless(os.path.exists(TEST_VIDEO), "needs server/test_video.mp4")
+class ShardingTest(unittest.TestCase):
+    def assertSameResult(self, **options):
+        import video_analysis
+
+        serial = video_analysis.analyze_video(TEST_VIDEO, workers=1, **options)
+        self.assertNotIn("error", serial)
+        for workers in (2, 3):
+            with self.subTest(workers=workers):
+                self.assertEqual(video_analysis.analyze_video(TEST_VIDEO, workers=workers, **options), serial)
+
+    def test_workers_match_serial(self):
+        self.assertSameResult()
+
+    def test_workers_match_serial_with_concurrent_models(self):
+        self.assertSameResult(concurrent_models=True, analysis_fps=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
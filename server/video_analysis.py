@@ -1,34 +1,137 @@
 import cv2
 import numpy as np
-import mediapipe as mp
 from collections import defaultdict
-from fer import FER
 import os
 import time
 import json
 import sys
 import traceback
+import argparse
+import multiprocessing
+import functools
+from concurrent.futures import ProcessPoolExecutor
 
-# Initialize MediaPipe solutions with lower confidence thresholds
-mp_face_mesh = mp.solutions.face_mesh
-mp_pose = mp.solutions.pose  # Add pose detection
-mp_drawing = mp.solutions.drawing_utils
-face_mesh = mp_face_mesh.FaceMesh(
-    max_num_faces=1,
-    min_detection_confidence=0.3,  # Lowered from 0.5
-    min_tracking_confidence=0.3    # Lowered from 0.5
+from video_pipeline.aggregate import (
+    POSTURE_SCORE_KEYS, RunningStats, SegmentStats, combine_segments
 )
-pose = mp_pose.Pose(
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
+from video_pipeline.checkpoint import Checkpoint, checkpoint_path, result_settings
+from video_pipeline.config import MODEL_SETTINGS, PRESETS, build_config
+from video_pipeline.deadline import AdaptiveSampler, DeadlinePlanner, coverage_report
+from video_pipeline.emotion_batch import EMOTION_LABELS, EmotionBatcher
+from video_pipeline.face_crop import detect_emotions_from_landmarks, prepare_face_from_landmarks
+from video_pipeline.frame_ring import RingFrames, RingSlot
+from video_pipeline.frame_store import (
+    FrameStoreWriter, frame_store_path, mark_incomplete, merge_parts, open_frame_store, write_meta
 )
-        
-# Initialize FER with adjusted parameters
-try:
-    detector = FER(mtcnn=True)
-except Exception as e:
-    print(json.dumps({"error": f"Failed to initialize FER: {str(e)}"}))
-    sys.exit(1)
+from video_pipeline.posture import PostureEngine
+from video_pipeline.model_threads import ModelThreads
+from video_pipeline.models import ModelRegistry
+from video_pipeline.motion import MotionGate
+from video_pipeline.prefetch import PrefetchedFrames, PreparedFrames
+from video_pipeline.preprocess import FramePreprocessor
+from video_pipeline.profiling import (
+    NULL_PROFILER, StageProfiler, peak_rss_mb, profiling_enabled
+)
+from video_pipeline.sampling import FrameSampler, sample_stride
+from video_pipeline.sharding import merge_shards, plan_shards
+from video_pipeline.streaming import ProgressTracker, ndjson_writer
+from video_pipeline.tflite_emotion import EMOTION_BACKENDS, quantize_detector
+
+# Models are built on first use (mediapipe and TensorFlow are only imported then)
+def _build_face_mesh(refine_landmarks=False):
+    import mediapipe as mp
+    # Initialize MediaPipe solutions with lower confidence thresholds
+    return mp.solutions.face_mesh.FaceMesh(
+        max_num_faces=1,
+        refine_landmarks=refine_landmarks,
+        min_detection_confidence=0.3,  # Lowered from 0.5
+        min_tracking_confidence=0.3    # Lowered from 0.5
+    )
+
+def _build_pose(model_complexity=1):
+    import mediapipe as mp
+    return mp.solutions.pose.Pose(
+        model_complexity=model_complexity,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+def _build_detector(mtcnn=True, emotion_backend="keras"):
+    # Initialize FER with adjusted parameters
+    try:
+        from fer import FER
+        detector = FER(mtcnn=mtcnn)
+    except Exception as e:
+        raise RuntimeError(f"Failed to initialize FER: {str(e)}") from e
+    if emotion_backend != "keras":
+        # Same FER (and face detector), with the emotion CNN converted to TFLite
+        quantize_detector(detector, emotion_backend.split("-", 1)[1])
+    return detector
+
+# Registry names of the model variants a config selects; the defaults keep
+# the plain names ("face_mesh", "pose", "detector")
+def _face_mesh_name(config):
+    return "face_mesh:refined" if config["refine_face_mesh"] else "face_mesh"
+
+def _pose_name(config):
+    complexity = config["pose_complexity"]
+    return "pose" if complexity == 1 else f"pose:{complexity}"
+
+def _detector_name(config):
+    """Registry name of the FER detector for config["mtcnn"] and ["emotion_backend"]."""
+    name = "detector" if config["mtcnn"] else "detector:opencv"
+    backend = config["emotion_backend"]
+    return name if backend == "keras" else f"{name}:{backend}"
+
+models = ModelRegistry()
+for _refine in (False, True):
+    models.register(_face_mesh_name({"refine_face_mesh": _refine}),
+                    functools.partial(_build_face_mesh, _refine))
+for _complexity in (0, 1, 2):
+    models.register(_pose_name({"pose_complexity": _complexity}),
+                    functools.partial(_build_pose, _complexity))
+for _mtcnn in (True, False):
+    for _backend in EMOTION_BACKENDS:
+        models.register(_detector_name({"mtcnn": _mtcnn, "emotion_backend": _backend}),
+                        functools.partial(_build_detector, _mtcnn, _backend))
+
+# FaceMesh and Pose run in video mode: they track landmarks from frame to
+# frame and Pose smooths them over time
+TRACKING_MODELS = [name for name in models.names() if not name.startswith("detector")]
+
+def reset_models():
+    """
+    Clear FaceMesh's and Pose's tracking and smoothing state. Done at the
+    start of every frame range and every segment, so no segment depends on
+    the frames before it: shards, resumed runs and pool jobs see the same
+    model state as an uninterrupted serial run.
+    """
+    models.reset(TRACKING_MODELS)
+
+def __getattr__(name):
+    # Keeps `video_analysis.face_mesh` / `.pose` / `.detector` working for callers
+    if name in models.names():
+        return models.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def warm_up(config=None):
+    """
+    Build the FaceMesh, Pose and FER variants `config` uses and run one
+    inference on a blank frame, so that the first real request does not pay
+    for model loading or graph set-up.
+
+    Returns:
+        dict: {"models": {name: build seconds}, "first_inference_seconds": float}
+    """
+    config = build_config(config)
+    names = [_face_mesh_name(config), _pose_name(config), _detector_name(config)]
+    built = models.warm_up(names)
+    blank = np.zeros((64, 64, 3), dtype=np.uint8)
+    started = time.perf_counter()
+    models.get(names[0]).process(blank)
+    models.get(names[1]).process(blank)
+    models.get(names[2]).detect_emotions(blank, face_rectangles=[(0, 0, 64, 64)])
+    return {"models": built, "first_inference_seconds": round(time.perf_counter() - started, 3)}
 
 # Eye landmarks for basic tracking
 LEFT_EYE = [33, 160, 158, 133, 153, 144]
@@ -190,106 +293,107 @@ def calculate_shoulder_symmetry(left_shoulder, right_shoulder):
         print(f"Error in shoulder symmetry calculation: {str(e)}")
         return 0
 
-def analyze_frame(frame):
+_model_threads = None
+
+def get_model_threads():
+    """ModelThreads owning the module-level models, created on first use."""
+    global _model_threads
+    if _model_threads is None:
+        # Threads start on first submit, so unused detector variants cost nothing
+        _model_threads = ModelThreads(models, models.names())
+    return _model_threads
+
+def _process(model, image):
+    return model.process(image)
+
+def _detect_emotions(fer_detector, image):
+    return fer_detector.detect_emotions(image)
+
+def _profiled(profiler, stage, fn):
+    """fn, timed as `stage` when profiling is on."""
+    if not profiler.enabled:
+        return fn
+
+    def timed(*args):
+        with profiler.stage(stage):
+            return fn(*args)
+
+    return timed
+
+def _run_detector(model_threads, name, fn, *args):
+    """fn(detector, *args), on the detector's own thread when models run concurrently."""
+    if model_threads is None:
+        return fn(models.get(name), *args)
+    return model_threads.submit(name, fn, *args).result()
+
+def analyze_frame(frame, preprocessor=None, config=None, emotion_batcher=None, rgb_frame=None,
+                  model_threads=None, profiler=NULL_PROFILER):
     try:
-        # Convert to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        config = config or build_config()
+        run_face_mesh = _profiled(profiler, "face_mesh", _process)
+        run_pose = _profiled(profiler, "pose", _process)
+        run_mtcnn = _profiled(profiler, "mtcnn", _detect_emotions)
+        face_mesh_name, pose_name, detector_name = (
+            _face_mesh_name(config), _pose_name(config), _detector_name(config)
+        )
+        
+        # Resize once and convert to RGB once; every model reads the same prepared frame
+        if isinstance(frame, RingSlot):
+            # Prepared by the decoder process; the models read the shared memory directly
+            frame, rgb_frame = frame.bgr, frame.rgb
+        if rgb_frame is not None:
+            bgr_frame = frame  # already prepared by the caller
+        else:
+            if preprocessor is None:
+                preprocessor = FramePreprocessor()
+            bgr_frame, rgb_frame = preprocessor.prepare(frame)
         
-        # Detect face landmarks
-        face_results = face_mesh.process(rgb_frame)
-        pose_results = pose.process(rgb_frame)  # Posture analysis
+        mtcnn_future = None
+        if model_threads is not None:
+            # FaceMesh and Pose run side by side, and so does FER's MTCNN path
+            # when it does not need the FaceMesh landmarks
+            face_future = model_threads.submit(face_mesh_name, run_face_mesh, rgb_frame)
+            pose_future = model_threads.submit(pose_name, run_pose, rgb_frame)
+            if not config["landmark_face_crop"]:
+                mtcnn_future = model_threads.submit(detector_name, run_mtcnn, bgr_frame)
+            face_results = face_future.result()
+        else:
+            # Detect face landmarks
+            face_results = run_face_mesh(models.get(face_mesh_name), rgb_frame)
+            pose_results = run_pose(models.get(pose_name), rgb_frame)  # Posture analysis
         
-        # Detect emotions using FER
-        emotions = detector.detect_emotions(frame)
+        # Detect emotions using FER: classify the FaceMesh face directly and only
+        # fall back to FER's own MTCNN detection when FaceMesh found no face
+        if config["landmark_face_crop"] and face_results.multi_face_landmarks:
+            face_landmarks = face_results.multi_face_landmarks[0]
+            if emotion_batcher is not None:
+                # Classified later in a batch; the caller queues the PendingFace
+                with profiler.stage("face_crop"):
+                    pending_face = prepare_face_from_landmarks(emotion_batcher, bgr_frame, face_landmarks)
+                emotions = [{"emotions": pending_face}] if pending_face else []
+            else:
+                emotions = _run_detector(
+                    model_threads, detector_name, _profiled(profiler, "fer", detect_emotions_from_landmarks),
+                    bgr_frame, face_landmarks
+                )
+        elif mtcnn_future is not None:
+            emotions = mtcnn_future.result()
+        else:
+            emotions = _run_detector(model_threads, detector_name, run_mtcnn, bgr_frame)
+        
+        if model_threads is not None:
+            pose_results = pose_future.result()
         
         # Check if either detection method found a face
         face_detected = bool(face_results.multi_face_landmarks) or bool(emotions)
         
-        # Analyze posture
-        posture_data = None
-        if pose_results.pose_landmarks:
-            landmarks = pose_results.pose_landmarks.landmark
-            
-            # Extract key points
-            nose = np.array([landmarks[0].x, landmarks[0].y])
-            left_ear = np.array([landmarks[7].x, landmarks[7].y])
-            right_ear = np.array([landmarks[8].x, landmarks[8].y])
-            left_shoulder = np.array([landmarks[11].x, landmarks[11].y])
-            right_shoulder = np.array([landmarks[12].x, landmarks[12].y])
-            
-            ear_point = (left_ear + right_ear) / 2
-            shoulder_point = (left_shoulder + right_shoulder) / 2
-            
-            # Calculate metrics using research-validated methods
-            cva, cva_confidence = calculate_craniovertebral_angle(nose, ear_point, shoulder_point)
-            sta, bsr, apsp = calculate_shoulder_posture(left_shoulder, right_shoulder)
-            
-            """
-            Scoring weights based on clinical reliability indices:
-            1. CVA (50%): ICC = 0.95 from PMC8284766
-            2. Shoulder Assessment (50%):
-               - Tilt Angle (20%): ICC = 0.92
-               - Bilateral Ratio (15%): ICC = 0.89
-               - AP Position (15%): ICC = 0.87
-            
-            Weights proportional to reliability coefficients
-            """
-            
-            # CVA scoring (50% total)
-            cva_base_score = 100
-            if cva < 45:  # Forward Head Posture
-                cva_base_score = max(0, 70 - (45 - cva) * 3)
-            elif cva > 55:  # Extended
-                cva_base_score = max(0, 70 - (cva - 55) * 3)
-            elif abs(cva - 50.1) <= cva_confidence:  # Within optimal range
-                cva_base_score = 100
-            else:  # Acceptable range
-                cva_base_score = max(70, 100 - abs(cva - 50.1) * 2)
-            
-            # Shoulder assessment scoring (50% total)
-            # STA scoring (20%)
-            sta_score = 100
-            if sta > 2.1:  # Clinical threshold from research
-                sta_score = max(0, 100 - (sta - 2.1) * 15)  # Less aggressive penalty
-            
-            # BSR scoring (15%)
-            bsr_score = 100
-            if bsr < 0.94 or bsr > 1.03:  # Updated clinical thresholds
-                bsr_score = max(0, 100 - abs(1 - bsr) * 150)
-            
-            # APSP scoring (15%)
-            apsp_score = 100
-            if apsp < 46 or apsp > 54:  # Clinical range
-                apsp_score = max(0, 100 - min(abs(apsp - 46), abs(apsp - 54)) * 3)
-            
-            posture_data = {
-                "measurements": {
-                    "cva": {
-                        "angle": round(cva, 2),
-                        "confidence": round(cva_confidence, 2)
-                    },
-                    "shoulder": {
-                        "tilt_angle": round(sta, 2),
-                        "symmetry_ratio": round(bsr, 3),
-                        "ap_position": round(apsp, 2)
-                    }
-                },
-                "scores": {
-                    "cva_score": round(cva_base_score, 2),
-                    "shoulder_scores": {
-                        "tilt_score": round(sta_score, 2),
-                        "symmetry_score": round(bsr_score, 2),
-                        "position_score": round(apsp_score, 2)
-                    },
-                    "overall_score": round(
-                        (cva_base_score * 0.5 + 
-                         sta_score * 0.2 + 
-                         bsr_score * 0.15 + 
-                         apsp_score * 0.15), 
-                        2
-                    )
-                }
-            }
+        # Pose landmarks for posture; scored in blocks by PostureEngine
+        pose_landmarks = (
+            pose_results.pose_landmarks.landmark if pose_results.pose_landmarks else None
+        )
+        mesh_landmarks = (
+            face_results.multi_face_landmarks[0].landmark if face_results.multi_face_landmarks else None
+        )
         
         if face_detected:
             emotion_scores = emotions[0]['emotions'] if emotions else {
@@ -297,9 +401,9 @@ def analyze_frame(frame):
                 'happy': 0, 'sad': 0, 'surprise': 0, 
                 'neutral': 1.0
             }
-            return True, emotion_scores, posture_data
+            return True, emotion_scores, pose_landmarks, mesh_landmarks
         
-        return False, None, posture_data
+        return False, None, pose_landmarks, mesh_landmarks
         
     except Exception as e:
         sys.stderr.write(json.dumps({
@@ -309,8 +413,315 @@ def analyze_frame(frame):
         sys.exit(1)
 
 
-def analyze_video(video_path):
+def summarize_posture(posture_averages):
+    """Posture section of the results from the four average sub-scores."""
+    if not posture_averages:
+        return None
+    avg_cva_score, avg_sta_score, avg_bsr_score, avg_apsp_score = posture_averages
+    return {
+        "craniovertebral_angle_score": round(avg_cva_score, 2),
+        "shoulder_tilt_score": round(avg_sta_score, 2),
+        "shoulder_symmetry_score": round(avg_bsr_score, 2),
+        "shoulder_position_score": round(avg_apsp_score, 2),
+        "overall_posture_score": round(
+            (avg_cva_score * 0.5 + avg_sta_score * 0.2 + avg_bsr_score * 0.15 + avg_apsp_score * 0.15), 
+            2
+        )
+    }
+
+
+def summarize_segment(segment):
+    """One entry of engagement_patterns["segments"]."""
+    return {
+        "time": segment.start_time,
+        "emotions": segment.emotion_means(),
+        "engagement": segment.engagement()
+    }
+
+
+def _segment_event(index, segment, progress):
+    return {
+        "event": "segment",
+        "index": index,
+        **summarize_segment(segment),
+        "posture": summarize_posture(segment.posture_means()),
+        **progress
+    }
+
+
+def _analyze_frame_range(video_path, start_frame=0, end_frame=None, segment_start=0, config=None,
+                         on_segment=None, checkpoint=None, frame_store=None, frame_store_rows=0,
+                         deadline_at=None):
+    """
+    Analyse decoder positions [start_frame, end_frame) of a video.
+
+    This is the whole analysis loop: the serial path runs it once over the
+    full video, the parallel path runs one call per shard in its own process
+    (each with its own FaceMesh/Pose/FER instances).
+
+    `on_segment(segment, frames_read)` is called whenever a segment is
+    finished (all of its emotion scores included). `checkpoint` (a
+    Checkpoint) is offered the finished segments at every segment boundary.
+    With `frame_store` (a directory) every sample's model outputs are
+    appended there, after the first `frame_store_rows` rows already on disk.
+    With config["deadline"] set, sampling adapts so the range is done by
+    `deadline_at` (time.time(); default: deadline seconds from now).
+
+    Returns:
+        dict: {"frames_read": int, "segments": [SegmentStats, ...],
+        "profiler": StageProfiler or None, "deadline": planner summary or
+        None} with the last segment still open.
+    """
+    config = build_config(config)
+    segment_duration = config["segment_duration"]
+    profiler = StageProfiler() if profiling_enabled(config) else NULL_PROFILER
+    # Models built before this call (warm-up, earlier jobs) are not this run's cost
+    init_seconds_before = models.total_init_seconds()
+
+    cap = cv2.VideoCapture(video_path)
+    frame_writer = None
+    try:
+        if not cap.isOpened():
+            raise Exception(f"Failed to open video file: {video_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if frame_store:
+            frame_writer = FrameStoreWriter(frame_store, frame_store_rows)
+        stride = sample_stride(fps, config["analysis_fps"])
+        planner = None
+        if config["deadline"]:
+            # Sample the whole range, as densely as the time left allows
+            range_end = end_frame if end_frame is not None else int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            planner = DeadlinePlanner(
+                deadline_at or time.time() + config["deadline"], stride, fps, range_end, start_frame
+            )
+            sampler = AdaptiveSampler(cap, planner.stride, start_frame, range_end)
+        else:
+            sampler = FrameSampler(cap, stride, start_frame, end_frame)
+
+        if config["decode_process"]:
+            # Decode and preprocess in another process; frames arrive through shared memory
+            frame_size = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)))
+            frames = RingFrames(
+                multiprocessing.get_context("spawn"), video_path, frame_size, sampler.stride,
+                start_frame, end_frame, config["inference_size"], config["prefetch"], profiler
+            )
+        elif config["prefetch"]:
+            # Decode and preprocess on a producer thread while the models run here
+            frames = PrefetchedFrames(sampler, config["inference_size"], config["prefetch"], profiler)
+        else:
+            frames = PreparedFrames(sampler, config["inference_size"], profiler)
+        emotion_batcher = None
+        detector = models.get(_detector_name(config))
+        if (config["emotion_batch_size"] > 1 and config["landmark_face_crop"]
+                and EmotionBatcher.supports(detector)):
+            emotion_batcher = EmotionBatcher(detector, config["emotion_batch_size"], profiler)
+        posture_engine = PostureEngine(profiler=profiler)
+        model_threads = get_model_threads() if config["concurrent_models"] else None
+        motion_gate = None
+        if config["motion_threshold"]:
+            motion_gate = MotionGate(config["motion_threshold"], config["motion_max_gap"])
+        frame_result = None
+        time_series = config["time_series"]
+        segments = [SegmentStats(segment_start, time_series)]
+        reset_models()
+
+        for frame_number, bgr_frame, rgb_frame in frames:
+            current_time = frame_number / fps
+
+            # Start a new segment once the current one is full
+            if current_time - segments[-1].start_time >= segment_duration:
+                if emotion_batcher:
+                    emotion_batcher.flush()
+                posture_engine.flush()
+                if frame_writer:
+                    frame_writer.flush()
+                if on_segment:
+                    on_segment(segments[-1], frames.frames_read)
+                if checkpoint:
+                    # The frame opening the new segment is decoder position frame_number - 1
+                    checkpoint.segment_closed(
+                        segments, frame_number - 1, current_time,
+                        frame_writer.rows if frame_writer else None
+                    )
+                segments.append(SegmentStats(current_time, time_series))
+                # Segments never share model state or results, so shards match a serial run
+                reset_models()
+                if motion_gate:
+                    motion_gate.reset()
+            segment = segments[-1]
+
+            if motion_gate:
+                with profiler.stage("motion_gate"):
+                    infer = motion_gate.should_infer(bgr_frame, current_time)
+            if motion_gate and not infer:
+                # Picture unchanged: reuse the last inferred frame's outputs
+                segment.reused += 1
+            else:
+                with profiler.stage("frame"):
+                    frame_result = analyze_frame(
+                        bgr_frame, config=config, emotion_batcher=emotion_batcher,
+                        rgb_frame=rgb_frame, model_threads=model_threads, profiler=profiler
+                    )
+            looking_at_screen, frame_emotions, pose_landmarks, mesh_landmarks = frame_result
+            if emotion_batcher:
+                segment.add_sample(looking_at_screen, None, current_time)
+                emotion_batcher.add(segment, frame_emotions, current_time)
+            else:
+                segment.add_sample(looking_at_screen, frame_emotions, current_time)
+            if pose_landmarks:
+                posture_engine.add(segment, pose_landmarks, current_time)
+            if frame_writer:
+                frame_writer.add(
+                    current_time, frame_number, looking_at_screen, frame_emotions, pose_landmarks,
+                    mesh_landmarks, reused=motion_gate is not None and not infer
+                )
+
+            if planner:
+                # Frames already prefetched keep the stride they were decoded with
+                sampler.stride = planner.sample_done(frame_number, current_time)
+                if not sampler.stride:
+                    break
+                if planner.wants_fast_preset() and config["preset"] != "fast":
+                    # Cheaper models for the rest of the range; frame sizes stay as they are
+                    config = {**config, **{key: PRESETS["fast"][key] for key in MODEL_SETTINGS}}
+                    planner.preset_changes.append({"time": round(current_time, 3), "preset": "fast"})
+
+        if emotion_batcher:
+            emotion_batcher.flush()
+        posture_engine.flush()
+        if frame_writer:
+            frame_writer.flush()
+        return {
+            "frames_read": frames.frames_read,
+            "segments": segments,
+            "profiler": profiler if profiler.enabled else None,
+            "model_init_seconds": models.total_init_seconds() - init_seconds_before,
+            "deadline": planner.summary() if planner else None,
+        }
+    finally:
+        if frame_writer:
+            frame_writer.close()
+        cap.release()
+
+
+def _build_results(shard_results, config, fps, stride, duration, analysis_fps=None):
+    """
+    The analysis result (including the assessment) from the shard outputs,
+    in timeline order. Shared by analyze_video() and rescore().
+    `analysis_fps` is the achieved sampling rate when the stride was not
+    fixed (deadline mode); by default it is fps / stride.
+    """
+    closed_segments, trailing_segment, frame_count = merge_shards(shard_results)
+
+    if frame_count == 0:
+        raise Exception("Video file is empty or corrupted")
+
+    all_segments = closed_segments + ([trailing_segment] if trailing_segment else [])
+    totals = combine_segments(all_segments)
+    looking_at_screen_frames = totals["looking_at_screen"]
+    not_looking_at_screen_frames = totals["not_looking_at_screen"]
+
+    total_frames = looking_at_screen_frames + not_looking_at_screen_frames
+    if total_frames == 0:
+        raise Exception("No faces detected in the video")
+
+    emotion_averages = totals["emotion_averages"]
+
+    # Calculate posture metrics
+    posture_analysis = summarize_posture(totals["posture_averages"])
+
+    # Segment metrics (the trailing, unfinished segment is not reported)
+    time_segments = [summarize_segment(segment) for segment in closed_segments]
+
+    # Calculate engagement patterns
+    engagement_patterns = {
+        "segments": time_segments,
+        "overall_engagement": np.mean([seg["engagement"] for seg in time_segments]) if time_segments else 0,
+        "engagement_stability": 100 - (np.std([seg["engagement"] for seg in time_segments]) * 10) if time_segments else 0
+    }
+
+    # Spread of the per-frame scores and of per-segment engagement
+    engagement_stats = RunningStats()
+    for seg in time_segments:
+        engagement_stats.add(seg["engagement"])
+    statistics = {
+        "emotions": {
+            emotion: stats.summary() for emotion, stats in totals["emotion_stats"].items()
+        },
+        "posture": {
+            key: stats.summary() for key, stats in zip(POSTURE_SCORE_KEYS, totals["posture_stats"])
+        },
+        "engagement": engagement_stats.summary(),
+    }
+
+    attention_percentage = (looking_at_screen_frames / total_frames * 100) if total_frames > 0 else 0
+
+    results = {
+        "emotion_analysis": emotion_averages,
+        "eye_contact_analysis": {
+            "looking_at_screen": looking_at_screen_frames,
+            "not_looking_at_screen": not_looking_at_screen_frames,
+            "attention_percentage": attention_percentage
+        },
+        "posture_analysis": posture_analysis,
+        "engagement_patterns": engagement_patterns,
+        "presentation_metrics": {
+            "duration": duration,
+            "frames_analyzed": frame_count,
+            "frames_sampled": total_frames,
+            "analysis_fps": analysis_fps if analysis_fps is not None else fps / stride,
+            "analysis_quality": (frame_count / total_frames * 100) if total_frames > 0 else 0
+        },
+        "statistics": statistics
+    }
+    if config["motion_threshold"]:
+        reused = totals["reused_samples"]
+        results["motion_gating"] = {
+            "threshold": config["motion_threshold"],
+            "max_gap": config["motion_max_gap"],
+            "frames_inferred": total_frames - reused,
+            "frames_reused": reused,
+            "reuse_percentage": reused / total_frames * 100
+        }
+    if config["emotion_backend"] != "keras":
+        results["emotion_backend"] = config["emotion_backend"]
+    # No preset means the defaults, which are "balanced"; the values recorded
+    # are the ones actually used (explicit options override the preset's)
+    preset = config["preset"] or "balanced"
+    results["preset"] = {"name": preset, **{key: config[key] for key in PRESETS[preset]}}
+    if totals["time_series"]:
+        results["time_series"] = {
+            name: series.to_dict() for name, series in totals["time_series"].items()
+        }
+
+    assessment = calculate_score_and_feedback(
+        results["emotion_analysis"], 
+        results["eye_contact_analysis"],
+        results["posture_analysis"],
+        results["engagement_patterns"]
+    )
+    results["assessment"] = assessment
+    return results
+
+
+def analyze_video(video_path, config=None, on_event=None, **options):
+    """
+    Analyse a presentation video.
+
+    Args:
+        video_path (str): Path to the video file.
+        config (dict): Analysis options (see video_pipeline.config).
+        on_event (callable): Optional progress callback receiving one event
+            dict per finished segment and a final "result" (or "error") event.
+        **options: Individual analysis options, e.g. workers=4.
+    """
     try:
+        started = time.perf_counter()
+        config = build_config(config, **options)
+        # One absolute deadline for every shard
+        deadline_at = time.time() + config["deadline"] if config["deadline"] else None
+        segment_duration = config["segment_duration"]
+
         if not os.path.exists(video_path):
             raise Exception(f"Video file not found: {video_path}")
             
@@ -322,134 +733,134 @@ def analyze_video(video_path):
         fps = cap.get(cv2.CAP_PROP_FPS)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         duration = total_frames / fps
+        stride = sample_stride(fps, config["analysis_fps"])
+        cap.release()
         
-        frame_count = 0
-        emotion_scores = defaultdict(list)
-        looking_at_screen_frames = 0
-        not_looking_at_screen_frames = 0
-        posture_data = []
-        movement_data = []
-        last_face_position = None
-        
-        # Time-based analysis
-        time_segments = []
-        current_segment = {
-            "start_time": 0,
-            "emotions": defaultdict(list),
-            "engagement": 0
-        }
-        segment_duration = 10  # Analyze in 10-second segments
-        
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            frame_count += 1
-            current_time = frame_count / fps
-            
-            if frame_count % 3 == 0:
-                looking_at_screen, frame_emotions, frame_posture = analyze_frame(frame)
-                
-                # Update engagement patterns
-                if current_time - current_segment["start_time"] >= segment_duration:
-                    # Calculate segment metrics
-                    segment_emotions = {
-                        emotion: np.mean(scores) for emotion, scores in current_segment["emotions"].items()
-                    }
-                    time_segments.append({
-                        "time": current_segment["start_time"],
-                        "emotions": segment_emotions,
-                        "engagement": current_segment["engagement"] / (segment_duration * fps / 3)
-                    })
-                    # Start new segment
-                    current_segment = {
-                        "start_time": current_time,
-                        "emotions": defaultdict(list),
-                        "engagement": 0
-                    }
-                
-                if looking_at_screen:
-                    looking_at_screen_frames += 1
-                    current_segment["engagement"] += 1
-                else:
-                    not_looking_at_screen_frames += 1
-                
-                if frame_emotions:
-                    for emotion, score in frame_emotions.items():
-                        emotion_scores[emotion].append(score)
-                        current_segment["emotions"][emotion].append(score)
-                
-                if frame_posture:
-                    posture_data.append(frame_posture)
+        progress = ProgressTracker(total_frames)
+        checkpoint = None
+        store_dir = frame_store_path(video_path, config["frame_store"]) if config["frame_store"] else None
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+            mark_incomplete(store_dir)
         
-        if frame_count == 0:
-            raise Exception("Video file is empty or corrupted")
-            
-        total_frames = looking_at_screen_frames + not_looking_at_screen_frames
-        if total_frames == 0:
-            raise Exception("No faces detected in the video")
+        if config["workers"] > 1 and total_frames > 0:
+            # Parallel mode: one process per frame range, cut at segment boundaries
+            shards = plan_shards(total_frames, fps, stride, segment_duration, config["workers"])
+            with ProcessPoolExecutor(
+                max_workers=len(shards), mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                # Each shard writes its own part of the frame store
+                store_parts = [
+                    os.path.join(store_dir, f"part-{index}") if store_dir else None
+                    for index in range(len(shards))
+                ]
+                futures = [
+                    executor.submit(
+                        _analyze_frame_range, video_path,
+                        shard["start_frame"], shard["end_frame"], shard["segment_start"], config,
+                        frame_store=part, deadline_at=deadline_at
+                    )
+                    for shard, part in zip(shards, store_parts)
+                ]
+                shard_results = []
+                events_sent = 0
+                for future in futures:
+                    shard_results.append(future.result())
+                    if on_event:
+                        # Report the segments finished so far, in timeline order
+                        finished, _, frames_done = merge_shards(shard_results)
+                        for index in range(events_sent, len(finished)):
+                            on_event(_segment_event(index, finished[index], progress.snapshot(frames_done)))
+                        events_sent = len(finished)
+            if store_dir:
+                merge_parts(store_dir, store_parts)
+        else:
+            resumed = []
+            if config["checkpoint"]:
+                # Pick up after the last saved segment boundary, if any
+                checkpoint = Checkpoint(
+                    checkpoint_path(video_path, config["checkpoint"]), video_path, config,
+                    config["checkpoint_interval"]
+                )
+                if checkpoint.load():
+                    resumed = [checkpoint.resumed_shard()]
+            start_frame = checkpoint.next_frame if checkpoint else 0
+            segment_index = [0]
             
-        emotion_averages = {
-            emotion: float(np.mean(scores)) if scores else 0.0
-            for emotion, scores in emotion_scores.items()
-        }
-        
-        # Calculate posture metrics
-        posture_analysis = None
-        if posture_data:
-            avg_cva_score = np.mean([d["scores"]["cva_score"] for d in posture_data])
-            avg_sta_score = np.mean([d["scores"]["shoulder_scores"]["tilt_score"] for d in posture_data])
-            avg_bsr_score = np.mean([d["scores"]["shoulder_scores"]["symmetry_score"] for d in posture_data])
-            avg_apsp_score = np.mean([d["scores"]["shoulder_scores"]["position_score"] for d in posture_data])
+            def on_segment(segment, frames_read):
+                on_event(_segment_event(segment_index[0], segment, progress.snapshot(start_frame + frames_read)))
+                segment_index[0] += 1
             
-            posture_analysis = {
-                "craniovertebral_angle_score": round(avg_cva_score, 2),
-                "shoulder_tilt_score": round(avg_sta_score, 2),
-                "shoulder_symmetry_score": round(avg_bsr_score, 2),
-                "shoulder_position_score": round(avg_apsp_score, 2),
-                "overall_posture_score": round(
-                    (avg_cva_score * 0.5 + avg_sta_score * 0.2 + avg_bsr_score * 0.15 + avg_apsp_score * 0.15), 
-                    2
+            if on_event:
+                for segment in (checkpoint.segments if resumed else []):
+                    on_segment(segment, 0)
+            shard_results = resumed + [
+                _analyze_frame_range(
+                    video_path, start_frame, segment_start=checkpoint.segment_start if checkpoint else 0,
+                    config=config, on_segment=on_segment if on_event else None, checkpoint=checkpoint,
+                    frame_store=store_dir, frame_store_rows=checkpoint.frame_store_rows if resumed else 0,
+                    deadline_at=deadline_at
                 )
-            }
+            ]
         
-        # Calculate engagement patterns
-        engagement_patterns = {
-            "segments": time_segments,
-            "overall_engagement": np.mean([seg["engagement"] for seg in time_segments]) if time_segments else 0,
-            "engagement_stability": 100 - (np.std([seg["engagement"] for seg in time_segments]) * 10) if time_segments else 0
-        }
-        
-        attention_percentage = (looking_at_screen_frames / total_frames * 100) if total_frames > 0 else 0
-        
-        results = {
-            "emotion_analysis": emotion_averages,
-            "eye_contact_analysis": {
-                "looking_at_screen": looking_at_screen_frames,
-                "not_looking_at_screen": not_looking_at_screen_frames,
-                "attention_percentage": attention_percentage
-            },
-            "posture_analysis": posture_analysis,
-            "engagement_patterns": engagement_patterns,
-            "presentation_metrics": {
-                "duration": duration,
-                "frames_analyzed": frame_count,
-                "analysis_quality": (frame_count / total_frames * 100) if total_frames > 0 else 0
-            }
-        }
-        
-        assessment = calculate_score_and_feedback(
-            results["emotion_analysis"], 
-            results["eye_contact_analysis"],
-            results["posture_analysis"],
-            results["engagement_patterns"]
+        coverage = None
+        if deadline_at:
+            coverage = coverage_report(
+                config["deadline"],
+                [shard_result["deadline"] for shard_result in shard_results if shard_result.get("deadline")],
+                duration, deadline_at - config["deadline"]
+            )
+        results = _build_results(
+            shard_results, config, fps, stride, duration,
+            analysis_fps=coverage["coverage"]["analysis_fps"] if coverage else None
         )
-        results["assessment"] = assessment
+        if coverage:
+            results["deadline"] = coverage
+        if profiling_enabled(config):
+            profiler = StageProfiler()
+            for shard_result in shard_results:
+                if shard_result["profiler"]:
+                    profiler.merge(shard_result["profiler"])
+            wall_seconds = time.perf_counter() - started
+            results["performance"] = {
+                "wall_seconds": round(wall_seconds, 3),
+                "sampled_frames_per_second": round(
+                    results["presentation_metrics"]["frames_sampled"] / wall_seconds, 2
+                ),
+                # Shards load their models concurrently; the slowest one counts
+                "model_init_seconds": round(
+                    max(shard_result["model_init_seconds"] for shard_result in shard_results), 3
+                ),
+                "peak_rss_mb": peak_rss_mb(),
+                "peak_rss_children_mb": peak_rss_mb(children=True),
+                "stages": profiler.summary(),
+            }
+        if store_dir:
+            # Segments start where the run opened them (for shards: at the
+            # planned boundary, which deadline mode may sample after)
+            closed_segments, trailing_segment, _ = merge_shards(shard_results)
+            write_meta(store_dir, {
+                "video": os.path.basename(video_path),
+                "fps": fps,
+                "stride": stride,
+                "duration": duration,
+                "frames_read": results["presentation_metrics"]["frames_analyzed"],
+                "analysis_fps": results["presentation_metrics"]["analysis_fps"],
+                "segment_starts": [
+                    segment.start_time
+                    for segment in closed_segments + ([trailing_segment] if trailing_segment else [])
+                ],
+                "settings": result_settings(config),
+            })
         
         # Ensure the results can be JSON serialized
         json_str = json.dumps(results)
-        return json.loads(json_str)
+        results = json.loads(json_str)
+        if checkpoint:
+            checkpoint.remove()
+        if on_event:
+            on_event({"event": "result", "result": results})
+        return results
         
     except Exception as e:
         error_msg = {
@@ -465,7 +876,10 @@ def analyze_video(video_path):
                 ]
             }
         }
-        print(json.dumps(error_msg))
+        if on_event:
+            on_event({"event": "error", **error_msg})
+        else:
+            print(json.dumps(error_msg))
         return error_msg
     
     finally:
@@ -473,6 +887,62 @@ def analyze_video(video_path):
             cap.release()
         cv2.destroyAllWindows()
 
+def rescore(frame_store):
+    """
+    Recompute analyze_video()'s full result, assessment included, from a
+    frame store (see video_pipeline.frame_store) without decoding the video
+    or running any model.
+
+    Segmentation, posture scoring, aggregation and the assessment all run
+    the current code over the stored model outputs, so changed scoring rules
+    take effect; with unchanged rules the result equals the original one
+    (minus "performance" and "deadline"). Segments start at the times saved
+    with the store; stores without them are segmented by time as the serial
+    loop does.
+    """
+    meta, columns = open_frame_store(frame_store)
+    config = build_config(meta["settings"])
+    segment_duration = config["segment_duration"]
+    time_series = config["time_series"]
+    times, looking, reused = columns["time"], columns["looking"], columns["reused"]
+    emotions, pose = columns["emotions"], columns["pose"]
+    has_emotions = ~np.isnan(emotions).all(axis=1)
+    has_pose = ~np.isnan(pose[:, 0, 0])
+    
+    segment_starts = meta.get("segment_starts")
+    
+    # The analysis loop, with stored outputs in place of the models
+    posture_engine = PostureEngine()
+    segments = [SegmentStats(segment_starts[0] if segment_starts else 0, time_series)]
+    for row in range(meta["rows"]):
+        current_time = float(times[row])
+        if segment_starts:
+            while len(segments) < len(segment_starts) and current_time >= segment_starts[len(segments)]:
+                posture_engine.flush()
+                segments.append(SegmentStats(segment_starts[len(segments)], time_series))
+        elif current_time - segments[-1].start_time >= segment_duration:
+            posture_engine.flush()
+            segments.append(SegmentStats(current_time, time_series))
+        segment = segments[-1]
+        frame_emotions = None
+        if has_emotions[row]:
+            frame_emotions = {
+                label: float(score) for label, score in zip(EMOTION_LABELS, emotions[row])
+                if not np.isnan(score)
+            }
+        segment.add_sample(bool(looking[row]), frame_emotions, current_time)
+        segment.reused += int(reused[row])
+        if has_pose[row]:
+            posture_engine.add_points(segment, pose[row], current_time)
+    posture_engine.flush()
+    
+    shard = {"frames_read": meta["frames_read"], "segments": segments}
+    results = _build_results(
+        [shard], config, meta["fps"], meta["stride"], meta["duration"],
+        analysis_fps=meta.get("analysis_fps")
+    )
+    return json.loads(json.dumps(results))
+
 def calculate_score_and_feedback(emotion_analysis, eye_contact_analysis, posture_analysis, engagement_patterns):
     feedback = []
     improvements = []
@@ -600,13 +1070,101 @@ if __name__ == "__main__":
     try:
         if len(sys.argv) < 2:
             raise Exception("Video path not provided")
-        video_path = sys.argv[1]
+        parser = argparse.ArgumentParser(description="Analyse a presentation video")
+        parser.add_argument("video_path")
+        parser.add_argument("--preset", choices=PRESETS, default=None,
+                            help="Quality/speed preset: model settings, inference size and "
+                                 "sampling rate (explicit options override it)")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Analyse frame ranges in this many processes")
+        parser.add_argument("--analysis-fps", type=float, default=None,
+                            help="Frames analysed per second of video (default: every 3rd frame)")
+        parser.add_argument("--deadline", type=float, default=None, metavar="SECONDS",
+                            help="Finish within this many seconds: sample the whole video as "
+                                 "densely as the budget allows and report the coverage reached")
+        parser.add_argument("--inference-size", type=int, default=None,
+                            help="Longest side in pixels of the frames given to the models")
+        parser.add_argument("--prefetch", type=int, default=None,
+                            help="Frames decoded ahead on a background thread (0 decodes inline)")
+        parser.add_argument("--decode-process", action="store_true", default=None,
+                            help="Decode frames in a separate process and pass them to the "
+                                 "models through shared memory")
+        parser.add_argument("--concurrent-models", action="store_true", default=None,
+                            help="Run FaceMesh, Pose and FER on their own threads for each frame")
+        parser.add_argument("--pose-complexity", type=int, choices=(0, 1, 2), default=None,
+                            help="MediaPipe Pose model: 0 lite, 1 full, 2 heavy")
+        parser.add_argument("--refine-face-mesh", action="store_true", default=None,
+                            help="Use FaceMesh's attention model (refined eyes, lips and irises)")
+        parser.add_argument("--no-mtcnn", dest="mtcnn", action="store_false", default=None,
+                            help="Use OpenCV's Haar cascade instead of MTCNN when FER has to "
+                                 "find the face itself")
+        parser.add_argument("--motion-threshold", type=float, default=None,
+                            help="Reuse the previous results while the mean grey-level change "
+                                 "stays below this (e.g. 2.0; 0 disables)")
+        parser.add_argument("--motion-max-gap", type=float, default=None,
+                            help="Seconds after which inference is forced on a static picture")
+        parser.add_argument("--emotion-batch-size", type=int, default=None,
+                            help="Face crops per emotion-classifier call (1 disables batching)")
+        parser.add_argument("--emotion-backend", choices=EMOTION_BACKENDS, default=None,
+                            help="Emotion classifier: the stock Keras model or a quantised "
+                                 "TFLite conversion (cached after the first run)")
+        parser.add_argument("--time-series", action="store_true", default=None,
+                            help="Include per-sample eye contact, emotion and posture series")
+        parser.add_argument("--profile", action="store_true", default=None,
+                            help="Add per-stage timings and peak memory under 'performance' "
+                                 "(also enabled by VIDEO_PROFILE=1)")
+        parser.add_argument("--checkpoint", nargs="?", const=True, default=None, metavar="PATH",
+                            help="Save progress (beside the video, or to PATH) and resume from it "
+                                 "when restarted")
+        parser.add_argument("--checkpoint-interval", type=float, default=None,
+                            help="Minimum seconds between checkpoint saves (0 saves every segment)")
+        parser.add_argument("--frame-store", nargs="?", const=True, default=None, metavar="PATH",
+                            help="Save per-frame model outputs (beside the video, or to PATH) "
+                                 "for --rescore")
+        parser.add_argument("--rescore", action="store_true",
+                            help="video_path is a frame store: recompute the result from it "
+                                 "without running the models")
+        parser.add_argument("--stream", action="store_true",
+                            help="Write one NDJSON event per finished segment, then the result")
+        parser.add_argument("--no-landmark-face-crop", dest="landmark_face_crop",
+                            action="store_false", default=None,
+                            help="Run FER's MTCNN detector on every frame")
+        args = parser.parse_args()
+        video_path = args.video_path
         if not os.path.exists(video_path):
             raise Exception(f"Video file not found: {video_path}")
         
-        # Analyze the video and print the results as JSON
-        results = analyze_video(video_path)
-        print(json.dumps(results))  # Ensure only JSON is printed to stdout
+        if args.rescore:
+            results = rescore(video_path)
+        else:
+            # Analyze the video and print the results as JSON
+            results = analyze_video(
+                video_path,
+                on_event=ndjson_writer() if args.stream else None,
+                preset=args.preset,
+                workers=args.workers,
+                analysis_fps=args.analysis_fps,
+                deadline=args.deadline,
+                inference_size=args.inference_size,
+                prefetch=args.prefetch,
+                decode_process=args.decode_process,
+                concurrent_models=args.concurrent_models,
+                pose_complexity=args.pose_complexity,
+                refine_face_mesh=args.refine_face_mesh,
+                mtcnn=args.mtcnn,
+                motion_threshold=args.motion_threshold,
+                motion_max_gap=args.motion_max_gap,
+                landmark_face_crop=args.landmark_face_crop,
+                emotion_batch_size=args.emotion_batch_size,
+                emotion_backend=args.emotion_backend,
+                time_series=args.time_series,
+                profile=args.profile,
+                checkpoint=args.checkpoint,
+                checkpoint_interval=args.checkpoint_interval,
+                frame_store=args.frame_store,
+            )
+        if args.rescore or not args.stream:
+            print(json.dumps(results))  # Ensure only JSON is printed to stdout
     except Exception as e:
         # Print errors as JSON to stdout
         error_msg = {
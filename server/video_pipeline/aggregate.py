@@ -0,0 +1,290 @@
+"""
+Per-segment accumulators for analyze_video.
+
+Every sampled frame lands in exactly one SegmentStats. Video-level averages
+are always computed by folding the segments in timeline order, so a serial
+run and a sharded run (which produces the same segments in several
+processes) reduce to the same numbers.
+
+Nothing here keeps per-frame Python objects: each emotion and posture
+sub-score is a RunningStats (count, sum, Welford mean/M2, min, max), so
+memory depends on the number of segments, not on the number of frames. When
+a detailed time series is requested, samples go into float32 TimeSeries
+columns instead.
+
+to_state()/from_state() turn every accumulator into plain JSON-safe data and
+back without losing a bit, for checkpoints.
+"""
+import base64
+import math
+from array import array
+
+from video_pipeline.emotion_batch import EMOTION_LABELS
+
+POSTURE_SCORE_KEYS = ("cva_score", "tilt_score", "symmetry_score", "position_score")
+
+
+class RunningStats:
+    """Streaming count, sum, mean, variance, min and max of one value."""
+
+    __slots__ = ("count", "total", "_mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Fold in another accumulator (Chan et al. parallel update)."""
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self._mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def mean(self):
+        # total / count keeps the averages identical to plain summation
+        return self.total / self.count if self.count else 0.0
+
+    def variance(self):
+        """Population variance."""
+        return max(0.0, self._m2 / self.count) if self.count else 0.0
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+    def to_state(self):
+        return [self.count, float(self.total), float(self._mean), float(self._m2),
+                float(self.min), float(self.max)]
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls()
+        stats.count, stats.total, stats._mean, stats._m2, stats.min, stats.max = state
+        return stats
+
+    def summary(self, decimals=4):
+        if not self.count:
+            return None
+        return {
+            "mean": round(float(self.mean()), decimals),
+            "std": round(self.std(), decimals),
+            "min": round(float(self.min), decimals),
+            "max": round(float(self.max), decimals),
+            "count": self.count,
+        }
+
+
+class TimeSeries:
+    """Append-only float32 columns, the first of which is the sample time."""
+
+    def __init__(self, columns):
+        self.columns = ("time",) + tuple(columns)
+        self._data = [array("f") for _ in self.columns]
+
+    def __len__(self):
+        return len(self._data[0])
+
+    def append(self, time, values):
+        self._data[0].append(time)
+        for column, value in zip(self._data[1:], values):
+            column.append(value)
+
+    def extend(self, other):
+        for column, values in zip(self._data, other._data):
+            column.extend(values)
+
+    def to_state(self):
+        # Raw float32 bytes, so a restored column is bit-for-bit the same
+        return {
+            name: base64.b64encode(column.tobytes()).decode("ascii")
+            for name, column in zip(self.columns, self._data)
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        series = cls(tuple(state)[1:])
+        for name, column in zip(series.columns, series._data):
+            column.frombytes(base64.b64decode(state[name]))
+        return series
+
+    def to_dict(self, decimals=4):
+        # Rounding hides float32 representation noise in the JSON
+        return {
+            name: [round(value, decimals) for value in column]
+            for name, column in zip(self.columns, self._data)
+        }
+
+
+def new_time_series():
+    """Empty per-sample series: eye contact, emotions and posture sub-scores."""
+    return {
+        "eye_contact": TimeSeries(("looking_at_screen",)),
+        "emotions": TimeSeries(EMOTION_LABELS),
+        "posture": TimeSeries(POSTURE_SCORE_KEYS),
+    }
+
+
+class SegmentStats:
+    """
+    Totals for one engagement segment starting at `start_time` seconds.
+
+    Args:
+        start_time (float): Segment start in seconds.
+        time_series (bool): Also record every sample in float32 columns.
+    """
+
+    def __init__(self, start_time, time_series=False):
+        self.start_time = start_time
+        self.samples = 0
+        self.engaged = 0
+        self.reused = 0  # samples that reused the previous frame's model outputs
+        self.emotions = {}
+        self.posture = [RunningStats() for _ in POSTURE_SCORE_KEYS]
+        self.series = new_time_series() if time_series else None
+
+    @property
+    def posture_count(self):
+        return self.posture[0].count
+
+    def add_sample(self, looking_at_screen, frame_emotions, time=None):
+        self.samples += 1
+        if looking_at_screen:
+            self.engaged += 1
+        if self.series is not None:
+            self.series["eye_contact"].append(time, (1.0 if looking_at_screen else 0.0,))
+
+        if frame_emotions:
+            self.add_emotions(frame_emotions, time)
+
+    def add_posture(self, frame_scores, time=None):
+        """Add one frame's rounded sub-scores, in POSTURE_SCORE_KEYS order."""
+        for stats, score in zip(self.posture, frame_scores):
+            stats.add(score)
+        if self.series is not None:
+            self.series["posture"].append(time, frame_scores)
+
+    def add_emotions(self, frame_emotions, time=None):
+        for emotion, score in frame_emotions.items():
+            stats = self.emotions.get(emotion)
+            if stats is None:
+                stats = self.emotions[emotion] = RunningStats()
+            stats.add(score)
+        if self.series is not None:
+            self.series["emotions"].append(
+                time, [frame_emotions.get(label, math.nan) for label in EMOTION_LABELS]
+            )
+
+    def to_state(self):
+        return {
+            "start_time": self.start_time,
+            "samples": self.samples,
+            "engaged": self.engaged,
+            "reused": self.reused,
+            "emotions": {emotion: stats.to_state() for emotion, stats in self.emotions.items()},
+            "posture": [stats.to_state() for stats in self.posture],
+            "series": (
+                {name: series.to_state() for name, series in self.series.items()}
+                if self.series is not None else None
+            ),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        segment = cls(state["start_time"])
+        segment.samples = state["samples"]
+        segment.engaged = state["engaged"]
+        segment.reused = state["reused"]
+        segment.emotions = {
+            emotion: RunningStats.from_state(stats) for emotion, stats in state["emotions"].items()
+        }
+        segment.posture = [RunningStats.from_state(stats) for stats in state["posture"]]
+        if state["series"] is not None:
+            segment.series = {
+                name: TimeSeries.from_state(series) for name, series in state["series"].items()
+            }
+        return segment
+
+    def emotion_means(self):
+        return {emotion: stats.mean() for emotion, stats in self.emotions.items()}
+
+    def engagement(self):
+        return self.engaged / self.samples if self.samples else 0
+
+    def posture_means(self):
+        if not self.posture_count:
+            return None
+        return tuple(stats.mean() for stats in self.posture)
+
+
+def combine_segments(segments):
+    """
+    Fold segments (in timeline order) into video-level totals.
+
+    Returns:
+        dict: {
+            "looking_at_screen": int,
+            "not_looking_at_screen": int,
+            "reused_samples": int,
+            "emotion_averages": {emotion: float},
+            "posture_averages": tuple of 4 floats or None,
+            "emotion_stats": {emotion: RunningStats},
+            "posture_stats": [RunningStats, ...] in POSTURE_SCORE_KEYS order,
+            "time_series": {name: TimeSeries} or None
+        }
+    """
+    engaged = 0
+    samples = 0
+    reused = 0
+    emotion_stats = {}
+    posture_stats = [RunningStats() for _ in POSTURE_SCORE_KEYS]
+    time_series = None
+
+    for segment in segments:
+        engaged += segment.engaged
+        samples += segment.samples
+        reused += segment.reused
+        for emotion, stats in segment.emotions.items():
+            emotion_stats.setdefault(emotion, RunningStats()).merge(stats)
+        for total, stats in zip(posture_stats, segment.posture):
+            total.merge(stats)
+        if segment.series is not None:
+            if time_series is None:
+                time_series = new_time_series()
+            for name, series in segment.series.items():
+                time_series[name].extend(series)
+
+    posture_count = posture_stats[0].count
+    return {
+        "looking_at_screen": engaged,
+        "not_looking_at_screen": samples - engaged,
+        "reused_samples": reused,
+        "emotion_averages": {
+            emotion: float(stats.mean()) for emotion, stats in emotion_stats.items()
+        },
+        "posture_averages": (
+            tuple(stats.mean() for stats in posture_stats) if posture_count else None
+        ),
+        "emotion_stats": emotion_stats,
+        "posture_stats": posture_stats,
+        "time_series": time_series,
+    }
@@ -0,0 +1,322 @@
+"""
+Analyse many videos with one pool of warm workers.
+
+Input is a directory (searched recursively for video files) or a manifest
+file with one video per line: either a path, or a JSON object with
+"video_path" and per-video analysis options, e.g.
+
+    recordings/week1/alice.mp4
+    {"video_path": "recordings/week1/bob.mp4", "analysis_fps": 5}
+
+Relative manifest paths are resolved against the manifest's directory.
+Videos are spread over a VideoWorkerPool, so each worker process loads the
+models once and keeps them for the whole batch.
+
+Each video gets <output-dir>/<relative path>.json holding the video, its
+size and mtime, the result-affecting settings, and the result (or the
+error). A video whose output file already has a result for the same file
+and settings is skipped, so an interrupted batch can simply be restarted.
+When the batch ends, <output-dir>/summary.json lists every video with its
+status and headline scores, together with the batch's throughput: videos
+per hour and video frames per second of wall time.
+
+Usage (from the server directory):
+    python -m video_pipeline.batch recordings/ --output-dir results/ --workers 4
+    python -m video_pipeline.batch cohort.txt --output-dir results/ --analysis-fps 5
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from video_pipeline.checkpoint import result_settings, video_identity
+from video_pipeline.config import PRESETS, build_config
+from video_pipeline.tflite_emotion import EMOTION_BACKENDS
+from video_pipeline.worker_pool import DEFAULT_MAX_JOBS, DEFAULT_WORKERS, VideoWorkerPool
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v")
+SUMMARY_FILE = "summary.json"
+DEFAULT_JOB_TIMEOUT = 3600  # seconds per video; batches tend to hold long recordings
+
+
+def find_videos(directory):
+    """Video files below `directory`, in a stable order."""
+    videos = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                videos.append(os.path.join(root, name))
+    return videos
+
+
+def read_manifest(path):
+    """
+    Returns:
+        list: (video path, per-video options) pairs.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                try:
+                    options = json.loads(line)
+                    video_path = options.pop("video_path")
+                except (ValueError, KeyError):
+                    raise ValueError(f"{path}:{line_number}: expected a JSON object with video_path")
+            else:
+                video_path, options = line, {}
+            jobs.append((os.path.join(base, video_path), options))
+    return jobs
+
+
+def output_path(output_dir, video_path, root):
+    """<output_dir>/<video path relative to root>.json"""
+    relative = os.path.relpath(os.path.abspath(video_path), root)
+    if relative.startswith(os.pardir):
+        # Outside the input directory (manifest entries may point anywhere)
+        relative = os.path.abspath(video_path).lstrip(os.sep)
+    return os.path.join(output_dir, relative + ".json")
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(data, f)
+    os.replace(temporary, path)
+
+
+def _finished_output(path, identity, settings):
+    """The saved output when it already holds a result for this video and settings."""
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if "result" not in saved:
+        return None
+    if saved.get("identity") != identity or saved.get("settings") != json.loads(json.dumps(settings)):
+        return None
+    return saved
+
+
+def _summary_entry(video_path, output, status, record):
+    entry = {"video_path": video_path, "output": output, "status": status}
+    if "error" in record:
+        entry["error"] = record["error"]
+        return entry
+    result = record["result"]
+    metrics = result.get("presentation_metrics", {})
+    assessment = result.get("assessment", {})
+    entry.update({
+        "seconds": record.get("seconds"),
+        "duration": metrics.get("duration"),
+        "frames_analyzed": metrics.get("frames_analyzed"),
+        "total_score": assessment.get("total_score"),
+        "detailed_scores": assessment.get("detailed_scores"),
+    })
+    return entry
+
+
+class _BatchPool(VideoWorkerPool):
+    """VideoWorkerPool whose responses are saved per video instead of printed."""
+
+    def __init__(self, script_path, jobs, log=None, **kwargs):
+        super().__init__(script_path, **kwargs)
+        self.batch_jobs = jobs
+        self.log = log
+        self.outcomes = {}
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job_id, kwargs):
+        self._started[job_id] = time.monotonic()
+        super().submit(job_id, kwargs)
+
+    def respond(self, job_id, message):
+        if "event" in message:
+            return
+        job = self.batch_jobs[job_id]
+        record = {
+            "video_path": job["video_path"],
+            "identity": job["identity"],
+            "settings": job["settings"],
+            "seconds": round(time.monotonic() - self._started[job_id], 3),
+        }
+        result = message.get("result")
+        if result is not None and "error" not in result:
+            record["result"] = result
+        else:
+            # analyze_video() reports failures as {"error": ...} results
+            record["error"] = (result or message).get("error", "Unknown error")
+        _write_json(job["output"], record)
+        with self._lock:
+            self.outcomes[job_id] = record
+            done = len(self.outcomes)
+        if self.log:
+            status = "error: " + record["error"] if "error" in record else f"{record['seconds']}s"
+            self.log(f"[{done}/{len(self.batch_jobs)}] {job['video_path']}: {status}")
+
+
+def run_batch(jobs, output_dir, root, script_path, base_options=None, force=False,
+              workers=DEFAULT_WORKERS, job_timeout=DEFAULT_JOB_TIMEOUT, max_jobs=DEFAULT_MAX_JOBS,
+              log=None):
+    """
+    Analyse every (video path, options) job not already done.
+
+    Args:
+        jobs (list): (video path, per-video options) pairs.
+        output_dir (str): Where per-video outputs and summary.json go.
+        root (str): Directory output paths are made relative to.
+        base_options (dict): Analysis options for every video; per-video
+            options override them.
+        force (bool): Re-analyse videos that already have an output.
+
+    Returns:
+        dict: The summary, also written to <output_dir>/summary.json.
+    """
+    base_options = base_options or {}
+    entries = []
+    pending = {}
+    for index, (video_path, options) in enumerate(jobs):
+        options = {**base_options, **options}
+        output = output_path(output_dir, video_path, root)
+        try:
+            identity = video_identity(video_path)
+            settings = result_settings(build_config(options))
+        except (OSError, ValueError) as e:
+            entries.append({"video_path": video_path, "output": None, "status": "error", "error": str(e)})
+            continue
+        saved = None if force else _finished_output(output, identity, settings)
+        if saved is not None:
+            entries.append(_summary_entry(video_path, output, "skipped", saved))
+            continue
+        job_id = str(index)
+        pending[job_id] = {
+            "video_path": video_path, "options": options, "output": output,
+            "identity": identity, "settings": settings,
+        }
+        entries.append(job_id)
+
+    if log:
+        skipped = sum(1 for entry in entries if isinstance(entry, dict) and entry["status"] == "skipped")
+        log(f"{len(pending)} to analyse, {skipped} already done")
+
+    started = time.monotonic()
+    if pending:
+        pool = _BatchPool(
+            script_path, pending, log=log,
+            workers=min(workers, len(pending)),
+            job_timeout=job_timeout,
+            max_jobs=max_jobs,
+            output=sys.stderr,
+            warm_up_options=base_options,
+        )
+        pool.start()
+        for job_id, job in pending.items():
+            pool.submit(job_id, {"video_path": job["video_path"], **job["options"]})
+        pool.shutdown()
+        outcomes = pool.outcomes
+    else:
+        outcomes = {}
+    wall = time.monotonic() - started
+
+    analysed = frames = video_seconds = 0
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, str):
+            continue
+        job = pending[entry]
+        record = outcomes.get(entry, {"error": "No response from the worker pool"})
+        status = "error" if "error" in record else "done"
+        entries[position] = _summary_entry(job["video_path"], job["output"], status, record)
+        if status == "done":
+            analysed += 1
+            frames += entries[position]["frames_analyzed"] or 0
+            video_seconds += entries[position]["duration"] or 0
+
+    summary = {
+        "videos": len(entries),
+        "analysed": analysed,
+        "skipped": sum(1 for entry in entries if entry["status"] == "skipped"),
+        "failed": sum(1 for entry in entries if entry["status"] == "error"),
+        "workers": min(workers, len(pending)) if pending else 0,
+        "wall_seconds": round(wall, 3),
+        "throughput": {
+            "videos_per_hour": round(analysed / wall * 3600, 2) if wall > 0 else 0,
+            "frames_per_second": round(frames / wall, 2) if wall > 0 else 0,
+            # Seconds of video analysed per second of wall time
+            "realtime_factor": round(video_seconds / wall, 3) if wall > 0 else 0,
+        },
+        "results": entries,
+    }
+    _write_json(os.path.join(output_dir, SUMMARY_FILE), summary)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse a directory or manifest of videos")
+    parser.add_argument("input", help="Directory of videos, or a manifest file (one video per line)")
+    parser.add_argument("--output-dir", required=True, help="Per-video results and summary.json")
+    parser.add_argument("--script", default=os.path.join(os.getcwd(), "video_analysis.py"),
+                        help="Analysis script to load in each worker")
+    parser.add_argument("--workers", type=int,
+                        default=int(os.environ.get("VIDEO_POOL_SIZE", DEFAULT_WORKERS)),
+                        help="Videos analysed at once, one warm process each")
+    parser.add_argument("--job-timeout", type=float, default=DEFAULT_JOB_TIMEOUT,
+                        help="Seconds before a video's worker is killed and replaced")
+    parser.add_argument("--max-jobs", type=int, default=DEFAULT_MAX_JOBS,
+                        help="Videos a worker analyses before it is recycled")
+    parser.add_argument("--force", action="store_true", help="Re-analyse videos already done")
+    parser.add_argument("--preset", choices=PRESETS, default=None,
+                        help="Quality/speed preset (explicit options override it)")
+    parser.add_argument("--analysis-fps", type=float, default=None,
+                        help="Frames analysed per second of video (default: every 3rd frame)")
+    parser.add_argument("--inference-size", type=int, default=None,
+                        help="Longest side in pixels of the frames given to the models")
+    parser.add_argument("--motion-threshold", type=float, default=None,
+                        help="Reuse the previous results while the picture changes less than this")
+    parser.add_argument("--emotion-backend", choices=EMOTION_BACKENDS, default=None,
+                        help="Emotion classifier: the stock Keras model or a quantised TFLite one")
+    parser.add_argument("--time-series", action="store_true", default=None,
+                        help="Include per-sample series in each result")
+    args = parser.parse_args(argv)
+
+    base_options = {
+        key: value for key, value in {
+            "preset": args.preset,
+            "analysis_fps": args.analysis_fps,
+            "inference_size": args.inference_size,
+            "motion_threshold": args.motion_threshold,
+            "emotion_backend": args.emotion_backend,
+            "time_series": args.time_series,
+        }.items() if value is not None
+    }
+    if os.path.isdir(args.input):
+        root = os.path.abspath(args.input)
+        jobs = [(path, {}) for path in find_videos(args.input)]
+    else:
+        root = os.path.dirname(os.path.abspath(args.input))
+        jobs = read_manifest(args.input)
+
+    summary = run_batch(
+        jobs, args.output_dir, root, args.script,
+        base_options=base_options,
+        force=args.force,
+        workers=args.workers,
+        job_timeout=args.job_timeout,
+        max_jobs=args.max_jobs,
+        log=lambda message: print(message, file=sys.stderr, flush=True),
+    )
+    print(json.dumps({key: value for key, value in summary.items() if key != "results"}, indent=2))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
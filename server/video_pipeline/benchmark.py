@@ -0,0 +1,611 @@
+"""
+Throughput benchmark for analyze_video.
+
+Generates synthetic clips with cv2.VideoWriter (several resolutions, frame
+rates and durations), optionally adds server/test_video.mp4, and runs the
+pipeline on each clip in several modes:
+
+    serial    default settings, one process (what the server runs)
+    sampled   analysis_fps=5
+    parallel  frame-range shards in --workers processes
+    cached    the backend script (backend/video_analysis.py) answering from
+              its result cache: one run fills a private cache, a second run
+              is timed end to end (interpreter start, hashing, lookup, chart
+              copy); reported as wall seconds, not frames per second
+
+Every run happens in a fresh interpreter, so import time, model load time
+(the script's warm_up()) and peak RSS belong to that run alone. A separate
+"stages" run per clip times decode, preprocessing, FaceMesh, Pose, FER and
+posture scoring frame by frame and reports p50/p95/max latencies.
+
+The report is JSON. Save one as a baseline and later runs can be compared
+against it; any throughput drop, memory growth or p95 latency growth beyond
+the thresholds is listed under "regressions" and makes the exit status 1.
+
+Usage (from the server directory):
+    python -m video_pipeline.benchmark --output bench.json
+    python -m video_pipeline.benchmark --quick --baseline bench.json
+    python -m video_pipeline.benchmark --startup
+    python -m video_pipeline.benchmark --emotion-backends
+    python -m video_pipeline.benchmark --frame-transport
+
+--startup only measures cold start: the import of the analysis script, the
+build time of each model, the first inference (graph set-up) and a second
+one for comparison.
+
+--emotion-backends compares the emotion classifier backends (see
+video_pipeline.tflite_emotion) on face crops taken from test_video.mp4 (or
+a synthetic clip) the way the pipeline takes them: load/convert time, faces
+per second at batch sizes 1 and 32, and agreement with the stock Keras
+model (top-1 emotion and absolute score differences).
+
+--frame-transport moves prepared 1080p frame pairs from one producer to
+several consumer processes, pickled through a multiprocessing queue and
+through a SharedFrameRing (video_pipeline.frame_ring), and reports frames
+per second for each.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from video_pipeline.profiling import latency_summary, peak_rss_mb
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SCRIPT = os.path.join(SERVER_DIR, "video_analysis.py")
+TEST_VIDEO = os.path.join(SERVER_DIR, "test_video.mp4")
+BACKEND_DIR = os.path.join(os.path.dirname(SERVER_DIR), "backend")
+
+# (width, height, fps, seconds)
+DEFAULT_CLIPS = [(640, 360, 30, 20), (1280, 720, 30, 10), (1920, 1080, 25, 5)]
+QUICK_CLIPS = [(640, 360, 30, 5)]
+MODES = ("serial", "sampled", "parallel", "cached")
+SAMPLED_FPS = 5
+STAGE_FRAMES = 150  # sampled frames timed per clip in the stages run
+EMOTION_FACES = 256  # face crops classified per backend in the emotion-backends run
+EMOTION_BATCH_SIZES = (1, 32)
+TRANSPORT_FRAMES = 300
+TRANSPORT_SHAPE = (1080, 1920)
+TRANSPORT_CONSUMERS = 2
+
+# Relative changes beyond which a metric counts as a regression
+DEFAULT_THRESHOLDS = {"fps_drop": 0.10, "rss_growth": 0.20, "latency_growth": 0.20}
+
+
+def clip_name(width, height, fps, seconds):
+    return f"{width}x{height}@{fps}x{seconds}s"
+
+
+def parse_clip(spec):
+    """'1280x720@30x10' -> (1280, 720, 30, 10)"""
+    size, rest = spec.split("@")
+    width, height = (int(v) for v in size.split("x"))
+    fps, seconds = rest.rstrip("s").split("x")
+    return width, height, int(fps), float(seconds)
+
+
+def make_clip(path, width, height, fps, seconds):
+    """Write a synthetic clip: a moving, face-sized ellipse over a noisy gradient."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Cannot write {path}")
+    rng = np.random.default_rng(0)
+    gradient = np.linspace(40, 160, width, dtype=np.float32)[None, :, None]
+    background = np.broadcast_to(gradient, (height, width, 3)).astype(np.uint8)
+    axes = (width // 10, height // 6)
+    try:
+        for i in range(int(fps * seconds)):
+            frame = background.copy()
+            frame += rng.integers(0, 8, frame.shape, dtype=np.uint8)
+            center = (int(width / 2 + width / 8 * np.sin(i / fps)), height // 2)
+            cv2.ellipse(frame, center, axes, 0, 0, 360, (150, 180, 220), -1)
+            writer.write(frame)
+    finally:
+        writer.release()
+
+
+def _time_stages(va, video_path, frames=STAGE_FRAMES):
+    """Per-frame latency of each pipeline stage on the first sampled frames."""
+    from video_pipeline.aggregate import SegmentStats
+    from video_pipeline.face_crop import detect_emotions_from_landmarks
+    from video_pipeline.posture import PostureEngine
+    from video_pipeline.preprocess import FramePreprocessor
+    from video_pipeline.sampling import FrameSampler, sample_stride
+
+    config = va.build_config()
+    timings = {name: [] for name in
+               ("decode", "preprocess", "face_mesh", "pose", "emotion", "posture_block")}
+    cap = cv2.VideoCapture(video_path)
+    try:
+        sampler = iter(FrameSampler(cap, sample_stride(cap.get(cv2.CAP_PROP_FPS))))
+        preprocessor = FramePreprocessor(config["inference_size"])
+        posture_engine = PostureEngine()
+        segment = SegmentStats(0)
+        for _ in range(frames):
+            started = time.perf_counter()
+            item = next(sampler, None)
+            if item is None:
+                break
+            timings["decode"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            bgr, rgb = preprocessor.prepare(item[1])
+            timings["preprocess"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            face_results = va.face_mesh.process(rgb)
+            timings["face_mesh"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            pose_results = va.pose.process(rgb)
+            timings["pose"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            if face_results.multi_face_landmarks:
+                detect_emotions_from_landmarks(va.detector, bgr, face_results.multi_face_landmarks[0])
+            else:
+                va.detector.detect_emotions(bgr)
+            timings["emotion"].append(time.perf_counter() - started)
+
+            if pose_results.pose_landmarks:
+                posture_engine.add(segment, pose_results.pose_landmarks.landmark)
+        started = time.perf_counter()
+        posture_engine.flush()
+        timings["posture_block"].append(time.perf_counter() - started)
+    finally:
+        cap.release()
+    return {name: latency_summary(values) for name, values in timings.items()}
+
+
+def _collect_faces(va, video_path, limit=EMOTION_FACES):
+    """
+    Classifier inputs for up to `limit` sampled frames: the FaceMesh face
+    crop, or the centre of the frame when FaceMesh finds no face.
+    """
+    from video_pipeline.emotion_batch import EmotionBatcher
+    from video_pipeline.face_crop import prepare_face_from_landmarks
+    from video_pipeline.preprocess import FramePreprocessor
+    from video_pipeline.sampling import FrameSampler, sample_stride
+
+    batcher = EmotionBatcher(va.detector, 1)
+    preprocessor = FramePreprocessor(va.build_config()["inference_size"])
+    faces = []
+    landmark_faces = 0
+    cap = cv2.VideoCapture(video_path)
+    try:
+        for _, frame in FrameSampler(cap, sample_stride(cap.get(cv2.CAP_PROP_FPS))):
+            if len(faces) >= limit:
+                break
+            bgr, rgb = preprocessor.prepare(frame)
+            face_results = va.face_mesh.process(rgb)
+            pending = None
+            if face_results.multi_face_landmarks:
+                pending = prepare_face_from_landmarks(batcher, bgr, face_results.multi_face_landmarks[0])
+            if pending is not None:
+                landmark_faces += 1
+            else:
+                height, width = bgr.shape[:2]
+                side = min(height, width) // 2
+                pending = batcher.prepare_face(bgr, ((width - side) // 2, (height - side) // 2, side, side))
+            if pending is not None:
+                faces.append(pending.tensor)
+    finally:
+        cap.release()
+    return np.stack(faces)[..., None], landmark_faces
+
+
+def _classify(classifier, faces, batch_size):
+    """(predictions, faces per second) for `faces` in batches of `batch_size`."""
+    predictions = []
+    started = time.perf_counter()
+    for start in range(0, len(faces), batch_size):
+        predictions.append(np.asarray(classifier.predict_on_batch(faces[start:start + batch_size])))
+    return np.concatenate(predictions), len(faces) / (time.perf_counter() - started)
+
+
+def _compare_emotion_backends(va, video_path):
+    from video_pipeline import tflite_emotion
+
+    faces, landmark_faces = _collect_faces(va, video_path)
+    report = {"faces": len(faces), "landmark_faces": landmark_faces, "backends": {}}
+    keras_model = va.detector._FER__emotion_classifier
+    reference = None
+    for backend in tflite_emotion.EMOTION_BACKENDS:
+        started = time.perf_counter()
+        try:
+            if backend == "keras":
+                classifier = keras_model
+            else:
+                path = tflite_emotion.cached_classifier_path(keras_model, backend.split("-", 1)[1])
+                classifier = tflite_emotion.TFLiteEmotionClassifier(path)
+        except Exception as e:
+            report["backends"][backend] = {"error": str(e)}
+            continue
+        entry = {"load_seconds": round(time.perf_counter() - started, 3)}
+        if backend != "keras":
+            entry["model_bytes"] = os.path.getsize(classifier.path)
+        for batch_size in EMOTION_BATCH_SIZES:
+            # One untimed batch, so graph set-up is not counted as throughput
+            _classify(classifier, faces[:batch_size], batch_size)
+            predictions, faces_per_second = _classify(classifier, faces, batch_size)
+            entry[f"faces_per_second_batch_{batch_size}"] = round(faces_per_second, 1)
+        if reference is None:
+            reference = predictions
+        else:
+            difference = np.abs(predictions - reference)
+            entry.update({
+                "top1_agreement": round(float(np.mean(predictions.argmax(1) == reference.argmax(1))), 4),
+                "mean_abs_difference": round(float(difference.mean()), 5),
+                "max_abs_difference": round(float(difference.max()), 5),
+            })
+        report["backends"][backend] = entry
+    return report
+
+
+def _queue_consumer(frames, results):
+    while True:
+        item = frames.get()
+        if item is None:
+            return
+        sequence, bgr, rgb = item
+        results.put((sequence, int(bgr[0, 0, 0]) + int(rgb[-1, -1, 2])))
+
+
+def _ring_consumer(ring, results):
+    while True:
+        item = ring.get()
+        if isinstance(item, tuple):
+            return
+        results.put((item.sequence, int(item.bgr[0, 0, 0]) + int(item.rgb[-1, -1, 2])))
+        ring.release(item.index)
+
+
+def compare_frame_transport(frames=TRANSPORT_FRAMES, shape=TRANSPORT_SHAPE,
+                            consumers=TRANSPORT_CONSUMERS, depth=8):
+    """Frames per second through a pickling queue and through a SharedFrameRing."""
+    import multiprocessing as mp
+    from video_pipeline.frame_ring import SharedFrameRing, reorder
+
+    ctx = mp.get_context("spawn")
+    rng = np.random.default_rng(0)
+    source = rng.integers(0, 256, (2, *shape, 3), dtype=np.uint8)
+    # The per-frame marker is added to this pixel in uint8; keep it from wrapping
+    source[0, 0, 0, 0] = 0
+    expected = [int(source[1, -1, -1, 2]) + i % 7 for i in range(frames)]
+    report = {"frames": frames, "shape": list(shape), "consumers": consumers}
+
+    def collect(results):
+        ordered = [value for _, value in reorder(results.get() for _ in range(frames))]
+        return ordered == expected
+
+    # Pickled through a bounded queue (the same backpressure as the ring)
+    queue, results = ctx.Queue(depth), ctx.Queue()
+    workers = [ctx.Process(target=_queue_consumer, args=(queue, results)) for _ in range(consumers)]
+    for worker in workers:
+        worker.start()
+    started = time.perf_counter()
+    for sequence in range(frames):
+        bgr, rgb = source[0].copy(), source[1].copy()
+        bgr[0, 0, 0] += sequence % 7  # stands in for decoding a new frame
+        queue.put((sequence, bgr, rgb))
+    for _ in workers:
+        queue.put(None)
+    correct = collect(results)
+    report["pickled_queue"] = {
+        "fps": round(frames / (time.perf_counter() - started), 1), "in_order": correct
+    }
+    for worker in workers:
+        worker.join()
+
+    ring, results = SharedFrameRing(ctx, depth, shape), ctx.Queue()
+    workers = [ctx.Process(target=_ring_consumer, args=(ring, results)) for _ in range(consumers)]
+    for worker in workers:
+        worker.start()
+    try:
+        started = time.perf_counter()
+        for sequence in range(frames):
+            index = ring.acquire()
+            bgr, rgb = ring.views(index)
+            np.copyto(bgr, source[0])
+            np.copyto(rgb, source[1])
+            bgr[0, 0, 0] += sequence % 7
+            ring.publish(index, sequence)
+        ring.finish(consumers=consumers)
+        correct = collect(results)
+        report["shared_memory_ring"] = {
+            "fps": round(frames / (time.perf_counter() - started), 1), "in_order": correct
+        }
+        for worker in workers:
+            worker.join()
+    finally:
+        ring.close()
+        ring.unlink()
+    return report
+
+
+def _time_cache_hit(video_path):
+    """Wall time of a backend CLI run that is answered from the result cache."""
+    script = os.path.join(BACKEND_DIR, "video_analysis.py")
+    with tempfile.TemporaryDirectory() as directory:
+        cache_dir = os.path.join(directory, "cache")
+        env = {**os.environ, "VIDEO_CACHE_DIR": cache_dir}
+
+        def run(output_dir):
+            started = time.perf_counter()
+            completed = subprocess.run(
+                [sys.executable, script, video_path, os.path.join(directory, output_dir)],
+                cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+            )
+            return time.perf_counter() - started, completed
+
+        miss_seconds, completed = run("miss")
+        entries = [
+            os.path.join(dirpath, "result.json")
+            for dirpath, _, filenames in os.walk(cache_dir) if "result.json" in filenames
+        ]
+        if not entries:
+            return {"error": f"backend run stored no cache entry: {completed.stdout[-2000:]}"}
+        # A hit refreshes the entry's mtime; a miss leaves the existing entry alone
+        os.utime(entries[0], (0, 0))
+        hit_seconds, completed = run("hit")
+        if os.path.getmtime(entries[0]) == 0:
+            return {"error": f"second backend run missed the cache: {completed.stdout[-2000:]}"}
+    return {
+        "miss_seconds": round(miss_seconds, 3),
+        "wall_seconds": round(hit_seconds, 4),
+        "peak_rss_children_mb": peak_rss_mb(children=True),
+    }
+
+
+def run_one(spec):
+    """
+    Body of one benchmark run; executed in its own interpreter.
+
+    Args:
+        spec (dict): {"script", "video", "mode", "workers"}
+    """
+    from video_pipeline.worker_pool import load_analysis_module
+
+    if spec["mode"] == "cached":
+        return _time_cache_hit(spec["video"])
+
+    started = time.perf_counter()
+    va = load_analysis_module(spec["script"])
+    report = {"import_seconds": round(time.perf_counter() - started, 3)}
+    mode = spec["mode"]
+    if hasattr(va, "warm_up"):
+        warm = va.warm_up()
+        if mode == "startup":
+            # Models are built now, so a second warm_up() times a warm inference
+            return {
+                **report,
+                "models": warm["models"],
+                "first_inference_seconds": warm["first_inference_seconds"],
+                "second_inference_seconds": va.warm_up()["first_inference_seconds"],
+                "peak_rss_mb": peak_rss_mb(),
+            }
+    elif mode == "startup":
+        return {**report, "error": "analysis script has no warm_up()"}
+    # Import plus warm-up: what a fresh process pays before its first frame
+    report["model_load_seconds"] = round(time.perf_counter() - started, 3)
+
+    if mode == "emotion_backends":
+        report.update(_compare_emotion_backends(va, spec["video"]))
+        report["peak_rss_mb"] = peak_rss_mb()
+        return report
+
+    if mode == "stages":
+        report["stages"] = _time_stages(va, spec["video"])
+        report["peak_rss_mb"] = peak_rss_mb()
+        return report
+
+    options = {}
+    if mode == "sampled":
+        options["analysis_fps"] = SAMPLED_FPS
+    elif mode == "parallel":
+        options["workers"] = spec["workers"]
+
+    started = time.perf_counter()
+    result = va.analyze_video(spec["video"], **options)
+    wall = time.perf_counter() - started
+    if "error" in result:
+        return {**report, "error": result["error"]}
+
+    metrics = result["presentation_metrics"]
+    report.update({
+        "wall_seconds": round(wall, 4),
+        "fps": round(metrics["frames_analyzed"] / wall, 2),
+        "sampled_fps": round(metrics["frames_sampled"] / wall, 2),
+        "frames": metrics["frames_analyzed"],
+        "frames_sampled": metrics["frames_sampled"],
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_children_mb": peak_rss_mb(children=True),
+    })
+    return report
+
+
+def _spawn(spec):
+    """Run one spec in a fresh interpreter; its report is the last stdout line."""
+    completed = subprocess.run(
+        [sys.executable, "-m", "video_pipeline.benchmark", "--run-one", json.dumps(spec)],
+        cwd=SERVER_DIR, capture_output=True, text=True,
+    )
+    lines = completed.stdout.strip().splitlines()
+    try:
+        return json.loads(lines[-1])
+    except (IndexError, ValueError):
+        return {"error": f"exit status {completed.returncode}: {completed.stderr[-2000:]}"}
+
+
+def run_benchmark(clips, modes, script=DEFAULT_SCRIPT, workers=4, log=None):
+    """
+    Args:
+        clips (list): (name, path) pairs.
+        modes (list): Subset of MODES.
+
+    Returns:
+        dict: {"environment": {...}, "runs": [...], "stages": [...]}
+    """
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "workers": workers,
+        },
+        "runs": [],
+        "stages": [],
+    }
+    for name, path in clips:
+        for mode in ("stages",) + tuple(modes):
+            if log:
+                log(f"{name}: {mode}")
+            spec = {"script": script, "video": path, "mode": mode, "workers": workers}
+            outcome = _spawn(spec)
+            entry = {"clip": name, "mode": mode, **outcome}
+            report["stages" if mode == "stages" else "runs"].append(entry)
+    return report
+
+
+def compare(report, baseline, thresholds=None):
+    """
+    List regressions of `report` against `baseline`.
+
+    Runs are matched by (clip, mode) and stage timings by (clip, stage); runs
+    missing from either side are ignored.
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    regressions = []
+
+    def check(where, metric, old, new, limit, higher_is_better):
+        if not old or new is None:
+            return
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > limit:
+            regressions.append({
+                **where, "metric": metric, "baseline": old, "current": new,
+                "change": round(change, 4), "threshold": limit,
+            })
+
+    old_runs = {(r["clip"], r["mode"]): r for r in baseline.get("runs", [])}
+    for run in report["runs"]:
+        old = old_runs.get((run["clip"], run["mode"]))
+        if not old or "error" in run or "error" in old:
+            continue
+        where = {"clip": run["clip"], "mode": run["mode"]}
+        check(where, "fps", old.get("fps"), run.get("fps"), thresholds["fps_drop"], True)
+        if run["mode"] == "cached":
+            check(where, "wall_seconds", old.get("wall_seconds"), run.get("wall_seconds"),
+                  thresholds["latency_growth"], False)
+        check(where, "peak_rss_mb", old.get("peak_rss_mb"), run.get("peak_rss_mb"),
+              thresholds["rss_growth"], False)
+        check(where, "model_load_seconds", old.get("model_load_seconds"),
+              run.get("model_load_seconds"), thresholds["latency_growth"], False)
+
+    old_stages = {r["clip"]: r for r in baseline.get("stages", [])}
+    for run in report["stages"]:
+        old = old_stages.get(run["clip"])
+        if not old or "error" in run or "error" in old:
+            continue
+        for stage, summary in run["stages"].items():
+            previous = old["stages"].get(stage)
+            if summary and previous:
+                check({"clip": run["clip"], "stage": stage}, "p95_ms", previous["p95_ms"],
+                      summary["p95_ms"], thresholds["latency_growth"], False)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark analyze_video")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    parser.add_argument("--script", default=DEFAULT_SCRIPT, help="Analysis script to benchmark")
+    parser.add_argument("--clip", action="append", dest="clips", metavar="WxH@FPSxSECONDS",
+                        help="Synthetic clip to generate (repeatable)")
+    parser.add_argument("--quick", action="store_true", help="One short synthetic clip")
+    parser.add_argument("--startup", action="store_true",
+                        help="Only measure import, model build and first-inference times")
+    parser.add_argument("--emotion-backends", action="store_true",
+                        help="Only compare the emotion classifier backends (Keras, TFLite)")
+    parser.add_argument("--frame-transport", action="store_true",
+                        help="Only compare moving frames between processes by queue and by shared memory")
+    parser.add_argument("--no-test-video", action="store_true",
+                        help="Skip server/test_video.mp4")
+    parser.add_argument("--clip-dir", default=os.path.join(tempfile.gettempdir(), "video_bench_clips"),
+                        help="Where generated clips are kept between runs")
+    parser.add_argument("--modes", default=",".join(MODES),
+                        help=f"Comma-separated subset of {', '.join(MODES)}")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Processes for the parallel mode")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="Report to compare against")
+    parser.add_argument("--fps-drop", type=float, default=DEFAULT_THRESHOLDS["fps_drop"])
+    parser.add_argument("--rss-growth", type=float, default=DEFAULT_THRESHOLDS["rss_growth"])
+    parser.add_argument("--latency-growth", type=float,
+                        default=DEFAULT_THRESHOLDS["latency_growth"])
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        print(json.dumps(run_one(json.loads(args.run_one))))
+        return 0
+
+    modes = [mode for mode in args.modes.split(",") if mode]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    if args.startup:
+        report = {"startup": _spawn({"script": args.script, "mode": "startup"})}
+    elif args.frame_transport:
+        report = {"frame_transport": compare_frame_transport(consumers=max(1, args.workers))}
+    else:
+        os.makedirs(args.clip_dir, exist_ok=True)
+        specs = [parse_clip(spec) for spec in args.clips] if args.clips else (
+            QUICK_CLIPS if args.quick or args.emotion_backends else DEFAULT_CLIPS
+        )
+        clips = []
+        for width, height, fps, seconds in specs:
+            name = clip_name(width, height, fps, seconds)
+            path = os.path.join(args.clip_dir, f"{name}.mp4")
+            if not os.path.exists(path):
+                make_clip(path, width, height, fps, seconds)
+            clips.append((name, path))
+        if not args.no_test_video and os.path.exists(TEST_VIDEO):
+            clips.append(("test_video.mp4", TEST_VIDEO))
+        if args.emotion_backends:
+            # Real faces when there is a test video, otherwise the first synthetic clip
+            name, path = clips[-1] if clips[-1][1] == TEST_VIDEO else clips[0]
+            report = {"emotion_backends": {
+                "clip": name, **_spawn({"script": args.script, "video": path, "mode": "emotion_backends"})
+            }}
+        else:
+            report = run_benchmark(clips, modes, args.script, args.workers,
+                                   log=lambda message: print(message, file=sys.stderr))
+    if args.baseline and "runs" in report:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["regressions"] = compare(report, baseline, {
+            "fps_drop": args.fps_drop,
+            "rss_growth": args.rss_growth,
+            "latency_growth": args.latency_growth,
+        })
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    failed = "error" in report.get("startup", {}) or "error" in report.get("emotion_backends", {})
+    return 1 if report.get("regressions") or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Checkpoints for resuming a long analysis.
+
+With checkpointing on, the serial analysis loop saves its state each time an
+engagement segment is finished (at most once per `checkpoint_interval`
+seconds): the finished segments and the decoder position of the sampled
+frame that opens the next one. A restarted job with the same video and
+settings seeks to that frame and carries on.
+
+Segments are already the unit the sharded path splits on (see
+video_pipeline.sharding), so the finished prefix is treated as one more shard
+and the final result is identical to an uninterrupted run: the models'
+tracking state is reset at every segment start, so a resumed job (which
+starts with fresh models) sees the same state an uninterrupted one does. As
+with sharding, this relies on the container seeking to exact frame positions.
+
+The file is JSON, written to a temporary file and renamed into place, so a
+kill mid-write leaves the previous checkpoint intact. A checkpoint whose
+video or result-affecting settings differ is ignored. The file is removed
+once the analysis finishes.
+"""
+import json
+import os
+import time
+
+from video_pipeline.aggregate import SegmentStats
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+
+# Options that change how fast the result is produced, not what it is
+RESULT_NEUTRAL_OPTIONS = (
+    "workers", "prefetch", "decode_process", "concurrent_models", "profile", "checkpoint", "checkpoint_interval"
+)
+
+
+def checkpoint_path(video_path, checkpoint=True):
+    """`checkpoint` is True (file beside the video) or an explicit path."""
+    if isinstance(checkpoint, str):
+        return checkpoint
+    return video_path + CHECKPOINT_SUFFIX
+
+
+def video_identity(video_path):
+    stat = os.stat(video_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def result_settings(config):
+    return {key: value for key, value in config.items() if key not in RESULT_NEUTRAL_OPTIONS}
+
+
+class Checkpoint:
+    """
+    Saved progress of one analysis job.
+
+    Args:
+        path (str): Checkpoint file.
+        video_path (str): The video being analysed.
+        config (dict): Complete analysis config (see build_config).
+        interval (float): Minimum seconds between two saves; 0 saves at
+            every segment boundary.
+    """
+
+    def __init__(self, path, video_path, config, interval=30):
+        self.path = path
+        self.interval = interval
+        self._identity = {
+            "version": CHECKPOINT_VERSION,
+            "video": video_identity(video_path),
+            "settings": result_settings(config),
+        }
+        self._last_save = time.monotonic()
+        # Where the loop resumes: everything before next_frame is in `segments`
+        self.segments = []
+        self.next_frame = 0
+        self.segment_start = 0
+        self.frame_store_rows = 0
+
+    def load(self):
+        """
+        Restore saved progress if the file matches this job.
+
+        Returns:
+            bool: True when there was something to resume from.
+        """
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        # json turns tuples into lists; compare both sides the same way
+        if state.get("identity") != json.loads(json.dumps(self._identity)):
+            return False
+        self.segments = [SegmentStats.from_state(segment) for segment in state["segments"]]
+        self.next_frame = state["next_frame"]
+        self.segment_start = state["segment_start"]
+        self.frame_store_rows = state["frame_store_rows"] or 0
+        return True
+
+    def segment_closed(self, closed_segments, next_frame, segment_start, frame_store_rows=None):
+        """
+        Called when the sampled frame at decoder position `next_frame` opens
+        a new segment starting at `segment_start` seconds; closed_segments
+        are the segments finished since the resume point and
+        frame_store_rows the rows on disk in the frame store, if any.
+        """
+        if time.monotonic() - self._last_save < self.interval:
+            return
+        self.save(self.segments + list(closed_segments), next_frame, segment_start, frame_store_rows)
+
+    def save(self, segments, next_frame, segment_start, frame_store_rows=None):
+        state = {
+            "identity": self._identity,
+            "next_frame": next_frame,
+            "segment_start": segment_start,
+            "frame_store_rows": frame_store_rows,
+            "segments": [segment.to_state() for segment in segments],
+        }
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(state, f)
+        os.replace(temporary, self.path)
+        self._last_save = time.monotonic()
+
+    def resumed_shard(self):
+        """The restored prefix in the shape merge_shards() expects."""
+        return {
+            # Every decoder position before next_frame was grabbed or read
+            "frames_read": self.next_frame,
+            "segments": self.segments,
+            "profiler": None,
+            "model_init_seconds": 0.0,
+        }
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
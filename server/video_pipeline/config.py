@@ -0,0 +1,128 @@
+"""
+Analysis options shared by video_analysis.py and the pipeline helpers.
+
+analyze_video() accepts any of these as keyword arguments (or a `config`
+dict); unknown keys are rejected so typos in job lines fail loudly.
+
+`preset` picks a named quality/speed trade-off (see PRESETS): it sets the
+models' settings, the inference size and the sampling rate together.
+Options given explicitly override the preset's values.
+"""
+from video_pipeline.tflite_emotion import EMOTION_BACKENDS
+
+DEFAULT_CONFIG = {
+    # Quality/speed preset
+    "preset": None,             # "fast", "balanced" or "accurate" (see PRESETS); None = the values below
+    # Parallelism
+    "workers": 1,               # >1 splits the video into frame-range shards
+    # Sampling
+    "analysis_fps": None,       # frames analysed per second; None = every 3rd frame
+    "deadline": None,           # seconds: adapt sampling (and preset) to finish in time (see deadline)
+    # Decoding
+    "prefetch": 4,              # frames decoded ahead on a producer thread; 0 = decode inline
+    "decode_process": False,    # decode in a separate process, frames passed via shared memory
+    # Preprocessing
+    "inference_size": 640,      # longest side (px) of frames given to the models; None = full size
+    # Inference
+    "concurrent_models": False,  # run FaceMesh, Pose and FER on their own threads per frame
+    "pose_complexity": 1,       # MediaPipe Pose model: 0 = lite, 1 = full, 2 = heavy
+    "refine_face_mesh": False,  # FaceMesh attention model (refined eyes and lips, iris points)
+    "mtcnn": True,              # FER face detector fallback: MTCNN, or OpenCV's Haar cascade when False
+    "motion_threshold": 0,      # reuse results while the picture changes less than this; 0 = off
+    "motion_max_gap": 1.0,      # seconds after which a static picture is re-analysed anyway
+    # Emotion
+    "landmark_face_crop": True,  # classify the FaceMesh face crop; MTCNN only when FaceMesh misses
+    "emotion_batch_size": 32,   # face crops per emotion-classifier call; 1 = classify per frame
+    "emotion_backend": "keras",  # "tflite-float16" or "tflite-int8": quantised classifier (see tflite_emotion)
+    # Timeline
+    "segment_duration": 10,     # seconds per engagement segment
+    # Output
+    "time_series": False,       # include per-sample float32 series in the result
+    "profile": False,           # add per-stage timings under "performance" (or VIDEO_PROFILE=1)
+    "frame_store": False,       # True (directory beside the video) or a path: save per-frame outputs
+    # Checkpointing (serial runs only)
+    "checkpoint": False,        # True (file beside the video) or a path: save progress, resume from it
+    "checkpoint_interval": 30,  # minimum seconds between checkpoint saves; 0 = every segment
+}
+
+
+# Preset keys that choose model variants (the rest are frame sizes and rates)
+MODEL_SETTINGS = ("pose_complexity", "refine_face_mesh", "mtcnn")
+
+# Each preset sets the same keys; "balanced" is DEFAULT_CONFIG's values
+PRESETS = {
+    "fast": {
+        "pose_complexity": 0,
+        "refine_face_mesh": False,
+        "mtcnn": False,
+        "inference_size": 480,
+        "analysis_fps": 5,
+    },
+    "balanced": {
+        "pose_complexity": 1,
+        "refine_face_mesh": False,
+        "mtcnn": True,
+        "inference_size": 640,
+        "analysis_fps": None,
+    },
+    "accurate": {
+        "pose_complexity": 2,
+        "refine_face_mesh": True,
+        "mtcnn": True,
+        "inference_size": 960,
+        "analysis_fps": 15,
+    },
+}
+
+
+def build_config(config=None, **options):
+    """
+    Merge user options over DEFAULT_CONFIG.
+
+    Args:
+        config (dict): Base options, e.g. from a job line.
+        **options: Individual overrides, applied after `config`.
+
+    Returns:
+        dict: A complete, validated configuration.
+    """
+    merged = dict(DEFAULT_CONFIG)
+    explicit = {}
+    for source in (config or {}, options):
+        for key, value in source.items():
+            if key not in DEFAULT_CONFIG:
+                raise ValueError(f"Unknown analysis option: {key}")
+            if value is not None:
+                explicit[key] = value
+    preset = explicit.get("preset")
+    if preset is not None:
+        if preset not in PRESETS:
+            raise ValueError(f"preset must be one of {', '.join(PRESETS)}")
+        merged.update(PRESETS[preset])
+    merged.update(explicit)
+
+    merged["workers"] = max(1, int(merged["workers"]))
+    merged["emotion_batch_size"] = max(1, int(merged["emotion_batch_size"]))
+    merged["prefetch"] = max(0, int(merged["prefetch"]))
+    if merged["analysis_fps"] is not None and merged["analysis_fps"] <= 0:
+        raise ValueError("analysis_fps must be positive")
+    if merged["deadline"] is not None:
+        if merged["deadline"] <= 0:
+            raise ValueError("deadline must be positive")
+        if merged["decode_process"]:
+            raise ValueError("deadline cannot be combined with decode_process")
+    if merged["inference_size"] is not None and merged["inference_size"] <= 0:
+        raise ValueError("inference_size must be positive")
+    if merged["motion_threshold"] < 0:
+        raise ValueError("motion_threshold must not be negative")
+    if merged["motion_max_gap"] <= 0:
+        raise ValueError("motion_max_gap must be positive")
+    if merged["checkpoint_interval"] < 0:
+        raise ValueError("checkpoint_interval must not be negative")
+    if merged["pose_complexity"] not in (0, 1, 2):
+        raise ValueError("pose_complexity must be 0, 1 or 2")
+    if merged["emotion_backend"] not in EMOTION_BACKENDS:
+        raise ValueError(f"emotion_backend must be one of {', '.join(EMOTION_BACKENDS)}")
+    if merged["segment_duration"] <= 0:
+        raise ValueError("segment_duration must be positive")
+    return merged
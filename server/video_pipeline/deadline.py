@@ -0,0 +1,204 @@
+"""
+Deadline mode: finish an analysis within a wall-clock budget.
+
+With `deadline` set (seconds), the analysis loop measures its own cost per
+sampled frame as it runs and re-plans the sampling stride so that the rest
+of the video, sampled evenly at that stride, fits in the time left:
+
+    stride = remaining frames * seconds per sample / (time left * SAFETY)
+
+never denser than the configured analysis_fps. Sampling starts at the
+configured stride until the first sample has been timed, then follows the
+plan, so the budget is spread over the whole timeline instead of being
+spent on its beginning. If the plan would
+leave fewer than MIN_SAMPLES_PER_SECOND, the remaining frames are analysed
+with the "fast" preset's model settings. Should the budget run out anyway,
+the loop stops and the result says how far it got.
+
+Sharded runs give every shard the same absolute deadline; each shard plans
+for its own frame range.
+
+AdaptiveSampler is FrameSampler with a stride that may change between
+frames; long gaps are skipped by seeking instead of grabbing every frame.
+"""
+import math
+import time
+
+import cv2
+
+SAFETY = 0.85                 # share of the time left the plan may use
+SMOOTHING = 0.2               # weight of the newest measurement in the running estimate
+MIN_SAMPLES_PER_SECOND = 1.0  # below this rate the remaining frames use the fast preset
+DOWNGRADE_AFTER_SAMPLES = 5   # measurements needed before switching preset
+SEEK_GAP_SECONDS = 2.0        # gaps longer than this are seeked over instead of grabbed
+
+
+class AdaptiveSampler:
+    """
+    Iterate over sampled frames of decoder positions [start_frame, end_frame)
+    with a stride that may change while iterating.
+
+    The first sampled frame is the first frame number divisible by `stride`,
+    as with FrameSampler; each later one is `stride` frames after the
+    previous, using the stride current at that moment. Yields
+    (frame_number, frame) with 1-based frame numbers; `frames_read` counts
+    the decoder positions consumed (grabbed, decoded or seeked over).
+    """
+
+    def __init__(self, cap, stride, start_frame=0, end_frame=None, seek_gap=None):
+        self.cap = cap
+        self.stride = stride
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.seek_gap = seek_gap or max(1, int(round(cap.get(cv2.CAP_PROP_FPS) * SEEK_GAP_SECONDS)))
+        self.frames_read = 0
+        self._buffer = None
+
+    def __iter__(self):
+        cap = self.cap
+        if self.start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame)
+        position = self.start_frame  # frames before the decoder's next one
+        target = (position // self.stride + 1) * self.stride
+        while self.end_frame is None or target <= self.end_frame:
+            gap = target - 1 - position
+            if gap > self.seek_gap:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, target - 1)
+            else:
+                for _ in range(gap):
+                    if not cap.grab():
+                        return
+            ret, frame = cap.read(self._buffer)
+            if not ret:
+                return
+            self._buffer = frame
+            self.frames_read = target - self.start_frame
+            position = target
+            yield target, frame
+            target = position + max(1, int(self.stride))
+        if self.end_frame is not None:
+            # The frames after the last sample were skipped, not missed
+            self.frames_read = self.end_frame - self.start_frame
+
+
+class DeadlinePlanner:
+    """
+    Re-plans the sampling stride of one frame range against a deadline.
+
+    Args:
+        deadline_at (float): time.time() by which the range must be done.
+        base_stride (int): Densest stride allowed (from analysis_fps).
+        fps (float): Source frame rate.
+        end_frame (int): Frame number the range ends at.
+        start_frame (int): Decoder position the range starts at.
+    """
+
+    def __init__(self, deadline_at, base_stride, fps, end_frame, start_frame=0):
+        self.deadline_at = deadline_at
+        self.base_stride = base_stride
+        self.fps = fps
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.sample_seconds = None  # running estimate, once a sample has been timed
+        self.measured = 0
+        self.samples = 0
+        self.first_time = None
+        self.last_time = None
+        self.max_gap = 0.0
+        self.preset_changes = []
+        self.stopped_at = None
+        self._last_sample = None
+        self.stride = self.plan(start_frame)
+
+    def time_left(self):
+        return self.deadline_at - time.time()
+
+    def plan(self, frame_number):
+        """Stride that spreads the time left evenly over the frames after frame_number."""
+        if self.sample_seconds is None:
+            return self.base_stride  # nothing measured yet
+        remaining_frames = max(0, self.end_frame - frame_number)
+        time_left = self.time_left() * SAFETY
+        if time_left <= 0:
+            return max(self.base_stride, remaining_frames)
+        stride = math.ceil(remaining_frames * self.sample_seconds / time_left)
+        return max(self.base_stride, stride)
+
+    def sample_done(self, frame_number, current_time):
+        """
+        Record a finished sample and re-plan.
+
+        Returns:
+            int: The stride to use from here on, or 0 when the budget is
+            spent and the loop should stop.
+        """
+        now = time.monotonic()
+        if self._last_sample is not None:
+            elapsed = now - self._last_sample
+            self.sample_seconds = (
+                elapsed if not self.measured
+                else (1 - SMOOTHING) * self.sample_seconds + SMOOTHING * elapsed
+            )
+            self.measured += 1
+        self._last_sample = now
+        if self.last_time is not None:
+            self.max_gap = max(self.max_gap, current_time - self.last_time)
+        if self.first_time is None:
+            self.first_time = current_time
+        self.last_time = current_time
+        self.samples += 1
+
+        if self.time_left() <= 0:
+            self.stopped_at = current_time
+            return 0
+        self.stride = self.plan(frame_number)
+        return self.stride
+
+    def wants_fast_preset(self):
+        """True once measurements show the plan cannot keep MIN_SAMPLES_PER_SECOND."""
+        if self.preset_changes or self.measured < DOWNGRADE_AFTER_SAMPLES:
+            return False
+        if self.stride <= self.base_stride:
+            return False  # already as dense as configured
+        return self.fps / self.stride < MIN_SAMPLES_PER_SECOND
+
+    def summary(self):
+        return {
+            "samples": self.samples,
+            "first_time": self.first_time,
+            "last_time": self.last_time,
+            "max_gap_seconds": round(self.max_gap, 3),
+            "seconds_per_sample": round(self.sample_seconds, 4) if self.measured else None,
+            "preset_changes": self.preset_changes,
+            "stopped_at": self.stopped_at,
+        }
+
+
+def coverage_report(deadline, shard_summaries, duration, started_at):
+    """The result's "deadline" section, from every shard's planner summary."""
+    samples = sum(summary["samples"] for summary in shard_summaries)
+    covered = 0.0
+    for summary in shard_summaries:
+        if summary["first_time"] is not None:
+            covered += summary["last_time"] - summary["first_time"]
+    stopped = [summary["stopped_at"] for summary in shard_summaries if summary["stopped_at"] is not None]
+    elapsed = time.time() - started_at
+    return {
+        "budget_seconds": deadline,
+        "elapsed_seconds": round(elapsed, 3),
+        "met": elapsed <= deadline,
+        "coverage": {
+            "samples": samples,
+            # Seconds (and share of the timeline) between the first and last sample of each shard
+            "seconds": round(covered, 3),
+            "timeline_fraction": round(min(1.0, covered / duration), 4) if duration else 0,
+            # Achieved sampling rate over the covered time (reported as analysis_fps)
+            "analysis_fps": round(samples / covered, 3) if covered else 0,
+            "samples_per_second": round(samples / duration, 3) if duration else 0,
+            "max_gap_seconds": max((summary["max_gap_seconds"] for summary in shard_summaries), default=0),
+            "complete": not stopped,
+        },
+        "preset_changes": [
+            change for summary in shard_summaries for change in summary["preset_changes"]
+        ],
+    }
@@ -0,0 +1,46 @@
+"""
+Audio extraction for jobs that analyse a video's sound as well as its frames.
+
+The audio track is demuxed and decoded straight from the uploaded file into
+the mono 22.05 kHz WAV the audio pipeline reads (the format the server's
+convertToWav produces), in one ffmpeg pass that skips the video stream
+(-vn), so no frame is decoded twice.
+
+ffmpeg is taken from the `ffmpeg` argument, then FFMPEG_PATH (the Node
+server passes the binary from @ffmpeg-installer/ffmpeg), then PATH.
+"""
+import os
+import shutil
+import subprocess
+
+AUDIO_SAMPLE_RATE = 22050
+
+
+def ffmpeg_binary(ffmpeg=None):
+    binary = ffmpeg or os.environ.get("FFMPEG_PATH") or shutil.which("ffmpeg")
+    if not binary:
+        raise RuntimeError("ffmpeg not found; set FFMPEG_PATH or pass its path")
+    return binary
+
+
+def extract_audio(video_path, output_path, sample_rate=AUDIO_SAMPLE_RATE, ffmpeg=None):
+    """
+    Write the first audio track of `video_path` to `output_path` as mono WAV.
+
+    Returns:
+        str: output_path
+
+    Raises:
+        RuntimeError: When ffmpeg fails, e.g. the video has no audio track.
+    """
+    completed = subprocess.run(
+        [ffmpeg_binary(ffmpeg), "-nostdin", "-v", "error", "-y", "-i", video_path,
+         "-map", "0:a:0", "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "wav", output_path],
+        capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        if "matches no streams" in completed.stderr:
+            raise RuntimeError("Video has no audio track")
+        message = completed.stderr.strip().splitlines()
+        raise RuntimeError(f"Audio extraction failed: {message[0] if message else completed.returncode}")
+    return output_path
@@ -0,0 +1,133 @@
+"""
+Batched FER emotion classification.
+
+FER.detect_emotions() calls its Keras classifier once per face. The batcher
+instead prepares each FaceMesh face crop exactly as FER does (grayscale,
+40 px padding, squared box with FER's default offsets, resize, scale to
+[-1, 1]) and classifies up to `batch_size` faces in one model call.
+
+Every sampled frame goes through the same ordered queue, whether its
+emotions are still pending or already known (MTCNN fallback, no face), so
+scores reach their segments in frame order, exactly as without batching.
+The queue is flushed when it holds `batch_size` faces and at every segment
+boundary.
+"""
+import cv2
+import numpy as np
+
+from video_pipeline.profiling import NULL_PROFILER
+
+EMOTION_LABELS = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
+
+# Values FER uses in detect_emotions()
+FER_PADDING = 40
+FER_OFFSETS = (10, 10)
+
+
+class PendingFace:
+    """
+    A prepared face waiting for the next batch; stands in for an emotions dict.
+
+    The same PendingFace may be queued for several samples (motion gating
+    reuses a frame's results); it is classified once and `emotions` holds
+    the scores from then on.
+    """
+
+    __slots__ = ("tensor", "batch_index", "emotions")
+
+    def __init__(self, tensor):
+        self.tensor = tensor
+        self.batch_index = None
+        self.emotions = None
+
+
+class EmotionBatcher:
+    """
+    Args:
+        detector (FER): Detector whose emotion classifier is reused.
+        batch_size (int): Faces per classifier call.
+        profiler (StageProfiler): Times each classifier call (emotion_batch).
+    """
+
+    def __init__(self, detector, batch_size=32, profiler=None):
+        self.profiler = profiler or NULL_PROFILER
+        self.classifier = detector._FER__emotion_classifier
+        self.target_size = tuple(int(v) for v in self.classifier.input_shape[1:3])
+        self.batch_size = max(1, int(batch_size))
+        self._batch = np.empty((self.batch_size, *self.target_size, 1), dtype=np.float32)
+        self._entries = []
+        self._pending_faces = 0
+
+    @staticmethod
+    def supports(detector):
+        return hasattr(detector, "_FER__emotion_classifier")
+
+    def prepare_face(self, region, box):
+        """Turn a face region + (x, y, w, h) box into a classifier input, or None."""
+        gray = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY)
+        gray = cv2.copyMakeBorder(gray, FER_PADDING, FER_PADDING, FER_PADDING, FER_PADDING,
+                                  cv2.BORDER_CONSTANT, value=0)
+
+        # FER.tosquare(): grow the short side around the centre
+        x, y, w, h = box
+        if h > w:
+            x -= (h - w) // 2
+            w = h
+        elif w > h:
+            y -= (w - h) // 2
+            h = w
+
+        x1 = max(0, x - FER_OFFSETS[0] + FER_PADDING)
+        y1 = max(0, y - FER_OFFSETS[1] + FER_PADDING)
+        x2 = x + w + FER_OFFSETS[0] + FER_PADDING
+        y2 = y + h + FER_OFFSETS[1] + FER_PADDING
+        face = gray[y1:y2, x1:x2]
+        if face.size == 0:
+            return None
+
+        face = cv2.resize(face, (self.target_size[1], self.target_size[0]))
+        tensor = face.astype(np.float32) / 255.0
+        tensor -= 0.5
+        tensor *= 2.0
+        return PendingFace(tensor)
+
+    def add(self, segment, emotions, time=None):
+        """
+        Queue a sample's emotions for `segment`.
+
+        Args:
+            segment (SegmentStats): Segment the sample belongs to.
+            emotions: A PendingFace, an emotions dict, or None.
+            time (float): Sample time in seconds, for the optional time series.
+        """
+        if isinstance(emotions, PendingFace) and emotions.emotions is not None:
+            emotions = emotions.emotions
+        self._entries.append((segment, emotions, time))
+        if isinstance(emotions, PendingFace) and emotions.batch_index is None:
+            emotions.batch_index = self._pending_faces
+            self._batch[self._pending_faces, :, :, 0] = emotions.tensor
+            self._pending_faces += 1
+            if self._pending_faces >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        predictions = []
+        if self._pending_faces:
+            with self.profiler.stage("emotion_batch"):
+                predictions = np.asarray(
+                    self.classifier.predict_on_batch(self._batch[:self._pending_faces])
+                )
+
+        for segment, emotions, time in self._entries:
+            if isinstance(emotions, PendingFace):
+                if emotions.emotions is None:
+                    scores = predictions[emotions.batch_index]
+                    emotions.emotions = {
+                        label: round(float(score), 2) for label, score in zip(EMOTION_LABELS, scores)
+                    }
+                emotions = emotions.emotions
+            if emotions:
+                segment.add_emotions(emotions, time)
+
+        self._entries = []
+        self._pending_faces = 0
@@ -0,0 +1,90 @@
+"""
+Face crops for emotion recognition, taken from FaceMesh landmarks.
+
+FaceMesh already locates the face on every frame, so FER does not need to run
+MTCNN again: we cut a region around the landmark bounding box, level the eye
+line, and hand FER the face rectangle. FER.detect_emotions(img,
+face_rectangles=...) then skips detection and only runs its emotion
+classifier.
+"""
+import cv2
+import numpy as np
+
+# Outer eye corners (image-left and image-right) in the FaceMesh topology
+EYE_CORNERS = (33, 263)
+
+
+def landmark_points(landmarks, width, height):
+    """FaceMesh landmarks as an (n, 2) array of pixel coordinates."""
+    points = np.array([(lm.x, lm.y) for lm in landmarks], dtype=np.float32)
+    points *= (width, height)
+    return points
+
+
+def eye_roll_angle(points):
+    """Angle in degrees of the eye line; positive when the image-right eye is lower."""
+    left, right = points[EYE_CORNERS[0]], points[EYE_CORNERS[1]]
+    return float(np.degrees(np.arctan2(right[1] - left[1], right[0] - left[0])))
+
+
+def crop_face(bgr_frame, landmarks, margin=0.4, min_roll=5.0):
+    """
+    Cut an eye-levelled face region out of the frame.
+
+    Args:
+        bgr_frame (np.ndarray): Frame the landmarks were computed on (any size).
+        landmarks: FaceMesh `multi_face_landmarks[i].landmark`.
+        margin (float): Extra context around the landmark box, as a fraction of its side.
+        min_roll (float): Head roll in degrees below which no rotation is applied.
+
+    Returns:
+        tuple: (region, (x, y, w, h)) where the box is the face inside `region`,
+        or (None, None) when the landmarks fall outside the frame.
+    """
+    height, width = bgr_frame.shape[:2]
+    points = landmark_points(landmarks, width, height)
+    x0, y0 = points.min(axis=0)
+    x1, y1 = points.max(axis=0)
+
+    center_x, center_y = (x0 + x1) / 2, (y0 + y1) / 2
+    half = max(x1 - x0, y1 - y0) * (1 + margin) / 2
+    rx0, ry0 = int(max(0, center_x - half)), int(max(0, center_y - half))
+    rx1, ry1 = int(min(width, center_x + half)), int(min(height, center_y + half))
+    if rx1 - rx0 < 2 or ry1 - ry0 < 2:
+        return None, None
+
+    region = bgr_frame[ry0:ry1, rx0:rx1]
+    roll = eye_roll_angle(points)
+    if abs(roll) >= min_roll:
+        # Positive angles rotate counter-clockwise, which levels a positive roll
+        rotation = cv2.getRotationMatrix2D((center_x - rx0, center_y - ry0), roll, 1.0)
+        region = cv2.warpAffine(region, rotation, (region.shape[1], region.shape[0]),
+                                borderMode=cv2.BORDER_REPLICATE)
+
+    box = (
+        int(max(0, x0 - rx0)),
+        int(max(0, y0 - ry0)),
+        int(round(x1 - x0)),
+        int(round(y1 - y0)),
+    )
+    return region, box
+
+
+def detect_emotions_from_landmarks(detector, bgr_frame, face_landmarks):
+    """
+    Run only FER's classifier on the FaceMesh face.
+
+    Returns the same list-of-dicts shape as FER.detect_emotions().
+    """
+    region, box = crop_face(bgr_frame, face_landmarks.landmark)
+    if region is None:
+        return []
+    return detector.detect_emotions(region, face_rectangles=[box])
+
+
+def prepare_face_from_landmarks(batcher, bgr_frame, face_landmarks):
+    """Queue-ready face for an EmotionBatcher, or None when no crop is possible."""
+    region, box = crop_face(bgr_frame, face_landmarks.landmark)
+    if region is None:
+        return None
+    return batcher.prepare_face(region, box)
@@ -0,0 +1,282 @@
+"""
+Shared-memory frame transport between processes.
+
+Pickling a frame through a multiprocessing queue copies it twice and costs
+about as much as the inference on it for 1080p BGR images. SharedFrameRing
+instead preallocates `slots` frame slots in one multiprocessing.shared_memory
+block; only slot numbers travel through the queues:
+
+    producer: acquire() a free slot, write the frame into its NumPy view,
+              publish() it with the frame number
+    consumer: get() the next published slot (a RingSlot holding views into
+              shared memory, no copy), use it, release() it
+
+Each slot holds the prepared frame pair the models read (BGR and RGB at the
+inference resolution), so a consumer passes the slot straight to
+analyze_frame(). The producer writes into the slot directly
+(FramePreprocessor.prepare(frame, out=...)), so decoding, resizing and
+colour conversion are the only copies.
+
+- Backpressure: a producer blocks in acquire() while every slot is in use.
+- Sequence numbers: publish() numbers slots 0, 1, 2, ...; with several
+  consumers, results can be put back in order with reorder().
+- Recycling: a released slot goes back to the free queue; a consumer must
+  not touch a slot's views after releasing it.
+
+RingFrames runs the decoder (FrameSampler + FramePreprocessor) in its own
+process and yields frames from the ring, with the same interface and the
+same one-iteration validity as PrefetchedFrames; analyze_video uses it when
+decode_process is on.
+"""
+import heapq
+import queue
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from video_pipeline.preprocess import FramePreprocessor
+from video_pipeline.profiling import NULL_PROFILER
+from video_pipeline.sampling import FrameSampler
+
+_HEADER_FIELDS = 3  # sequence, frame number, frames read
+_POLL_SECONDS = 1.0
+
+
+class RingSlot:
+    """A published slot: `bgr` and `rgb` are views into shared memory."""
+
+    __slots__ = ("index", "sequence", "frame_number", "frames_read", "bgr", "rgb")
+
+    def __init__(self, index, sequence, frame_number, frames_read, bgr, rgb):
+        self.index = index
+        self.sequence = sequence
+        self.frame_number = frame_number
+        self.frames_read = frames_read
+        self.bgr = bgr
+        self.rgb = rgb
+
+
+class SharedFrameRing:
+    """
+    A ring of (bgr, rgb) frame slots in shared memory.
+
+    Create it in the parent process and pass it to child processes as a
+    Process argument; children attach to the same memory and queues. Only
+    the creating process should call unlink().
+
+    Args:
+        ctx: multiprocessing context the queues are made with.
+        slots (int): Number of frames that can be in flight.
+        frame_shape (tuple): (height, width) of the prepared frames.
+    """
+
+    def __init__(self, ctx, slots, frame_shape):
+        self.slots = max(1, int(slots))
+        self.frame_shape = tuple(frame_shape)
+        header_bytes = self.slots * _HEADER_FIELDS * 8
+        frame_bytes = self.slots * 2 * int(np.prod(self.frame_shape)) * 3
+        self._memory = shared_memory.SharedMemory(create=True, size=header_bytes + frame_bytes)
+        self._owner = True
+        self.free = ctx.Queue()
+        self.ready = ctx.Queue()
+        self._map()
+        self._next_sequence = 0
+        for index in range(self.slots):
+            self.free.put(index)
+
+    def _map(self):
+        buffer = self._memory.buf
+        self._header = np.ndarray((self.slots, _HEADER_FIELDS), dtype=np.int64, buffer=buffer)
+        self._frames = np.ndarray(
+            (self.slots, 2, *self.frame_shape, 3), dtype=np.uint8,
+            buffer=buffer, offset=self._header.nbytes,
+        )
+
+    def __getstate__(self):
+        return {
+            "slots": self.slots, "frame_shape": self.frame_shape,
+            "name": self._memory.name, "free": self.free, "ready": self.ready,
+        }
+
+    def __setstate__(self, state):
+        self.slots = state["slots"]
+        self.frame_shape = state["frame_shape"]
+        self.free = state["free"]
+        self.ready = state["ready"]
+        self._memory = shared_memory.SharedMemory(name=state["name"])
+        self._owner = False
+        self._map()
+        self._next_sequence = 0
+
+    def views(self, index):
+        """(bgr, rgb) views of slot `index`."""
+        return self._frames[index, 0], self._frames[index, 1]
+
+    # Producer side
+
+    def acquire(self, timeout=None):
+        """Block until a slot is free; returns its index."""
+        return self.free.get(timeout=timeout)
+
+    def publish(self, index, frame_number, frames_read=0):
+        """Hand a filled slot to the consumers; returns its sequence number."""
+        sequence = self._next_sequence
+        self._next_sequence += 1
+        self._header[index] = (sequence, frame_number, frames_read)
+        self.ready.put(index)
+        return sequence
+
+    def finish(self, message=None, consumers=1):
+        """
+        Tell `consumers` consumers that nothing more will be published;
+        `message` (e.g. {"error": ...}) is passed on to them.
+        """
+        for _ in range(consumers):
+            self.ready.put(("done", message))
+
+    # Consumer side
+
+    def get(self, timeout=None):
+        """
+        The next published slot, or the producer's finish() message as
+        ("done", message).
+        """
+        item = self.ready.get(timeout=timeout)
+        if isinstance(item, tuple):
+            return item
+        sequence, frame_number, frames_read = (int(v) for v in self._header[item])
+        return RingSlot(item, sequence, frame_number, frames_read, *self.views(item))
+
+    def release(self, index):
+        self.free.put(index)
+
+    def close(self):
+        self._header = self._frames = None
+        try:
+            self._memory.close()
+        except BufferError:
+            # A caller still holds a slot view; the mapping goes with the last one
+            pass
+
+    def unlink(self):
+        if self._owner:
+            self._memory.unlink()
+
+
+def reorder(items):
+    """
+    Yield (sequence, value) pairs in sequence order, starting at 0, from
+    pairs arriving in any order (e.g. results from several consumers).
+    """
+    pending = []
+    expected = 0
+    for sequence, value in items:
+        heapq.heappush(pending, (sequence, value))
+        while pending and pending[0][0] == expected:
+            yield heapq.heappop(pending)
+            expected += 1
+    while pending:
+        yield heapq.heappop(pending)
+
+
+def _decode_into_ring(video_path, ring, stride, start_frame, end_frame, inference_size, stop):
+    """Decoder process: sampled, prepared frames of [start_frame, end_frame) into the ring."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            raise RuntimeError(f"Failed to open video file: {video_path}")
+        sampler = FrameSampler(cap, stride, start_frame, end_frame)
+        preprocessor = FramePreprocessor(inference_size)
+        for frame_number, frame in sampler:
+            index = ring.acquire()
+            if index is None or stop.is_set():
+                return
+            preprocessor.prepare(frame, out=ring.views(index))
+            ring.publish(index, frame_number, sampler.frames_read)
+        ring.finish({"frames_read": sampler.frames_read})
+    except BaseException as e:
+        ring.finish({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        cap.release()
+        ring.close()
+
+
+class RingFrames:
+    """
+    Yield (frame_number, bgr, rgb) decoded and preprocessed in a separate
+    process and handed over through a SharedFrameRing.
+
+    Args:
+        ctx: multiprocessing context for the decoder process.
+        video_path (str): Video to decode.
+        frame_size (tuple): (height, width) of the source frames.
+        stride (int): Sampling stride (see FrameSampler).
+        start_frame, end_frame (int): Decoder positions to cover.
+        inference_size (int): Passed to FramePreprocessor.
+        depth (int): Number of ring slots, i.e. frames decoded ahead.
+        profiler (StageProfiler): Times the waits for frames (decode_wait).
+    """
+
+    def __init__(self, ctx, video_path, frame_size, stride, start_frame=0, end_frame=None,
+                 inference_size=None, depth=4, profiler=None):
+        self.ctx = ctx
+        self.video_path = video_path
+        self.stride = stride
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.inference_size = inference_size
+        self.frame_shape = FramePreprocessor(inference_size).target_shape(*frame_size)
+        self.depth = max(2, int(depth))
+        self.profiler = profiler or NULL_PROFILER
+        self.frames_read = 0
+
+    def _next(self, ring, decoder):
+        while True:
+            try:
+                return ring.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if not decoder.is_alive():
+                    # Killed without reaching finish(); take what is left, if anything
+                    try:
+                        return ring.get(timeout=0)
+                    except queue.Empty:
+                        raise RuntimeError("Frame decoder process exited unexpectedly")
+
+    def __iter__(self):
+        ring = SharedFrameRing(self.ctx, self.depth, self.frame_shape)
+        stop = self.ctx.Event()
+        decoder = self.ctx.Process(
+            target=_decode_into_ring,
+            args=(self.video_path, ring, self.stride, self.start_frame, self.end_frame,
+                  self.inference_size, stop),
+            name="frame-decoder", daemon=True,
+        )
+        decoder.start()
+
+        held = None
+        try:
+            while True:
+                if held is not None:
+                    ring.release(held)
+                    held = None
+                with self.profiler.stage("decode_wait"):
+                    item = self._next(ring, decoder)
+                if isinstance(item, tuple):
+                    message = item[1] or {}
+                    if "error" in message:
+                        raise RuntimeError(message["error"])
+                    self.frames_read = message["frames_read"]
+                    return
+                held = item.index
+                self.frames_read = item.frames_read
+                yield item.frame_number, item.bgr, item.rgb
+        finally:
+            stop.set()
+            ring.release(None)  # wake a decoder waiting for a slot
+            decoder.join(timeout=10)
+            if decoder.is_alive():
+                decoder.kill()
+                decoder.join()
+            ring.close()
+            ring.unlink()
@@ -0,0 +1,197 @@
+"""
+Per-frame model outputs, saved for re-scoring without re-inference.
+
+With frame_store on, analyze_video writes one row per sampled frame into a
+directory of raw columns (beside the video by default):
+
+    <video>.frames/
+        meta.json           fps, frames read, duration, settings, row count,
+                            segment start times
+        time.bin            float64 (n,)        sample time in seconds
+        frame.bin           int64   (n,)        1-based frame number
+        looking.bin         uint8   (n,)        face found (eye contact sample)
+        reused.bin          uint8   (n,)        outputs reused by motion gating
+        emotions.bin        float64 (n, 7)      EMOTION_LABELS order; NaN row = none
+        pose.bin            float64 (n, 33, 4)  x, y, z, visibility; NaN row = none
+        face_mesh.bin       float16 (n, 478, 3) x, y, z; NaN where missing
+
+Emotion scores and pose keypoints are stored at full precision, so that
+replaying them through the scoring code reproduces the original numbers
+exactly. The face mesh is kept at half precision (well below a pixel at
+inference size) because nothing scores it yet and it is most of the size:
+about 4 KB per sampled frame in total, ~200 MB for 90 minutes at 10 fps.
+
+Columns are plain C-order arrays, so open_frame_store() maps them with
+np.memmap instead of reading them. Rows are appended at segment boundaries,
+after the emotion batch for the segment has been classified. A sharded run
+writes one part directory per shard and merge_parts() concatenates them in
+timeline order; a checkpointed run truncates the columns back to the row
+count saved with the checkpoint before resuming.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+
+from video_pipeline.emotion_batch import EMOTION_LABELS, PendingFace
+
+FRAME_STORE_VERSION = 1
+FRAME_STORE_SUFFIX = ".frames"
+META_FILE = "meta.json"
+POSE_LANDMARKS = 33
+FACE_MESH_LANDMARKS = 478  # 468, or 478 with refine_landmarks (iris points)
+
+# name: (dtype, per-row shape)
+COLUMNS = {
+    "time": (np.float64, ()),
+    "frame": (np.int64, ()),
+    "looking": (np.uint8, ()),
+    "reused": (np.uint8, ()),
+    "emotions": (np.float64, (len(EMOTION_LABELS),)),
+    "pose": (np.float64, (POSE_LANDMARKS, 4)),
+    "face_mesh": (np.float16, (FACE_MESH_LANDMARKS, 3)),
+}
+
+
+def frame_store_path(video_path, frame_store=True):
+    """`frame_store` is True (directory beside the video) or an explicit path."""
+    if isinstance(frame_store, str):
+        return frame_store
+    return video_path + FRAME_STORE_SUFFIX
+
+
+def _row_bytes(name):
+    dtype, shape = COLUMNS[name]
+    return np.dtype(dtype).itemsize * int(np.prod(shape, dtype=np.int64))
+
+
+def _column_file(directory, name):
+    return os.path.join(directory, f"{name}.bin")
+
+
+class FrameStoreWriter:
+    """
+    Appends rows to the columns in `directory`.
+
+    Args:
+        directory (str): Created if missing.
+        keep_rows (int): Rows already on disk to keep (a resumed run); any
+            rows after them are dropped. 0 starts the store afresh.
+    """
+
+    def __init__(self, directory, keep_rows=0):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.rows = keep_rows
+        self._files = {}
+        for name in COLUMNS:
+            path = _column_file(directory, name)
+            f = open(path, "r+b" if keep_rows and os.path.exists(path) else "w+b")
+            f.truncate(keep_rows * _row_bytes(name))
+            f.seek(0, os.SEEK_END)
+            self._files[name] = f
+        self._pending = []
+
+    def add(self, time, frame_number, looking_at_screen, emotions, pose_landmarks,
+            face_landmarks, reused=False):
+        """
+        Queue one sample. `emotions` may still be a PendingFace; it is read
+        at the next flush(), after the batch holding it has been classified.
+        """
+        self._pending.append(
+            (time, frame_number, looking_at_screen, emotions, pose_landmarks, face_landmarks, reused)
+        )
+
+    def flush(self):
+        count = len(self._pending)
+        if not count:
+            return
+        columns = {
+            name: np.full((count, *shape), np.nan if np.dtype(dtype).kind == "f" else 0, dtype=dtype)
+            for name, (dtype, shape) in COLUMNS.items()
+        }
+        for row, (time, frame_number, looking, emotions, pose_landmarks, face_landmarks,
+                  reused) in enumerate(self._pending):
+            columns["time"][row] = time
+            columns["frame"][row] = frame_number
+            columns["looking"][row] = bool(looking)
+            columns["reused"][row] = bool(reused)
+            if isinstance(emotions, PendingFace):
+                emotions = emotions.emotions
+            if emotions:
+                columns["emotions"][row] = [emotions.get(label, np.nan) for label in EMOTION_LABELS]
+            if pose_landmarks:
+                columns["pose"][row] = [
+                    (landmark.x, landmark.y, landmark.z, landmark.visibility)
+                    for landmark in pose_landmarks
+                ]
+            if face_landmarks:
+                points = face_landmarks[:FACE_MESH_LANDMARKS]
+                columns["face_mesh"][row, :len(points)] = [
+                    (landmark.x, landmark.y, landmark.z) for landmark in points
+                ]
+        for name, f in self._files.items():
+            f.write(columns[name].tobytes())
+            # Reach the OS, so a checkpoint saved next never points past the data
+            f.flush()
+        self.rows += count
+        self._pending = []
+
+    def close(self):
+        """Close the columns; rows not flushed yet are dropped."""
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+
+def mark_incomplete(directory):
+    """Drop meta.json, so a store being (re)written is never read as finished."""
+    try:
+        os.remove(os.path.join(directory, META_FILE))
+    except FileNotFoundError:
+        pass
+
+
+def merge_parts(directory, part_directories):
+    """Concatenate shard part stores (in timeline order) into `directory`, then remove them."""
+    os.makedirs(directory, exist_ok=True)
+    for name in COLUMNS:
+        with open(_column_file(directory, name), "wb") as output:
+            for part in part_directories:
+                with open(_column_file(part, name), "rb") as f:
+                    shutil.copyfileobj(f, output)
+    for part in part_directories:
+        shutil.rmtree(part, ignore_errors=True)
+
+
+def write_meta(directory, meta):
+    """Finish the store: write meta.json (atomically) with the row count on disk."""
+    rows = os.path.getsize(_column_file(directory, "time")) // _row_bytes("time")
+    temporary = os.path.join(directory, META_FILE + ".tmp")
+    with open(temporary, "w") as f:
+        json.dump({"version": FRAME_STORE_VERSION, "columns": list(COLUMNS), **meta, "rows": rows}, f)
+    os.replace(temporary, os.path.join(directory, META_FILE))
+
+
+def open_frame_store(directory):
+    """
+    Map a finished frame store.
+
+    Returns:
+        tuple: (meta dict, {column name: read-only np.memmap or empty array})
+    """
+    with open(os.path.join(directory, META_FILE)) as f:
+        meta = json.load(f)
+    if meta.get("version") != FRAME_STORE_VERSION:
+        raise ValueError(f"Unsupported frame store version: {meta.get('version')}")
+    rows = meta["rows"]
+    columns = {}
+    for name, (dtype, shape) in COLUMNS.items():
+        if rows:
+            columns[name] = np.memmap(
+                _column_file(directory, name), dtype=dtype, mode="r", shape=(rows, *shape)
+            )
+        else:
+            columns[name] = np.empty((0, *shape), dtype=dtype)
+    return meta, columns
@@ -0,0 +1,45 @@
+"""
+Run FaceMesh, Pose and FER side by side on the same prepared frame.
+
+Each model gets one dedicated thread for the per-frame calls. Calls on an
+instance are serialised, not confined to that thread: analyze_frame() waits
+for every call it submits before returning, and the main thread uses the same
+instances only between frames (EmotionBatcher's predict_on_batch on the FER
+classifier, reset_models(), warm_up(), and runs without concurrent_models).
+So no instance is ever used from two threads at once. Instances come from
+the ModelRegistry, so a model that is not loaded yet is built on the first
+thread that asks for it. MediaPipe and TensorFlow release the GIL while
+they run, so the per-frame latency drops towards that of the slowest model.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ModelThreads:
+    """
+    Args:
+        registry (ModelRegistry): Source of the model instances.
+        names (iterable): Models that get a thread each, e.g. ("face_mesh", "pose").
+    """
+
+    def __init__(self, registry, names):
+        self._registry = registry
+        self._executors = {
+            name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"model-{name}")
+            for name in names
+        }
+
+    def _call(self, name, fn, args):
+        return fn(self._registry.get(name), *args)
+
+    def submit(self, name, fn, *args):
+        """
+        Call fn(model, *args) on model `name`'s thread.
+
+        Returns:
+            concurrent.futures.Future: The call's result.
+        """
+        return self._executors[name].submit(self._call, name, fn, args)
+
+    def close(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=True)
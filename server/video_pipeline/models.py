@@ -0,0 +1,93 @@
+"""
+Lazily built models.
+
+video_analysis.py used to build FaceMesh, Pose and FER(mtcnn=True) at import
+time, so every import (including tooling that only wants
+calculate_score_and_feedback or the posture maths) paid for importing
+mediapipe and TensorFlow and loading three models. The registry instead
+holds a factory per model; the factory (and the heavy imports inside it)
+runs on the first get(), once per process, under a lock.
+
+Servers call warm_up() once at start-up so the first request does not pay
+the cold start; the worker pool does this before reporting a worker ready.
+
+Cold start is measured by the start-up benchmark, run from the server
+directory:
+
+    python -m video_pipeline.benchmark --startup
+
+It reports, for a fresh interpreter, the import time of video_analysis.py
+(no models), the build time of each model, the first inference on a blank
+frame (graph initialisation) and a second one for comparison.
+
+Measured on one Xeon core (mediapipe 0.10.14, fer 22.4.0 on TensorFlow
+2.18, three runs, first with a cold page cache):
+
+    import video_analysis.py     0.04-0.08 s
+    build face_mesh              3.4-5.7 s (includes importing mediapipe)
+    build pose                   0.02 s
+    build detector (FER, MTCNN)  0.9-1.0 s (includes importing TensorFlow)
+    first inference              0.17-0.19 s
+    second inference             0.06-0.07 s
+    peak RSS                     652 MB
+
+A worker is ready (warm_up() done) after 4.0-4.3 s. On the 30 s
+test_video.mp4, a cold `python video_analysis.py` run takes 16.2 s and the
+same job on a warmed-up worker takes 9.1-9.8 s with model_init_seconds 0.
+"""
+import threading
+import time
+
+
+class ModelRegistry:
+    """Named model factories, each built at most once per process."""
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._lock = threading.Lock()
+        self.init_seconds = {}
+
+    def register(self, name, factory):
+        """Register `factory()` as the builder of model `name`."""
+        self._factories[name] = factory
+
+    def names(self):
+        return list(self._factories)
+
+    def loaded(self, name):
+        return name in self._instances
+
+    def get(self, name):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                started = time.perf_counter()
+                instance = self._factories[name]()
+                self.init_seconds[name] = time.perf_counter() - started
+                self._instances[name] = instance
+        return instance
+
+    def reset(self, names):
+        """Call reset() on those of the given models that are built (tracking state)."""
+        for name in names:
+            instance = self._instances.get(name)
+            if instance is not None:
+                instance.reset()
+
+    def total_init_seconds(self):
+        return sum(self.init_seconds.values())
+
+    def warm_up(self, names=None):
+        """
+        Build the given models (default: all) now.
+
+        Returns:
+            dict: {name: seconds spent building it in this process}
+        """
+        for name in names or self.names():
+            self.get(name)
+        return {name: round(self.init_seconds.get(name, 0.0), 3) for name in names or self.names()}
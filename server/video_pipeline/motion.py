@@ -0,0 +1,72 @@
+"""
+Motion gating: skip the models on frames where nothing has changed.
+
+Speakers are mostly stationary, so consecutive samples often differ by little
+more than sensor noise. MotionGate compares a small grayscale thumbnail of
+each sampled frame with the thumbnail of the last frame the models actually
+saw; while the mean absolute difference stays below `threshold` (0-255
+grey levels) the caller reuses that frame's results. Comparing against the
+last *inferred* frame, not the previous sample, means slow drift still
+triggers fresh inference once it adds up, and a scene change always does.
+Inference is also forced once `max_gap` seconds have passed, and at every
+reset() (the caller resets at segment boundaries, which keeps sharded runs
+identical to serial ones).
+"""
+import cv2
+import numpy as np
+
+THUMBNAIL_WIDTH = 64
+
+
+class MotionGate:
+    """
+    Args:
+        threshold (float): Mean absolute grey-level difference below which a
+            frame counts as unchanged.
+        max_gap (float): Longest run, in seconds, of reused results.
+    """
+
+    def __init__(self, threshold, max_gap=1.0):
+        self.threshold = threshold
+        self.max_gap = max_gap
+        self.inferred = 0
+        self.reused = 0
+        self._thumbnail = None
+        self._scratch = None
+        self._reference = None
+        self._reference_time = None
+
+    def reset(self):
+        """Forget the reference frame; the next frame is always inferred."""
+        self._reference = None
+        self._reference_time = None
+
+    def _make_thumbnail(self, bgr_frame):
+        height, width = bgr_frame.shape[:2]
+        size = (THUMBNAIL_WIDTH, max(1, round(height * THUMBNAIL_WIDTH / width)))
+        self._scratch = cv2.resize(bgr_frame, size, dst=self._scratch, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(self._scratch, cv2.COLOR_BGR2GRAY)
+
+    def difference(self, bgr_frame):
+        """Mean absolute difference to the reference thumbnail (inf without one)."""
+        self._thumbnail = self._make_thumbnail(bgr_frame)
+        if self._reference is None or self._reference.shape != self._thumbnail.shape:
+            return np.inf
+        return float(cv2.absdiff(self._thumbnail, self._reference).mean())
+
+    def should_infer(self, bgr_frame, time):
+        """
+        Decide whether the models must run on this frame, and count the decision.
+
+        Returns:
+            bool: True to run inference (the frame becomes the new reference),
+            False to reuse the previous results.
+        """
+        unchanged = self.difference(bgr_frame) < self.threshold
+        if unchanged and time - self._reference_time < self.max_gap:
+            self.reused += 1
+            return False
+        self._reference = self._thumbnail
+        self._reference_time = time
+        self.inferred += 1
+        return True
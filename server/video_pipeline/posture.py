@@ -0,0 +1,151 @@
+"""
+Vectorised posture scoring.
+
+The scalar path built five small arrays per frame, scored them one frame at a
+time and kept a nested dict per frame. PostureEngine instead copies the five
+pose keypoints of each sampled frame into a preallocated (capacity, 5, 2)
+array and scores the whole block in one NumPy pass. The maths mirrors
+calculate_craniovertebral_angle(), calculate_shoulder_posture() and the
+original CVA/STA/BSR/APSP scoring branches, including their handling of
+degenerate (zero-length) vectors.
+
+Scoring weights based on clinical reliability indices:
+1. CVA (50%): ICC = 0.95 from PMC8284766
+2. Shoulder Assessment (50%):
+   - Tilt Angle (20%): ICC = 0.92
+   - Bilateral Ratio (15%): ICC = 0.89
+   - AP Position (15%): ICC = 0.87
+"""
+import numpy as np
+
+from video_pipeline.profiling import NULL_PROFILER
+
+# MediaPipe Pose landmark indices, in keypoint-array order
+POSE_KEYPOINTS = (0, 7, 8, 11, 12)  # nose, left ear, right ear, left shoulder, right shoulder
+NOSE, LEFT_EAR, RIGHT_EAR, LEFT_SHOULDER, RIGHT_SHOULDER = range(len(POSE_KEYPOINTS))
+
+CVA_OPTIMAL = 50.1
+CVA_CONFIDENCE = 2.8  # 95% confidence interval from research
+
+
+def _norm(vectors):
+    return np.sqrt(vectors[:, 0] * vectors[:, 0] + vectors[:, 1] * vectors[:, 1])
+
+
+def posture_measurements(points):
+    """
+    Args:
+        points (np.ndarray): (n, 5, 2) normalised keypoints in POSE_KEYPOINTS order.
+
+    Returns:
+        tuple of (n,) arrays: (cva, cva_confidence, sta, bsr, apsp)
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        left_shoulder = points[:, LEFT_SHOULDER]
+        right_shoulder = points[:, RIGHT_SHOULDER]
+        ear_point = (points[:, LEFT_EAR] + points[:, RIGHT_EAR]) / 2
+        shoulder_point = (left_shoulder + right_shoulder) / 2
+
+        # Craniovertebral angle against the horizontal
+        neck_line = ear_point - shoulder_point
+        norms = _norm(neck_line)
+        valid = norms != 0
+        cva = np.where(valid, np.degrees(np.arccos(neck_line[:, 0] / norms)), 0.0)
+        cva_confidence = np.where(valid, CVA_CONFIDENCE, 0.0)
+
+        # Shoulder tilt, bilateral ratio and anterior-posterior position
+        dy = right_shoulder[:, 1] - left_shoulder[:, 1]
+        dx = right_shoulder[:, 0] - left_shoulder[:, 0]
+        sta = np.abs(np.degrees(np.arctan2(dy, dx)))
+
+        shoulder_width = _norm(right_shoulder - left_shoulder)
+        heights = np.stack([left_shoulder[:, 1], right_shoulder[:, 1]])
+        bsr = heights.max(axis=0) / heights.min(axis=0)
+
+        apsp = np.abs(left_shoulder[:, 0] - right_shoulder[:, 0]) / shoulder_width * 50
+
+    return cva, cva_confidence, sta, bsr, apsp
+
+
+def posture_scores(points):
+    """
+    Score a block of frames.
+
+    Returns:
+        np.ndarray: (n, 4) unrounded [cva_score, tilt_score, symmetry_score,
+        position_score] per frame, each 0-100.
+    """
+    cva, cva_confidence, sta, bsr, apsp = posture_measurements(points)
+
+    with np.errstate(invalid="ignore"):
+        # np.fmax keeps the non-NaN operand, like the scalar max(0, x) did
+        cva_deviation = np.abs(cva - CVA_OPTIMAL)
+        cva_score = np.where(
+            cva < 45, np.fmax(0, 70 - (45 - cva) * 3),           # Forward Head Posture
+            np.where(
+                cva > 55, np.fmax(0, 70 - (cva - 55) * 3),       # Extended
+                np.where(
+                    cva_deviation <= cva_confidence, 100.0,      # Within optimal range
+                    np.fmax(70, 100 - cva_deviation * 2)         # Acceptable range
+                )
+            )
+        )
+
+        sta_score = np.where(sta > 2.1, np.fmax(0, 100 - (sta - 2.1) * 15), 100.0)
+        bsr_score = np.where((bsr < 0.94) | (bsr > 1.03),
+                             np.fmax(0, 100 - np.abs(1 - bsr) * 150), 100.0)
+        apsp_score = np.where(
+            (apsp < 46) | (apsp > 54),
+            np.fmax(0, 100 - np.minimum(np.abs(apsp - 46), np.abs(apsp - 54)) * 3),
+            100.0
+        )
+
+    return np.stack([cva_score, sta_score, bsr_score, apsp_score], axis=1)
+
+
+class PostureEngine:
+    """
+    Buffers pose keypoints per sampled frame and scores them in blocks.
+
+    Scores are rounded to 2 decimals per frame (as in the per-frame posture
+    dicts) and added to their segment in frame order. Call flush() before a
+    segment is reported and at the end of the video.
+    """
+
+    def __init__(self, capacity=256, profiler=None):
+        self.capacity = capacity
+        self.profiler = profiler or NULL_PROFILER
+        self._points = np.empty((capacity, len(POSE_KEYPOINTS), 2), dtype=np.float64)
+        self._segments = []
+        self._times = []
+
+    def add(self, segment, pose_landmarks, time=None):
+        row = self._points[len(self._segments)]
+        for i, index in enumerate(POSE_KEYPOINTS):
+            landmark = pose_landmarks[index]
+            row[i, 0] = landmark.x
+            row[i, 1] = landmark.y
+        self._queued(segment, time)
+
+    def add_points(self, segment, pose, time=None):
+        """Like add(), from a stored (33, >=2) array of pose landmarks."""
+        self._points[len(self._segments)] = pose[list(POSE_KEYPOINTS), :2]
+        self._queued(segment, time)
+
+    def _queued(self, segment, time):
+        self._segments.append(segment)
+        self._times.append(time)
+        if len(self._segments) == self.capacity:
+            self.flush()
+
+    def flush(self):
+        count = len(self._segments)
+        if not count:
+            return
+        # np.round matches the round() the scalar path applied to np.float64 scores
+        with self.profiler.stage("posture_scoring"):
+            scores = np.round(posture_scores(self._points[:count]), 2).tolist()
+        for segment, frame_scores, time in zip(self._segments, scores, self._times):
+            segment.add_posture(frame_scores, time)
+        self._segments = []
+        self._times = []
@@ -0,0 +1,145 @@
+"""
+Decode-ahead for the analysis loop.
+
+Without it, decoding (VideoCapture.read) and inference (FaceMesh, Pose, FER)
+take turns on one thread. PrefetchedFrames moves decoding and preprocessing
+to a producer thread that fills a small ring of preallocated slots while the
+analysis thread runs the models; OpenCV and the model runtimes release the
+GIL, so the two overlap.
+
+- Backpressure: the producer needs a free slot before it decodes the next
+  sampled frame, so at most `depth` frames are ever buffered.
+- Slot recycling: a slot is handed back when the consumer asks for the next
+  frame, so a yielded frame stays valid for exactly one iteration, the same
+  contract as FrameSampler.
+- Shutdown: errors in the producer are re-raised in the consumer; if the
+  consumer stops early (exception, break, SystemExit) the producer is told
+  to stop and is joined before the capture is released.
+
+PreparedFrames is the same interface without the thread.
+"""
+import queue
+import threading
+import time
+
+from video_pipeline.preprocess import FramePreprocessor
+from video_pipeline.profiling import NULL_PROFILER
+
+_DONE = object()
+
+
+class _ProducerError:
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _timed_frames(sampler, profiler):
+    """Iterate a sampler, recording each step (grabs and decode) as a decode stage."""
+    frames = iter(sampler)
+    if not profiler.enabled:
+        yield from frames
+        return
+    while True:
+        started = time.perf_counter()
+        item = next(frames, None)
+        if item is None:
+            return
+        profiler.record("decode", time.perf_counter() - started)
+        yield item
+
+
+class PreparedFrames:
+    """
+    Yield (frame_number, bgr, rgb) for every sampled frame, on the calling thread.
+
+    Args:
+        sampler (FrameSampler): Source of sampled frames.
+        inference_size (int): Passed to FramePreprocessor.
+        profiler (StageProfiler): Times decode and preprocessing.
+    """
+
+    def __init__(self, sampler, inference_size=None, profiler=None):
+        self.sampler = sampler
+        self.profiler = profiler or NULL_PROFILER
+        self.preprocessor = FramePreprocessor(inference_size, profiler=self.profiler)
+
+    @property
+    def frames_read(self):
+        return self.sampler.frames_read
+
+    def __iter__(self):
+        for frame_number, frame in _timed_frames(self.sampler, self.profiler):
+            bgr, rgb = self.preprocessor.prepare(frame)
+            yield frame_number, bgr, rgb
+
+
+class PrefetchedFrames:
+    """
+    Yield (frame_number, bgr, rgb) decoded and preprocessed on a producer thread.
+
+    Args:
+        sampler (FrameSampler): Source of sampled frames; only the producer
+            thread touches it (and its VideoCapture).
+        inference_size (int): Passed to FramePreprocessor.
+        depth (int): Number of ring slots, i.e. frames decoded ahead.
+        profiler (StageProfiler): Times decode and preprocessing on the producer
+            thread, and the analysis thread's waits for frames (decode_wait).
+    """
+
+    def __init__(self, sampler, inference_size=None, depth=4, profiler=None):
+        self.sampler = sampler
+        self.depth = max(1, int(depth))
+        self.profiler = profiler or NULL_PROFILER
+        # copy_frame: the sampler reuses its decode buffer, every slot needs its own
+        self._slots = [
+            FramePreprocessor(inference_size, copy_frame=True, profiler=self.profiler)
+            for _ in range(self.depth)
+        ]
+        self.frames_read = 0
+
+    def _produce(self, free, ready, stop):
+        try:
+            for frame_number, frame in _timed_frames(self.sampler, self.profiler):
+                slot = free.get()
+                if slot is None or stop.is_set():
+                    return
+                bgr, rgb = self._slots[slot].prepare(frame)
+                ready.put((slot, frame_number, bgr, rgb, self.sampler.frames_read))
+        except BaseException as error:
+            ready.put(_ProducerError(error))
+        finally:
+            ready.put(_DONE)
+
+    def __iter__(self):
+        free = queue.Queue()
+        for slot in range(self.depth):
+            free.put(slot)
+        ready = queue.Queue()
+        stop = threading.Event()
+        producer = threading.Thread(
+            target=self._produce, args=(free, ready, stop), name="frame-prefetch", daemon=True
+        )
+        producer.start()
+
+        held = None
+        try:
+            while True:
+                if held is not None:
+                    free.put(held)
+                    held = None
+                with self.profiler.stage("decode_wait"):
+                    item = ready.get()
+                if item is _DONE:
+                    self.frames_read = self.sampler.frames_read
+                    return
+                if isinstance(item, _ProducerError):
+                    raise item.error
+                held, frame_number, bgr, rgb, frames_read = item
+                self.frames_read = frames_read
+                yield frame_number, bgr, rgb
+        finally:
+            stop.set()
+            free.put(None)  # wake a producer waiting for a slot
+            producer.join()
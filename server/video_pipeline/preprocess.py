@@ -0,0 +1,88 @@
+"""
+Shared per-frame preprocessing for FaceMesh, Pose and FER.
+
+Each sampled frame is resized once to the inference resolution and converted
+to RGB once; all three models then read the same prepared images. MediaPipe
+reports landmarks in normalised [0, 1] coordinates, so downscaling does not
+change their units.
+
+The output arrays are reused between calls and are only valid until the next
+call to prepare().
+"""
+import cv2
+import numpy as np
+
+from video_pipeline.profiling import NULL_PROFILER
+
+
+class FramePreprocessor:
+    """
+    Args:
+        inference_size (int): Longest side, in pixels, of the image given to the
+            models. Frames are never upscaled; None disables resizing.
+        copy_frame (bool): Copy frames that need no resizing into an own
+            buffer instead of returning the caller's array (for callers that
+            reuse their decode buffer while the prepared frame is still in use).
+        profiler (StageProfiler): Times the resize and color_convert stages.
+    """
+
+    def __init__(self, inference_size=None, copy_frame=False, profiler=None):
+        self.inference_size = inference_size
+        self.copy_frame = copy_frame
+        self.profiler = profiler or NULL_PROFILER
+        self._bgr = None
+        self._rgb = None
+
+    def target_shape(self, height, width):
+        size = self.inference_size
+        if not size or max(height, width) <= size:
+            return height, width
+        scale = size / max(height, width)
+        return max(1, round(height * scale)), max(1, round(width * scale))
+
+    @staticmethod
+    def _buffer(current, shape):
+        if current is None or current.shape != shape:
+            return np.empty(shape, dtype=np.uint8)
+        return current
+
+    def prepare(self, frame, out=None):
+        """
+        Args:
+            frame (np.ndarray): BGR frame as returned by VideoCapture.read().
+            out (tuple): Optional (bgr, rgb) arrays of the target shape to
+                write into instead of the preprocessor's own buffers (e.g.
+                a shared-memory slot); the frame is always copied then.
+
+        Returns:
+            tuple: (bgr, rgb) images at the inference resolution.
+        """
+        height, width = frame.shape[:2]
+        target_height, target_width = self.target_shape(height, width)
+        if out is not None and out[0].shape != (target_height, target_width, 3):
+            raise ValueError(f"Output buffers are {out[0].shape[:2]}, frames need "
+                             f"{(target_height, target_width)}")
+
+        if (target_height, target_width) == (height, width):
+            if out is not None or self.copy_frame:
+                if out is None:
+                    self._bgr = self._buffer(self._bgr, frame.shape)
+                bgr = self._bgr if out is None else out[0]
+                with self.profiler.stage("resize"):
+                    np.copyto(bgr, frame)
+            else:
+                bgr = frame
+        else:
+            if out is None:
+                self._bgr = self._buffer(self._bgr, (target_height, target_width, 3))
+            bgr = self._bgr if out is None else out[0]
+            with self.profiler.stage("resize"):
+                cv2.resize(frame, (target_width, target_height), dst=bgr,
+                           interpolation=cv2.INTER_AREA)
+
+        if out is None:
+            self._rgb = self._buffer(self._rgb, bgr.shape)
+        rgb = self._rgb if out is None else out[1]
+        with self.profiler.stage("color_convert"):
+            cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=rgb)
+        return bgr, rgb
@@ -0,0 +1,144 @@
+"""
+Optional per-stage timing for analyze_video.
+
+With profiling on (profile=True, --profile or VIDEO_PROFILE=1) every stage of
+the pipeline records one latency per call, and the result gains a
+"performance" section:
+
+    "performance": {
+        "wall_seconds": 41.2,
+        "sampled_frames_per_second": 14.6,
+        "model_init_seconds": 3.8,
+        "peak_rss_mb": 912.4,
+        "peak_rss_children_mb": 0.0,
+        "stages": {"decode": {"count": 600, "total_ms": ..., "p50_ms": ...,
+                              "p95_ms": ..., "max_ms": ...}, ...}
+    }
+
+model_init_seconds counts only models built during this analysis (0 for a
+warmed-up worker); sharded runs report their slowest shard.
+
+Stages: decode, decode_wait (analysis thread waiting on the decode-ahead
+thread), resize (or the copy into a decode-ahead slot), color_convert,
+face_mesh, pose, face_crop (crop prepared for the batched classifier), fer
+(FER classifier on the FaceMesh crop), mtcnn (FER's full detector),
+emotion_batch, posture_scoring, motion_gate and frame (everything
+analyze_frame does for one sample).
+
+With profiling off the pipeline is handed NULL_PROFILER, whose stage() returns
+one shared no-op context manager, so the cost is an attribute lookup and a
+call per stage.
+"""
+import os
+import sys
+import time
+from array import array
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak RSS is reported as None
+    resource = None
+
+PROFILE_ENV = "VIDEO_PROFILE"
+
+
+def profiling_enabled(config):
+    """True when the config or the VIDEO_PROFILE environment variable asks for it."""
+    return bool(config.get("profile")) or os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+
+def latency_summary(seconds):
+    """Count, total and p50/p95/max of per-call latencies, in milliseconds."""
+    if not len(seconds):
+        return None
+    values = np.asarray(seconds) * 1000
+    return {
+        "count": int(values.size),
+        "total_ms": round(float(values.sum()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def peak_rss_mb(children=False):
+    """Peak resident set size of this process (or its largest child), in MiB."""
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class _StageTimer:
+    __slots__ = ("_samples", "_started")
+
+    def __init__(self, samples):
+        self._samples = samples
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._samples.append(time.perf_counter() - self._started)
+        return False
+
+
+class StageProfiler:
+    """Collects one latency per stage call, in compact float64 arrays."""
+
+    enabled = True
+
+    def __init__(self):
+        self._samples = {}
+
+    def _stage_samples(self, name):
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples.setdefault(name, array("d"))
+        return samples
+
+    def stage(self, name):
+        """Context manager timing one call of stage `name`."""
+        return _StageTimer(self._stage_samples(name))
+
+    def record(self, name, seconds):
+        self._stage_samples(name).append(seconds)
+
+    def merge(self, other):
+        """Add another profiler's samples, e.g. from a shard process."""
+        for name, samples in other._samples.items():
+            self._stage_samples(name).extend(samples)
+
+    def summary(self):
+        return {name: latency_summary(samples) for name, samples in self._samples.items()}
+
+
+class _NullContext:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _NullProfiler:
+    """Stand-in used when profiling is off."""
+
+    enabled = False
+    _context = _NullContext()
+
+    def stage(self, name):
+        return self._context
+
+    def record(self, name, seconds):
+        pass
+
+
+NULL_PROFILER = _NullProfiler()
@@ -0,0 +1,70 @@
+"""
+Frame sampling for analyze_video.
+
+Only sampled frames are decoded into BGR images. Frames in between are
+skipped with VideoCapture.grab(), which advances the demuxer/decoder without
+the retrieve step (colour conversion and copy into a NumPy array).
+"""
+import cv2
+
+LEGACY_SAMPLE_EVERY = 3  # analyse every third frame when no target fps is set
+
+
+def sample_stride(fps, analysis_fps=None):
+    """
+    Number of source frames per analysed frame.
+
+    Args:
+        fps (float): Source frame rate.
+        analysis_fps (float): Target analysis rate, e.g. 2, 5 or 10. None keeps
+            the historical "every third frame" behaviour.
+    """
+    if not analysis_fps:
+        return LEGACY_SAMPLE_EVERY
+    if analysis_fps <= 0:
+        raise ValueError("analysis_fps must be positive")
+    return max(1, int(round(fps / analysis_fps)))
+
+
+class FrameSampler:
+    """
+    Iterate over the sampled frames of decoder positions [start_frame, end_frame).
+
+    Yields (frame_number, frame) where frame_number is 1-based like the frame
+    counter analyze_video has always used; a frame is sampled when
+    frame_number % stride == 0. After iteration `frames_read` holds the
+    number of frames consumed from the stream (sampled or skipped).
+
+    Frames are decoded into one reused buffer, so a yielded frame is only
+    valid until the next iteration.
+    """
+
+    def __init__(self, cap, stride, start_frame=0, end_frame=None):
+        self.cap = cap
+        self.stride = stride
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.frames_read = 0
+        self._buffer = None
+
+    def __iter__(self):
+        cap = self.cap
+        if self.start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame)
+
+        frame_number = self.start_frame
+        while self.end_frame is None or frame_number < self.end_frame:
+            if (frame_number + 1) % self.stride:
+                if not cap.grab():
+                    break
+                frame_number += 1
+                self.frames_read += 1
+                continue
+
+            ret, frame = cap.read(self._buffer)
+            if not ret:
+                break
+            self._buffer = frame
+            frame_number += 1
+            self.frames_read += 1
+            yield frame_number, frame
@@ -0,0 +1,87 @@
+"""
+Frame-range sharding for analyze_video.
+
+Segment boundaries depend only on frame timestamps, never on model output,
+so they can be planned before any frame is decoded. Shards are cut exactly at
+the sampled frame that opens a segment; every segment is then analysed by a
+single shard and merging is plain concatenation in timeline order.
+
+FaceMesh and Pose carry tracking and smoothing state from frame to frame;
+the analysis loop resets it at the start of every segment
+(video_analysis.reset_models), so a segment's results are the same whichever
+shard, and whichever process, analyses it.
+"""
+
+
+def segment_start_frames(total_frames, fps, sample_every, segment_duration):
+    """
+    Frame numbers (1-based, as counted by analyze_video) of the sampled frames
+    that open a new engagement segment.
+    """
+    starts = []
+    start_time = 0
+    for frame_number in range(sample_every, total_frames + 1, sample_every):
+        current_time = frame_number / fps
+        if current_time - start_time >= segment_duration:
+            starts.append(frame_number)
+            start_time = current_time
+    return starts
+
+
+def plan_shards(total_frames, fps, sample_every, segment_duration, workers):
+    """
+    Split the video into at most `workers` contiguous frame ranges.
+
+    Returns:
+        list of dict: {"start_frame", "end_frame", "segment_start"} where
+        start_frame/end_frame are 0-based decoder positions (end exclusive,
+        None for "until the end of the stream") and segment_start is the
+        start time of the segment the shard opens with.
+    """
+    boundaries = segment_start_frames(total_frames, fps, sample_every, segment_duration)
+    cuts = []
+    for k in range(1, workers):
+        target = total_frames * k / workers
+        candidate = next((b for b in boundaries if b >= target), None)
+        if candidate is not None and (not cuts or candidate > cuts[-1]):
+            cuts.append(candidate)
+
+    shards = []
+    start = 0
+    for frame_number in cuts:
+        # The boundary frame is frame number n, i.e. decoder position n - 1
+        shards.append({"start_frame": start, "end_frame": frame_number - 1})
+        start = frame_number - 1
+    shards.append({"start_frame": start, "end_frame": None})
+
+    for shard in shards:
+        shard["segment_start"] = (shard["start_frame"] + 1) / fps if shard["start_frame"] else 0
+    return shards
+
+
+def merge_shards(shard_results):
+    """
+    Stitch shard outputs back into one timeline.
+
+    Each shard returns its segments with the last one still open. A shard's
+    open segment is closed by the first sample of the next non-empty shard,
+    exactly as the serial loop would close it.
+
+    Returns:
+        tuple: (closed_segments, trailing_segment, frames_read)
+    """
+    closed = []
+    trailing = None
+    frames_read = 0
+
+    for result in shard_results:
+        frames_read += result["frames_read"]
+        segments = result["segments"]
+        if not any(segment.samples for segment in segments):
+            continue
+        if trailing is not None:
+            closed.append(trailing)
+        closed.extend(segments[:-1])
+        trailing = segments[-1]
+
+    return closed, trailing, frames_read
@@ -0,0 +1,50 @@
+"""
+Streaming progress events for analyze_video.
+
+With streaming on, analyze_video reports every finished engagement segment as
+it happens instead of staying silent until the whole file is done:
+
+    {"event": "segment", "index": 0, "time": 0, "emotions": {...},
+     "engagement": 0.93, "posture": {...}, "frames_processed": 300,
+     "total_frames": 1800, "progress": 16.7, "elapsed_seconds": 4.1,
+     "eta_seconds": 20.5}
+    ...
+    {"event": "result", "result": {...full analysis incl. assessment...}}
+
+On failure the last event is {"event": "error", ...}.
+"""
+import json
+import sys
+import time
+
+
+class ProgressTracker:
+    """Frames-processed based progress and remaining-time estimate."""
+
+    def __init__(self, total_frames):
+        self.total_frames = total_frames
+        self.started = time.monotonic()
+
+    def snapshot(self, frames_processed):
+        elapsed = time.monotonic() - self.started
+        remaining = max(0, self.total_frames - frames_processed)
+        rate = frames_processed / elapsed if elapsed > 0 else 0
+        return {
+            "frames_processed": frames_processed,
+            "total_frames": self.total_frames,
+            "progress": round(min(100.0, frames_processed / self.total_frames * 100), 1)
+            if self.total_frames else 0,
+            "elapsed_seconds": round(elapsed, 2),
+            "eta_seconds": round(remaining / rate, 2) if rate > 0 else None,
+        }
+
+
+def ndjson_writer(output=None):
+    """Event callback that writes one JSON object per line and flushes."""
+    output = output or sys.stdout
+
+    def write(event):
+        output.write(json.dumps(event) + "\n")
+        output.flush()
+
+    return write
@@ -0,0 +1,146 @@
+"""
+Quantised TFLite backend for FER's emotion classifier.
+
+FER classifies every face with its Keras CNN in float32 TensorFlow. With
+emotion_backend="tflite-float16" or "tflite-int8" the same network is
+converted once to a TFLite flatbuffer and run with the TFLite interpreter
+(XNNPACK on CPU) instead:
+
+    tflite-float16  float16 weights, float32 maths
+    tflite-int8     int8 weights (dynamic-range quantisation); activations
+                    are quantised on the fly, so no calibration faces are
+                    needed and the cached file depends only on the model
+
+Outputs are the same seven softmax scores in EMOTION_LABELS order, so
+emotion_scores keep their keys; how closely they agree with the stock model
+is measured by `python -m video_pipeline.benchmark --emotion-backends`.
+
+Converted models are cached as <cache>/fer_emotion_<quantisation>_<digest>.tflite
+where the digest covers the Keras weights; the cache directory is
+VIDEO_MODEL_CACHE (default ~/.cache/video_analysis). The interpreter comes
+from ai_edge_litert or tflite_runtime when either is installed and from
+TensorFlow otherwise; converting needs TensorFlow.
+"""
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+MODEL_CACHE_ENV = "VIDEO_MODEL_CACHE"
+DEFAULT_MODEL_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "video_analysis")
+EMOTION_BACKENDS = ("keras", "tflite-float16", "tflite-int8")
+
+
+def model_cache_dir():
+    return os.environ.get(MODEL_CACHE_ENV) or DEFAULT_MODEL_CACHE
+
+
+def model_digest(keras_model):
+    """sha256 over the input shape and every weight array of a Keras model."""
+    digest = hashlib.sha256(repr(tuple(keras_model.input_shape)).encode())
+    for weights in keras_model.get_weights():
+        digest.update(np.ascontiguousarray(weights).tobytes())
+    return digest.hexdigest()
+
+
+def convert_classifier(keras_model, quantization):
+    """
+    Convert a Keras classifier to a TFLite flatbuffer.
+
+    Args:
+        quantization (str): "float16" or "int8".
+
+    Returns:
+        bytes: The .tflite model.
+    """
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization != "int8":
+        raise ValueError(f"Unknown quantization: {quantization}")
+    # Optimize.DEFAULT without a representative dataset is dynamic-range int8
+    return converter.convert()
+
+
+def cached_classifier_path(keras_model, quantization, cache_dir=None):
+    """Path of the converted model, converting (once per weights) if needed."""
+    cache_dir = cache_dir or model_cache_dir()
+    path = os.path.join(
+        cache_dir, f"fer_emotion_{quantization}_{model_digest(keras_model)[:16]}.tflite"
+    )
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        model = convert_classifier(keras_model, quantization)
+        # Write then rename, so concurrent workers never load half a file
+        descriptor, temporary = tempfile.mkstemp(suffix=".tmp", dir=cache_dir)
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                f.write(model)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+    return path
+
+
+def _interpreter(path, num_threads):
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=path, num_threads=num_threads)
+
+
+class TFLiteEmotionClassifier:
+    """
+    Drop-in for FER's Keras classifier: input_shape, predict_on_batch(),
+    predict() and __call__ over (n, h, w, 1) float32 batches.
+
+    The interpreter is resized only when the batch size changes, so steady
+    EmotionBatcher batches reuse their tensors. Not thread-safe; like every
+    model here it is used from one thread at a time.
+    """
+
+    def __init__(self, path, num_threads=None):
+        self.path = path
+        self._interpreter = _interpreter(path, num_threads)
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self.input_shape = (None, *(int(v) for v in self._input["shape"][1:]))
+        self._batch_size = None
+
+    def predict_on_batch(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.shape[0] != self._batch_size:
+            self._interpreter.resize_tensor_input(self._input["index"], batch.shape)
+            self._interpreter.allocate_tensors()
+            self._batch_size = batch.shape[0]
+        self._interpreter.set_tensor(self._input["index"], batch)
+        self._interpreter.invoke()
+        return self._interpreter.get_tensor(self._output["index"]).copy()
+
+    def predict(self, batch, **kwargs):
+        return self.predict_on_batch(batch)
+
+    __call__ = predict
+
+
+def quantize_detector(detector, quantization, cache_dir=None, num_threads=None):
+    """
+    Swap a FER detector's Keras classifier for its TFLite conversion.
+
+    Both FER.detect_emotions() and EmotionBatcher then use the quantised
+    model; MTCNN face detection is unchanged.
+    """
+    keras_model = detector._FER__emotion_classifier
+    path = cached_classifier_path(keras_model, quantization, cache_dir)
+    detector._FER__emotion_classifier = TFLiteEmotionClassifier(path, num_threads)
+    return detector
@@ -0,0 +1,308 @@
+"""
+Resident worker pool for video analysis.
+
+Each worker process imports the analysis script once and calls its warm_up()
+if it has one (so mediapipe, TensorFlow and the FaceMesh/Pose/FER models are
+only built at start-up), then serves jobs until it is recycled. Before each
+job it calls the script's reset_models(), if it has one, so tracking state
+left by the previous video does not leak into the first frames of the next.
+
+The pool itself speaks a JSON-lines protocol:
+
+    stdin:  {"id": "42", "video_path": "/abs/path.mp4", ...extra kwargs}
+    stdout: {"id": "42", "result": {...}}   or   {"id": "42", "error": "..."}
+
+A job may name another function of the script to call instead of the pool's
+default, e.g. {"id": "43", "function": "analyze_multimodal", ...}.
+
+Jobs with "stream": true also get {"id": "42", "event": {...}} lines for each
+progress event (see video_pipeline.streaming) before the final result. The
+stream's own closing "result"/"error" event is not forwarded: the result
+line carries the same content, and the full result is sent only once.
+
+Usage (from the server directory):
+    python -m video_pipeline.worker_pool --script video_analysis.py --workers 2
+    python -m video_pipeline.worker_pool --script ../backend/video_analysis.py
+
+Backend jobs pass the extra `output_dir` argument in the job line.
+"""
+import argparse
+import importlib.util
+import json
+import multiprocessing as mp
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+
+DEFAULT_WORKERS = 2
+DEFAULT_JOB_TIMEOUT = 600     # seconds
+DEFAULT_MAX_JOBS = 50         # recycle a worker after this many jobs
+DEFAULT_STARTUP_TIMEOUT = 300  # seconds allowed for model loading
+
+
+def load_analysis_module(script_path):
+    """Import an analysis script (e.g. video_analysis.py) by file path."""
+    script_path = os.path.abspath(script_path)
+    script_dir = os.path.dirname(script_path)
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+
+    module_name = os.path.splitext(os.path.basename(script_path))[0]
+    spec = importlib.util.spec_from_file_location(module_name, script_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _forward_progress(conn):
+    """on_event callback sending progress events to the pool, but not the closing result."""
+    def on_event(event):
+        if event.get("event") not in ("result", "error"):
+            conn.send({"event": event})
+    return on_event
+
+
+def _worker_main(conn, script_path, function_name, warm_up_options=None):
+    # Anything the models or the analysis script print must not reach the
+    # pool's stdout, which carries the JSON-lines protocol.
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    try:
+        module = load_analysis_module(script_path)
+        getattr(module, function_name)  # a missing entry point fails start-up, not the first job
+        # Load the models now rather than on the first job
+        warm_up = getattr(module, "warm_up", None)
+        reset_models = getattr(module, "reset_models", None)
+        if warm_up and warm_up_options:
+            warm_up(warm_up_options)
+        elif warm_up:
+            warm_up()
+    except BaseException as e:
+        conn.send({"ready": False, "error": f"Failed to load {script_path}: {str(e)}"})
+        return
+    conn.send({"ready": True})
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        if job.pop("stream", False):
+            job["on_event"] = _forward_progress(conn)
+
+        try:
+            name = job.pop("function", function_name)
+            analyze = getattr(module, name, None) if not name.startswith("_") else None
+            if not callable(analyze):
+                raise ValueError(f"{os.path.basename(script_path)} has no function {name!r}")
+            if reset_models:
+                reset_models()
+            conn.send({"result": analyze(**job)})
+        except BaseException as e:
+            # analyze_frame() calls sys.exit() on fatal frame errors
+            error = str(e) if isinstance(e, Exception) else f"Analysis exited ({type(e).__name__}: {e})"
+            conn.send({"error": error, "traceback": traceback.format_exc()})
+            if not isinstance(e, Exception):
+                break
+
+
+class _WorkerSlot(threading.Thread):
+    """Owns one worker process and feeds it jobs from the shared queue."""
+
+    def __init__(self, pool, index):
+        super().__init__(name=f"video-worker-{index}", daemon=True)
+        self.pool = pool
+        self.process = None
+        self.conn = None
+        self.jobs_done = 0
+
+    def _start_worker(self):
+        ctx = self.pool.ctx
+        parent_conn, child_conn = ctx.Pipe()
+        process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.pool.script_path, self.pool.function_name,
+                  self.pool.warm_up_options),
+        )
+        process.start()
+        child_conn.close()
+
+        if not parent_conn.poll(self.pool.startup_timeout):
+            process.kill()
+            raise RuntimeError("Worker did not finish loading models in time")
+        try:
+            message = parent_conn.recv()
+        except EOFError:
+            raise RuntimeError("Worker exited while loading models")
+        if not message.get("ready"):
+            process.join()
+            raise RuntimeError(message.get("error", "Worker failed to start"))
+
+        self.process, self.conn, self.jobs_done = process, parent_conn, 0
+
+    def _stop_worker(self, kill=False):
+        if self.process is None:
+            return
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout=10)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        self.process, self.conn = None, None
+
+    def _run_job(self, job_id, kwargs):
+        if self.process is None:
+            self._start_worker()
+
+        self.conn.send(kwargs)
+        deadline = time.monotonic() + self.pool.job_timeout
+        while True:
+            if not self.conn.poll(max(0, deadline - time.monotonic())):
+                self._stop_worker(kill=True)
+                return {"error": f"Video analysis timed out after {self.pool.job_timeout}s"}
+            try:
+                message = self.conn.recv()
+            except EOFError:
+                self._stop_worker(kill=True)
+                return {"error": "Video worker exited unexpectedly"}
+            if "event" not in message:
+                break
+            self.pool.respond(job_id, message)
+
+        self.jobs_done += 1
+        if "error" in message:
+            sys.stderr.write(message.get("traceback", "") + "\n")
+            message = {"error": message["error"]}
+        if self.process is not None and (
+            self.jobs_done >= self.pool.max_jobs or not self.process.is_alive()
+        ):
+            self._stop_worker()
+        return message
+
+    def run(self):
+        try:
+            self._start_worker()
+        except Exception as e:
+            sys.stderr.write(f"Video worker warm-up failed: {str(e)}\n")
+
+        while True:
+            item = self.pool.jobs.get()
+            if item is None:
+                break
+            job_id, kwargs = item
+            try:
+                message = self._run_job(job_id, kwargs)
+            except Exception as e:
+                self._stop_worker(kill=True)
+                message = {"error": str(e)}
+            self.pool.respond(job_id, message)
+
+        self._stop_worker()
+
+
+class VideoWorkerPool:
+    """
+    A fixed number of warm analysis processes fed from one job queue.
+
+    Args:
+        script_path (str): Analysis script exposing `function_name`.
+        workers (int): Number of resident worker processes.
+        job_timeout (float): Seconds before a job's worker is killed and replaced.
+        max_jobs (int): Jobs a worker serves before it is recycled.
+        function_name (str): Entry point called with each job's kwargs.
+        output (file): Stream that receives the JSON-lines responses.
+        warm_up_options (dict): Analysis options passed to the script's
+            warm_up(), so workers build the models those jobs will use.
+    """
+
+    def __init__(self, script_path, workers=DEFAULT_WORKERS, job_timeout=DEFAULT_JOB_TIMEOUT,
+                 max_jobs=DEFAULT_MAX_JOBS, function_name="analyze_video", output=None,
+                 startup_timeout=DEFAULT_STARTUP_TIMEOUT, warm_up_options=None):
+        self.script_path = os.path.abspath(script_path)
+        self.function_name = function_name
+        self.job_timeout = job_timeout
+        self.max_jobs = max(1, max_jobs)
+        self.startup_timeout = startup_timeout
+        self.warm_up_options = warm_up_options
+        self.output = output or sys.stdout
+        self.ctx = mp.get_context("spawn")  # mediapipe/TF are not fork-safe
+        self.jobs = queue.Queue()
+        self._output_lock = threading.Lock()
+        self.slots = [_WorkerSlot(self, i) for i in range(max(1, workers))]
+
+    def start(self):
+        for slot in self.slots:
+            slot.start()
+
+    def submit(self, job_id, kwargs):
+        self.jobs.put((job_id, kwargs))
+
+    def respond(self, job_id, message):
+        message = {"id": job_id, **message}
+        with self._output_lock:
+            self.output.write(json.dumps(message) + "\n")
+            self.output.flush()
+
+    def shutdown(self):
+        for _ in self.slots:
+            self.jobs.put(None)
+        for slot in self.slots:
+            slot.join()
+
+    def serve(self, lines):
+        """Read job lines until EOF, then drain the queue and stop the workers."""
+        self.start()
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+                job_id = job.pop("id")
+            except (ValueError, KeyError, AttributeError):
+                self.respond(None, {"error": f"Invalid job line: {line[:200]}"})
+                continue
+            self.submit(job_id, job)
+        self.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resident video analysis worker pool")
+    parser.add_argument("--script", default=os.path.join(os.getcwd(), "video_analysis.py"),
+                        help="Analysis script to load in each worker")
+    parser.add_argument("--function", default="analyze_video",
+                        help="Function called with each job's arguments")
+    parser.add_argument("--workers", type=int,
+                        default=int(os.environ.get("VIDEO_POOL_SIZE", DEFAULT_WORKERS)))
+    parser.add_argument("--job-timeout", type=float,
+                        default=float(os.environ.get("VIDEO_JOB_TIMEOUT", DEFAULT_JOB_TIMEOUT)))
+    parser.add_argument("--max-jobs", type=int,
+                        default=int(os.environ.get("VIDEO_WORKER_MAX_JOBS", DEFAULT_MAX_JOBS)))
+    args = parser.parse_args(argv)
+
+    pool = VideoWorkerPool(
+        args.script,
+        workers=args.workers,
+        job_timeout=args.job_timeout,
+        max_jobs=args.max_jobs,
+        function_name=args.function,
+    )
+    pool.serve(sys.stdin)
+
+
+if __name__ == "__main__":
+    main()